@@ -0,0 +1,39 @@
+"""Command line interface: python -m skycalc <command>.
+
+All commands run headless; the GUI is still started with main.py.
+"""
+
+import argparse
+import os
+import sys
+
+# the modules import each other by name, as when run from inside skycalc/
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def main(argv=None):
+    import batch
+    from calculator import dispatch
+    import montecarlo
+    import parallel
+    import plantable
+    import server
+    import shard
+
+    parser = argparse.ArgumentParser(prog="python -m skycalc")
+    commands = parser.add_subparsers(dest="command")
+    commands.required = True
+    batch.add_parser(commands)
+    dispatch.add_parser(commands)
+    montecarlo.add_parser(commands)
+    parallel.add_parser(commands)
+    plantable.add_parser(commands)
+    server.add_parser(commands)
+    shard.add_parser(commands)
+
+    args = parser.parse_args(argv)
+    return args.run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
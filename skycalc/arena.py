@@ -0,0 +1,159 @@
+"""Read-only lookup tables in shared memory for worker pools.
+
+The parent process packs flat tables into one multiprocessing.shared_memory
+segment: the blocks of the precomputed plan table (see plantable), by far
+the largest table. Workers attach by name in O(1) - only a small directory
+is decoded - and read the tables as zero-copy memoryviews, so pool start-up
+time and memory per worker stay flat with more processes. Small tables
+(GameData, xp tables) are cheaper to build in every process than to share.
+
+Segment layout:
+
+    header      HEADER: magic, version, directory size
+    directory   JSON: {name: [typecode, offset, count, shape or null], ...}
+    tables      one array per name, each aligned to ALIGNMENT bytes
+"""
+
+import array
+import json
+import struct
+from multiprocessing import shared_memory
+
+import plantable
+
+MAGIC = b"SKYA"
+VERSION = 1
+HEADER = struct.Struct("<4sHI")  # magic, version, directory size
+ALIGNMENT = 8
+
+_worker_arena = None  # keeps the attached segment of a worker alive
+
+
+class Arena:
+    """Named flat tables in one shared memory segment.
+
+    Use create() in the parent and attach() in workers. The creator owns
+    the segment and removes it with unlink().
+    Attributes:
+        memory (SharedMemory): the segment
+        directory (dict): name: [typecode, offset, count, shape]
+        owner (bool): True for the creating process
+    """
+
+    def __init__(self, memory, directory, owner):
+        self.memory = memory
+        self.directory = directory
+        self.owner = owner
+        self.__views = {}
+
+    @property
+    def name(self):
+        return self.memory.name
+
+    @classmethod
+    def create(cls, tables):
+        """Copy tables into a new segment and return its Arena.
+
+        Attributes:
+            tables (dict): name: (typecode, flat sequence, shape or None)
+        """
+        arrays = {name: array.array(typecode, values)
+                  for name, (typecode, values, _) in tables.items()}
+        directory = {}
+        offset = 0
+        for name, (typecode, _, shape) in tables.items():
+            offset = -(-offset // ALIGNMENT) * ALIGNMENT
+            directory[name] = [typecode, offset, len(arrays[name]), shape]
+            offset += len(arrays[name]) * arrays[name].itemsize
+        encoded = json.dumps(directory, separators=(",", ":")).encode("utf-8")
+        start = -(-(HEADER.size + len(encoded)) // ALIGNMENT) * ALIGNMENT
+
+        memory = shared_memory.SharedMemory(create=True,
+                                            size=max(start + offset, 1))
+        HEADER.pack_into(memory.buf, 0, MAGIC, VERSION, len(encoded))
+        memory.buf[HEADER.size:HEADER.size + len(encoded)] = encoded
+        for name, values in arrays.items():
+            begin = start + directory[name][1]
+            memory.buf[begin:begin + len(values) * values.itemsize] = \
+                values.tobytes()
+            directory[name][1] = begin
+        return cls(memory, directory, True)
+
+    @classmethod
+    def attach(cls, name):
+        """Return the Arena of an existing segment."""
+        memory = shared_memory.SharedMemory(name=name)
+        magic, version, size = HEADER.unpack_from(memory.buf)
+        if magic != MAGIC or version != VERSION:
+            memory.close()
+            raise ValueError("Not a table arena: {}".format(name))
+        encoded = bytes(memory.buf[HEADER.size:HEADER.size + size])
+        start = -(-(HEADER.size + size) // ALIGNMENT) * ALIGNMENT
+        directory = json.loads(encoded)
+        for entry in directory.values():
+            entry[1] += start
+        return cls(memory, directory, False)
+
+    def __contains__(self, name):
+        return name in self.directory
+
+    def get(self, name):
+        """Return a read-only, zero-copy memoryview of a table."""
+        if name not in self.__views:
+            typecode, offset, count, shape = self.directory[name]
+            size = count * array.array(typecode).itemsize
+            view = self.memory.buf[offset:offset + size].toreadonly()
+            self.__views[name] = (view.cast(typecode) if shape is None else
+                                  view.cast(typecode, shape))
+        return self.__views[name]
+
+    def close(self):
+        """Release the views and detach from the segment."""
+        for view in self.__views.values():
+            view.release()
+        self.__views = {}
+        self.memory.close()
+
+    def unlink(self):
+        """Close and remove the segment (creator only)."""
+        self.close()
+        if self.owner:
+            self.memory.unlink()
+
+
+def build(table=None):
+    """Create the Arena with all shared tables.
+
+    Attributes:
+        table (PlanTable): plan table to share, the default one if None;
+            skipped (leaving the Arena empty) if it is not available
+    """
+    shared = {}
+    table = plantable.get_default_table() if table is None else table
+    checksum, blocks = table.export()
+    if blocks:
+        shared["plans"] = ("I", [checksum], None)
+        for key, times in blocks.items():
+            shared["plans/" + key] = ("H", times, None)
+    return Arena.create(shared)
+
+
+def init_worker(name):
+    """Attach a worker process to an Arena (a pool initializer).
+
+    Also called by local shard workers (see shard), with the same name.
+
+    The worker's default plan table then reads the shared blocks.
+    """
+    global _worker_arena
+    _worker_arena = Arena.attach(name)
+    if "plans" in _worker_arena:
+        blocks = {table[len("plans/"):]: _worker_arena.get(table)
+                  for table in _worker_arena.directory
+                  if table.startswith("plans/")}
+        plantable.set_default_table(plantable.PlanTable.from_blocks(
+            blocks, _worker_arena.get("plans")[0]))
+
+
+if __name__ == "__main__":
+    print(__doc__, "Not meant to be used as main.")
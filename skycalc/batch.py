@@ -0,0 +1,544 @@
+"""Run the calculator on character profiles without a GUI.
+
+Profiles are read as JSON Lines, one profile per line, and results are
+written back line by line in the same order, so memory use does not grow
+with the input. A profile describes either a new character:
+
+    {"id": 1, "race": "Nord", "skills": ["Block", "Smithing"], "goal": 30}
+
+("skills" defaults to the race's template) or an existing one:
+
+    {"skill_levels": {"Sneak": 42, "Archery": 37}, "now": 12, "goal": 40}
+
+"strategies" optionally limits the calculated strategies. Invalid profiles
+produce a line with "error" and "problems" instead of "results". Profiles
+that only differ in skill names are calculated once (see Deduplicator).
+"""
+
+import collections
+import json
+import sys
+import threading
+
+import calculator as calc
+import plancache
+import plantable
+import reducers
+from calculator import dispatch
+from inputparser import (BulkValidation, InputCollector, InputValidator,
+                         ValidationException)
+
+CHUNK_LINES = 256  # lines validated together
+DEDUP_ENTRIES = 16384  # plans a Deduplicator keeps
+RESULT_FIELDS = ("Start Level", "Times Leveled", "Times Legendary",
+                 "Final Level")
+
+
+class Profile:
+    """Validated calculator input.
+
+    Attributes:
+        skill_levels (dict): current levels of the trained skills
+        now (int): current character level
+        goal (int): goal level
+        strategies (tuple): names of the strategies to calculate
+        race (str): race of a new character, None for existing ones
+    """
+
+    def __init__(self, skill_levels, now, goal, strategies=calc.STRATEGIES,
+                 race=None):
+        self.skill_levels = skill_levels
+        self.now = now
+        self.goal = goal
+        self.strategies = strategies
+        self.race = race
+
+
+def parse_profile(data):
+    """Validate a decoded profile with an InputCollector, return a Profile.
+
+    Raises ValidationException for invalid input.
+    Attributes:
+        data (dict): decoded JSON profile
+    """
+    if not isinstance(data, dict):
+        raise ValidationException("A profile must be a JSON object.")
+
+    collector = InputCollector()
+    if "skill_levels" in data:
+        skill_levels = data["skill_levels"]
+        if not isinstance(skill_levels, dict):
+            raise ValidationException("Those skills are invalid.")
+        collector.set_selected_skills(list(skill_levels))
+        collector.set_skill_levels(skill_levels)
+    else:
+        collector.set_race(data.get("race"))
+        skills = data.get("skills")
+        if skills is None:
+            collector.set_template(data["race"])
+            skills = list(collector.get_template())
+        collector.set_selected_skills(skills)
+    collector.set_char_levels(goal=data.get("goal"), now=data.get("now", 1))
+
+    strategies = data.get("strategies", list(calc.STRATEGIES))
+    if (not isinstance(strategies, list) or not strategies or
+            any(strategy not in calc.STRATEGIES for strategy in strategies)):
+        raise ValidationException(
+            "Strategies can be fast, balanced and easy.", ["Strategies"])
+
+    now, goal = collector.get_char_levels()
+    return Profile(collector.get_skill_levels(), now, goal, tuple(strategies),
+                   collector.get_race())
+
+
+def calculate(profile, settings=calc.DEFAULT_SETTINGS, cancel_token=None,
+              cache=None):
+    """Return the results of all strategies of a Profile.
+
+    Plans of template characters are looked up (see plantable), others are
+    taken from the optional PlanCache (see plancache) or simulated.
+    """
+    return {strategy: _calculate_strategy(profile, strategy, settings,
+                                          cancel_token, cache)
+            for strategy in profile.strategies}
+
+
+def _calculate_strategy(profile, strategy, settings, cancel_token, cache):
+    result = plantable.lookup(profile.skill_levels, profile.now,
+                              profile.goal, strategy, profile.race, settings)
+    if result is None and cache is not None:
+        result = plancache.simulate_strategy(
+            profile.skill_levels, profile.now, profile.goal, strategy,
+            cache, cancel_token=cancel_token, settings=settings)
+    elif result is None:
+        result = calc.simulate_strategy(
+            profile.skill_levels, profile.now, profile.goal, strategy,
+            cancel_token=cancel_token, settings=settings)
+    return result
+
+
+class Deduplicator:
+    """Calculate every distinct plan of a batch once.
+
+    Plans are keyed by a canonical form of their profile: the start levels
+    of the skills in order (parse_profile already resolved race templates
+    to their default levels), current and goal level, and the strategy.
+    Each strategy is keyed on its own, so profiles asking for different
+    strategies share the ones they have in common. Skill names are only
+    labels to the calculator, so a plan is reused by renaming its skills.
+    The skill order is part of the key: ties go to the skill that comes
+    first, so sorting the skills could change plans.
+
+    One Deduplicator must only be used with one set of game settings. It
+    can be shared by threads; a plan that two threads need at the same
+    time may be calculated twice.
+    Attributes:
+        max_entries (int): plans kept, the least recently used go first
+    """
+
+    COUNTERS = ("profiles", "plans", "computed", "reused")
+
+    def __init__(self, max_entries=DEDUP_ENTRIES):
+        self.max_entries = max_entries
+        self.__plans = collections.OrderedDict()  # key: rows or ValueError
+        self.__stats = collections.Counter()
+        self.__lock = threading.Lock()
+
+    def get_stats(self):
+        """Return profile and plan counters; ratio is plans per computed."""
+        with self.__lock:
+            stats = {name: self.__stats[name] for name in self.COUNTERS}
+        stats["ratio"] = stats["plans"] / max(stats["computed"], 1)
+        return stats
+
+    def merge_stats(self, stats):
+        """Add the counters of another Deduplicator, e.g. of a worker."""
+        with self.__lock:
+            for name in self.COUNTERS:
+                self.__stats[name] += stats[name]
+
+    def calculate(self, profile, settings=calc.DEFAULT_SETTINGS,
+                  cancel_token=None, cache=None):
+        """Return the results of a Profile like calculate()."""
+        outcome = self.calculate_all([profile], settings, cancel_token,
+                                     cache)[0]
+        if isinstance(outcome, ValueError):
+            raise outcome
+        return outcome
+
+    def calculate_all(self, profiles, settings=calc.DEFAULT_SETTINGS,
+                      cancel_token=None, cache=None):
+        """Return the results of every Profile, or the ValueError it raised.
+
+        Plans that are neither known, in the plan table nor in the cache
+        are simulated together per strategy (see dispatch.simulate_many),
+        then added to the cache.
+        """
+        plans = {}  # key: rows or ValueError, for this call
+        missing = {}  # key: (first profile, strategy)
+        with self.__lock:
+            for profile in profiles:
+                self.__stats["profiles"] += 1
+                levels = tuple(profile.skill_levels.values())
+                for strategy in profile.strategies:
+                    self.__stats["plans"] += 1
+                    key = (levels, profile.now, profile.goal, strategy)
+                    if key in plans or key in missing:
+                        self.__stats["reused"] += 1
+                    elif key in self.__plans:
+                        self.__stats["reused"] += 1
+                        self.__plans.move_to_end(key)
+                        plans[key] = self.__plans[key]
+                    else:
+                        missing[key] = (profile, strategy)
+
+        simulate = collections.defaultdict(list)
+        for key, (profile, strategy) in missing.items():
+            try:
+                result = plantable.lookup(profile.skill_levels, profile.now,
+                                          profile.goal, strategy,
+                                          profile.race, settings)
+                if result is None and cache is not None:
+                    result = cache.get(profile.skill_levels, profile.now,
+                                       profile.goal, strategy, settings)
+            except ValueError as e:
+                result = e
+            if result is None:
+                simulate[strategy].append(key)
+            else:
+                plans[key] = _rows(result)
+        for strategy, keys in simulate.items():
+            outcomes = dispatch.simulate_many(
+                [missing[key][0].skill_levels for key in keys],
+                [key[1] for key in keys], [key[2] for key in keys],
+                strategy, settings, cancel_token)
+            for key, outcome in zip(keys, outcomes):
+                plans[key] = _rows(outcome)
+                if cache is not None and not isinstance(outcome, ValueError):
+                    profile = missing[key][0]
+                    cache.put(profile.skill_levels, profile.now, profile.goal,
+                              strategy, outcome, settings)
+
+        with self.__lock:
+            for key in missing:
+                self.__stats["computed"] += 1
+                self.__plans[key] = plans[key]
+            while len(self.__plans) > self.max_entries:
+                self.__plans.popitem(last=False)
+
+        outcomes = []
+        for profile in profiles:
+            levels = tuple(profile.skill_levels.values())
+            results = {}
+            for strategy in profile.strategies:
+                rows = plans[(levels, profile.now, profile.goal, strategy)]
+                if isinstance(rows, ValueError):
+                    results = rows
+                    break
+                results[strategy] = {skill: dict(zip(RESULT_FIELDS, row))
+                                     for skill, row in
+                                     zip(profile.skill_levels, rows)}
+            outcomes.append(results)
+        return outcomes
+
+
+def _rows(result):
+    """Return a plan as a list of RESULT_FIELDS tuples, or the ValueError."""
+    if isinstance(result, ValueError):
+        return result
+    return [tuple(entry[field] for field in RESULT_FIELDS)
+            for entry in result.values()]
+
+
+def validate_profiles(rows):
+    """Validate decoded profiles together, return (BulkValidation, list).
+
+    Skill and character levels of all rows are checked in one vectorized
+    pass (see InputValidator); only rows that pass are parsed into the
+    Profiles of the returned list, which holds None for invalid rows.
+    Attributes:
+        rows: sequence of decoded JSON profiles
+    """
+    errors = [_structure_error(data) for data in rows]
+    checked = [i for i, error in enumerate(errors) if error is None]
+    custom = [i for i in checked if "skill_levels" in rows[i]]
+    skill_check = InputValidator.validate_skill_levels(
+        [rows[i]["skill_levels"] for i in custom])
+    for j, i in enumerate(custom):
+        errors[i] = skill_check.get_exception(j)
+
+    level_check = InputValidator.validate_char_levels(
+        [rows[i].get("now", 1) for i in checked],
+        [rows[i].get("goal") for i in checked])
+    profiles = [None] * len(rows)
+    for j, i in enumerate(checked):
+        if errors[i] is None:
+            errors[i] = level_check.get_exception(j)
+        if errors[i] is None:
+            try:
+                profiles[i] = parse_profile(rows[i])
+            except ValidationException as e:
+                errors[i] = e
+
+    validation = BulkValidation(
+        [error is None for error in errors],
+        [None if error is None else error.get_problems() for error in errors],
+        [None if error is None else str(error) for error in errors])
+    return validation, profiles
+
+
+def calculate_many(profiles, settings=calc.DEFAULT_SETTINGS, cache=None):
+    """Return the results of every Profile, or the ValueError it raised.
+
+    Used to run micro-batches (see scheduler) in worker processes.
+    """
+    return Deduplicator().calculate_all(profiles, settings, cache=cache)
+
+
+def _structure_error(data):
+    """Return a ValidationException if a profile is malformed, else None.
+
+    Covers the checks parse_profile makes before looking at levels.
+    """
+    if not isinstance(data, dict):
+        return ValidationException("A profile must be a JSON object.")
+    if "skill_levels" in data:
+        skill_levels = data["skill_levels"]
+        if not isinstance(skill_levels, dict):
+            return ValidationException("Those skills are invalid.")
+        if not skill_levels:
+            return ValidationException(
+                "You need to select at least one skill.")
+        if not InputValidator.are_valid_skills(skill_levels):
+            return ValidationException("Those skills are invalid.")
+    elif not InputValidator.is_valid_race(data.get("race")):
+        return ValidationException("Please select a race.")
+    else:
+        skills = data.get("skills")
+        if skills is not None:
+            if not InputValidator.is_valid_selection(skills):
+                return ValidationException(
+                    "You need to select at least one skill.")
+            if not InputValidator.are_valid_skills(skills):
+                return ValidationException("Those skills are invalid.")
+    return None
+
+
+def process_line(line, settings=calc.DEFAULT_SETTINGS, cancel_token=None,
+                 cache=None):
+    """Return the output record for one input line."""
+    return process([line], settings, cancel_token, cache)[0][1]
+
+
+def process(lines, settings=calc.DEFAULT_SETTINGS, cancel_token=None,
+            cache=None, dedup=None):
+    """Return a (Profile, output record) pair for every input line.
+
+    The lines are validated together. The Profile is None if the line is
+    invalid. Pass a Deduplicator to share plans across calls; by default,
+    duplicates are only found within the lines.
+    """
+    if dedup is None:
+        dedup = Deduplicator()
+    rows = []
+    records = []
+    for line in lines:
+        record = {}
+        try:
+            data = json.loads(line)
+        except ValueError:
+            data = None
+            record["error"] = "Invalid JSON."
+            record["problems"] = []
+        if isinstance(data, dict) and "id" in data:
+            record["id"] = data["id"]
+        rows.append(data)
+        records.append(record)
+
+    validation, profiles = validate_profiles(rows)
+    valid = [profile for profile in profiles if profile is not None]
+    outcomes = iter(dedup.calculate_all(valid, settings, cancel_token, cache))
+    pairs = []
+    for i, record in enumerate(records):
+        profile = profiles[i]
+        if profile is None:
+            if "error" not in record:
+                record["error"] = validation.messages[i]
+                record["problems"] = validation.problems[i] or []
+        else:
+            outcome = next(outcomes)
+            if isinstance(outcome, ValueError):  # e.g. unreachable goals
+                record["error"] = str(outcome)
+                record["problems"] = []
+                profile = None
+            else:
+                record["results"] = outcome
+        pairs.append((profile, record))
+    return pairs
+
+
+def run(lines, settings=calc.DEFAULT_SETTINGS, progress=None,
+        cancel_token=None, cache=None, dedup=None):
+    """Yield an output record for every non-empty input line.
+
+    Attributes:
+        lines: iterable of JSON Lines, consumed lazily
+        settings (GameSettings): leveling rules
+        progress: optional ProgressReporter or callable(done, total); the
+            total is None because the input is a stream
+        cancel_token: optional CancellationToken
+        cache: optional PlanCache
+        dedup: optional Deduplicator, a new one by default
+    """
+    for _, record in run_profiles(lines, settings, progress, cancel_token,
+                                  cache, dedup):
+        yield record
+
+
+def run_profiles(lines, settings=calc.DEFAULT_SETTINGS, progress=None,
+                 cancel_token=None, cache=None, dedup=None):
+    """Like run(), but yield (Profile, record) pairs, see process().
+
+    Lines are read and validated in chunks of CHUNK_LINES; plans are shared
+    across chunks.
+    """
+    if dedup is None:
+        dedup = Deduplicator()
+    reporter = calc.as_reporter(progress)
+    done = 0
+    for chunk in chunks(lines):
+        if cancel_token is not None:
+            cancel_token.check()
+        for pair in process(chunk, settings, cancel_token, cache, dedup):
+            yield pair
+            done += 1
+            if reporter is not None:
+                reporter.update(done, None)
+    if reporter is not None:
+        reporter.finish(done)
+
+
+def chunks(lines, size=CHUNK_LINES):
+    """Yield lists of up to size non-empty lines."""
+    chunk = []
+    for line in lines:
+        if line.strip():
+            chunk.append(line)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def write_records(records, output):
+    """Write records as JSON Lines, one at a time."""
+    for record in records:
+        output.write(json.dumps(record, separators=(",", ":")))
+        output.write("\n")
+
+
+def write_store(pairs, path, errors=sys.stderr):
+    """Write results of (Profile, record) pairs to a columnar store.
+
+    Records of invalid profiles, and of profiles whose id or plans don't
+    fit into the store, are written to errors as JSON Lines.
+    """
+    import store
+
+    with store.StoreWriter(path) as writer:
+        for profile, record in pairs:
+            if profile is not None:
+                try:
+                    writer.add_plans(record["results"], profile.now,
+                                     profile.goal, profile.race,
+                                     record.get("id"))
+                    continue
+                except ValueError as error:
+                    record = {"id": record.get("id"), "error": str(error),
+                              "problems": []}
+            write_records([record], errors)
+
+
+def add_parser(commands):
+    """Register the 'batch' command of python -m skycalc."""
+    parser = commands.add_parser(
+        "batch", help="calculate plans for JSON Lines profiles")
+    parser.add_argument("input", nargs="?", default="-",
+                        help="profile file, '-' for stdin (default)")
+    parser.add_argument("-o", "--output", default="-",
+                        help="result file, '-' for stdout (default)")
+    parser.add_argument("--format", choices=("jsonl", "columnar"),
+                        default="jsonl",
+                        help="output format; columnar writes a binary plan "
+                             "store (see store.py) and needs --output")
+    parser.add_argument("--cache", metavar="PATH",
+                        help="persistent plan cache (SQLite file), shared "
+                             "across runs")
+    parser.add_argument("--summary", metavar="PATH",
+                        help="write skill-up statistics per race, goal and "
+                             "strategy as JSON (see reducers.py)")
+    parser.add_argument("--summary-goal", type=int,
+                        default=reducers.SUMMARY_GOAL, metavar="LEVEL",
+                        help="highest goal level the summary histograms "
+                             "cover (default: %(default)s); plans for "
+                             "higher goals may count as 'Above'")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="threads or processes calculating in parallel "
+                             "(0 for one per cpu; see parallel.py)")
+    parser.add_argument("--executor", default="auto",
+                        choices=("auto", "thread", "process"),
+                        help="thread or process workers; auto uses threads "
+                             "only without the GIL")
+    parser.add_argument("--stats", action="store_true",
+                        help="print how many plans were calculated and "
+                             "reused to stderr")
+    parser.set_defaults(run=main)
+    return parser
+
+
+def main(args):
+    if args.format == "columnar" and args.output == "-":
+        print("The columnar format needs an --output file.", file=sys.stderr)
+        return 2
+
+    cache = None if args.cache is None else plancache.PlanCache(args.cache)
+    summary = None if args.summary is None else \
+        reducers.BatchSummary.up_to(args.summary_goal)
+    dedup = Deduplicator()
+    source = sys.stdin if args.input == "-" else open(args.input)
+    try:
+        if args.workers == 1:
+            pairs = run_profiles(source, cache=cache, dedup=dedup)
+            if summary is not None:
+                pairs = summary.observe(pairs)
+        else:
+            import parallel
+
+            # workers summarize their chunks, see BatchSummary.merge
+            pairs = parallel.run_profiles(source, args.workers or None,
+                                          args.executor, cache=cache,
+                                          dedup=dedup, summary=summary)
+        records = (record for _, record in pairs)
+        if args.format == "columnar":
+            write_store(pairs, args.output)
+        elif args.output == "-":
+            write_records(records, sys.stdout)
+        else:
+            with open(args.output, "w") as target:
+                write_records(records, target)
+        if summary is not None:
+            with open(args.summary, "w") as target:
+                json.dump(summary.summary(), target, indent=1)
+        if args.stats:
+            print(json.dumps(dedup.get_stats()), file=sys.stderr)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if cache is not None:
+            cache.close()
+    return 0
+
+
+if __name__ == "__main__":
+    print(__doc__, "Use: python -m skycalc batch")
@@ -0,0 +1,738 @@
+"""Calculate optimal training strategies to reach a certain character level.
+
+3 Versions: fast, easy and balanced.
+Long simulations can be watched with a ProgressReporter and stopped with a
+CancellationToken.
+"""
+
+import collections
+import functools
+import math
+import time
+
+CHAR_LEVEL_CAP = 300  # xp tables cover all valid character levels
+STRATEGIES = ("fast", "balanced", "easy")
+
+
+class SimulationCancelled(Exception):
+    """Raised inside a simulation when its cancellation token was set."""
+
+
+class CancellationToken:
+    """Flag telling running simulations to stop as soon as possible.
+
+    Can be shared between threads. Checking it is a single attribute lookup,
+    so simulations check it on every step.
+    Attributes:
+        cancelled (bool): True once cancel() was called
+    """
+
+    def __init__(self):
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def is_cancelled(self):
+        return self.cancelled
+
+    def check(self):
+        """Raise SimulationCancelled if the token was cancelled."""
+        if self.cancelled:
+            raise SimulationCancelled("The simulation was cancelled.")
+
+
+class ProgressReporter:
+    """Rate-limited progress callback.
+
+    The callback is called with (done, total) at most every n steps or every
+    t milliseconds, whichever comes first, and once when the work is done.
+    Attributes:
+        callback: function taking two numbers (done, total)
+        every (int): report every n steps, None to disable
+        interval_ms (float): report every t milliseconds, None to disable
+    """
+
+    def __init__(self, callback, every=100, interval_ms=None):
+        self.__callback = callback
+        self.__every = every
+        self.__interval = None if interval_ms is None else interval_ms / 1000
+        self.__steps = 0
+        self.__last = time.monotonic()
+
+    def update(self, done, total, steps=1):
+        """Count finished steps and report if it is time to do so."""
+        self.__steps += steps
+        if self.__every is not None and self.__steps >= self.__every:
+            self.__report(done, total)
+        elif self.__interval is not None:
+            now = time.monotonic()
+            if now - self.__last >= self.__interval:
+                self.__report(done, total, now)
+
+    def finish(self, total):
+        self.__report(total, total)
+
+    def __report(self, done, total, now=None):
+        self.__steps = 0
+        self.__last = time.monotonic() if now is None else now
+        self.__callback(done, total)
+
+
+class GameSettings(collections.namedtuple(
+        "GameSettings", ["level_up_base", "level_up_mult", "skill_cap",
+                         "legendary", "legendary_level",
+                         "skill_use_curve"])):
+    """Leveling rules. The defaults are those of vanilla Skyrim.
+
+    Immutable and hashable, so derived tables can be cached per ruleset.
+    Attributes:
+        level_up_base (float): fXPLevelUpBase
+        level_up_mult (float): fXPLevelUpMult
+        skill_cap (int): highest skill level
+        legendary (bool): whether skills at the cap can be made legendary
+        legendary_level (int): level a legendary skill is reset to
+        skill_use_curve (float): fSkillUseCurve
+    """
+
+    __slots__ = ()
+
+    def __new__(cls, level_up_base=75, level_up_mult=25, skill_cap=100,
+                legendary=True, legendary_level=15, skill_use_curve=1.95):
+        return super(GameSettings, cls).__new__(
+            cls, level_up_base, level_up_mult, skill_cap, legendary,
+            legendary_level, skill_use_curve)
+
+
+DEFAULT_SETTINGS = GameSettings()
+
+
+class XpTables:
+    """Tables derived from one GameSettings object.
+
+    Build them with get_tables(), which caches one instance per ruleset.
+    All tables are tuples, so one instance can be shared by threads.
+    Attributes:
+        settings (GameSettings): rules the tables were built for
+    """
+
+    def __init__(self, settings):
+        self.settings = settings
+        cap = settings.skill_cap
+
+        # cumulative_xp[l]: xp needed to advance from level 1 to level l
+        cumulative_xp = [0, 0]
+        for level in range(1, CHAR_LEVEL_CAP):
+            cumulative_xp.append(cumulative_xp[-1] + self.level_up_xp(level))
+        self.cumulative_xp = tuple(cumulative_xp)
+
+        # next_level[l]: skill level after training level l, None if capped
+        self.next_level = tuple(
+            level + 1 if level < cap else
+            settings.legendary_level + 1 if settings.legendary else None
+            for level in range(max(cap, 100) + 1))
+
+        # skill_xp[l]: skill xp needed to train level l once
+        self.skill_xp = tuple(
+            float("inf") if new is None else
+            max(new - 1, 1) ** settings.skill_use_curve
+            for new in self.next_level)
+
+        # xp_to_cap[l]: character xp gained by training level l to the cap
+        xp_to_cap = [0] * (cap + 1)
+        for level in range(cap - 1, -1, -1):
+            xp_to_cap[level] = xp_to_cap[level + 1] + level + 1
+        self.xp_to_cap = tuple(xp_to_cap)
+
+        # one legendary cycle: cap -> legendary_level + 1 -> ... -> cap
+        self.cycle_length = cap - settings.legendary_level
+        self.cycle_xp = self.xp_to_cap[settings.legendary_level]
+
+    def level_up_xp(self, level):
+        """Return xp needed for next level-up at a given level."""
+        settings = self.settings
+        return settings.level_up_base + settings.level_up_mult * level
+
+    def total_xp(self, current_lvl, goal_lvl):
+        """Return xp needed to advance from a current level to a goal level."""
+        if goal_lvl < len(self.cumulative_xp):
+            return (self.cumulative_xp[goal_lvl] -
+                    self.cumulative_xp[current_lvl])
+        return sum(self.level_up_xp(lvl) for lvl in
+                   range(current_lvl, goal_lvl))
+
+
+@functools.lru_cache(maxsize=16)
+def get_tables(settings=DEFAULT_SETTINGS):
+    """Return the (cached) XpTables for a ruleset."""
+    return XpTables(settings)
+
+
+def level_up_xp(level, settings=DEFAULT_SETTINGS):
+    """Return xp needed for next level-up at a given level."""
+    return get_tables(settings).level_up_xp(level)
+
+
+def total_xp(current_lvl, goal_lvl, settings=DEFAULT_SETTINGS):
+    """Return xp needed to advance from a current level to a goal level.
+
+    Attributes:
+        current_lvl (int): current character level
+        goal_lvl (int): goal level
+        settings (GameSettings): leveling rules
+    """
+    return get_tables(settings).total_xp(current_lvl, goal_lvl)
+
+
+def trained(skill_level, settings=DEFAULT_SETTINGS):
+    """Return level reached by training a skill with a given level.
+
+    Skills at the cap are made legendary, or can't be trained (None) if
+    the rules don't allow it.
+    """
+    return get_tables(settings).next_level[skill_level]
+
+
+def skill_xp(skill_level, settings=DEFAULT_SETTINGS):
+    """Return skill xp needed to train a skill with a given level once.
+
+    Uses the skill use curve without per-skill multipliers.
+    """
+    return get_tables(settings).skill_xp[skill_level]
+
+
+def as_reporter(progress):
+    """Return a ProgressReporter for a reporter, a plain callable or None."""
+    if progress is None or isinstance(progress, ProgressReporter):
+        return progress
+    return ProgressReporter(progress)
+
+
+def simulate_training(original_skill_levels, current, goal, selected_from,
+                      progress=None, cancel_token=None,
+                      settings=DEFAULT_SETTINGS):
+    """Simulate skill training and return resulting information.
+
+    Attributes:
+        original_skill_levels: dict containing current levels of used skills.
+        current (int): current character level
+        goal (int): goal level
+        selected_from: selection method used for optimization
+        progress: optional ProgressReporter or callable(done, total)
+        cancel_token: optional CancellationToken, checked on every step
+        settings (GameSettings): leveling rules
+    """
+
+    def done(xp):
+        return xp <= 0
+
+    def make_result_dict(original_dict):
+        """Return formatted skill data dictionary.
+
+        Attributes:
+            original_dict: dict containing current levels of used skills.
+        """
+
+        def reformat(entry):
+            """Reformat dictionary entry."""
+            return {"Start Level": original_dict[entry],
+                    "Times Leveled": 0,
+                    "Times Legendary": 0,
+                    "Final Level": original_dict[entry]}
+
+        return {entry: reformat(entry) for entry in original_dict}
+
+    # TODO: get rid of side effects
+    def train(data, skill):
+        """Update data as if a skill was trained."""
+        level = data[skill]["Final Level"]
+        data[skill]["Final Level"] = next_level[level]
+        data[skill]["Times Leveled"] += 1
+        if level >= cap:
+            data[skill]["Times Legendary"] += 1
+
+    def trainable(data):
+        """Return the skills that can still be trained."""
+        if settings.legendary:
+            return data
+        candidates = {s: data[s] for s in data if data[s]["Final Level"] < cap}
+        if not candidates:
+            raise ValueError("The goal level can't be reached with these "
+                             "skills.")
+        return candidates
+
+    # TODO: make 'prettier'
+    tables = get_tables(settings)
+    next_level = tables.next_level
+    cap = settings.skill_cap
+    needed_xp = tables.total_xp(current, goal)
+    skill_data = make_result_dict(original_skill_levels)
+    reporter = as_reporter(progress)
+    total = needed_xp
+
+    while not done(needed_xp):
+        if cancel_token is not None and cancel_token.cancelled:
+            raise SimulationCancelled("The simulation was cancelled.")
+        selected_skill = selected_from(trainable(skill_data))
+        train(skill_data, selected_skill)
+        needed_xp -= skill_data[selected_skill]["Final Level"]
+        if reporter is not None:
+            reporter.update(total - needed_xp, total)
+
+    if reporter is not None:
+        reporter.finish(total)
+    return skill_data
+
+
+def least_leveled(skill_dict):
+    """Return the skill that was trained least (balanced)."""
+    stripped_dict = {s: skill_dict[s]["Times Leveled"] for s in skill_dict}
+    return min(stripped_dict, key=stripped_dict.get)
+
+
+def lowest(skill_dict):
+    """Return the skill with the lowest final level (easy)."""
+    stripped_dict = {s: skill_dict[s]["Final Level"] for s in skill_dict}
+    return min(stripped_dict, key=stripped_dict.get)
+
+
+def highest(skill_dict):
+    """Return the skill with the highest final level (fast)."""
+    stripped_dict = {s: skill_dict[s]["Final Level"] for s in skill_dict}
+    return max(stripped_dict, key=stripped_dict.get)
+
+
+SELECTORS = {"fast": highest, "balanced": least_leveled, "easy": lowest}
+
+
+def level_after(start, times, settings=DEFAULT_SETTINGS):
+    """Return (level, times legendary) after training a skill n times.
+
+    Attributes:
+        start (int): start level of the skill
+        times (int): how often the skill was trained
+        settings (GameSettings): leveling rules
+    """
+    tables = get_tables(settings)
+    to_cap = max(settings.skill_cap - start, 0)
+    if times <= to_cap:
+        return start + times, 0
+    if not settings.legendary:
+        raise ValueError("Skills can't be trained beyond the cap.")
+    after_cap = times - to_cap  # trainings since the skill hit the cap
+    legendary = -(-after_cap // tables.cycle_length)
+    return (settings.legendary_level + 1 +
+            (after_cap - 1) % tables.cycle_length), legendary
+
+
+def times_leveled(start, final, legendary, settings=DEFAULT_SETTINGS):
+    """Return how often a skill was trained from its start to final level."""
+    if not legendary:
+        return final - start
+    to_cap = max(settings.skill_cap - start, 0)
+    return (to_cap + final - settings.legendary_level +
+            (legendary - 1) * get_tables(settings).cycle_length)
+
+
+def _max_steps(first, increment, budget, limit):
+    """Return the largest k <= limit with sum of an arithmetic series.
+
+    The series starts with first and grows by increment; its first k terms
+    must not exceed budget.
+    """
+
+    def total(k):
+        return k * first + increment * k * (k - 1) // 2
+
+    if total(limit) <= budget:
+        return limit
+    if increment == 0:
+        k = budget // first
+    else:
+        a = increment / 2
+        b = first - a
+        k = int((-b + math.sqrt(b * b + 4 * a * budget)) / (2 * a))
+    k = max(0, min(k, limit))
+    while k < limit and total(k + 1) <= budget:
+        k += 1
+    while k > 0 and total(k) > budget:
+        k -= 1
+    return k
+
+
+class ClassEngine:
+    """Simulate a strategy on classes of skills instead of single skills.
+
+    Skills with the same level (fast, easy) or start level (balanced) are
+    treated identically until their levels diverge, so they are grouped into
+    classes. Whole runs of training steps are applied at once: easy trains
+    every member of the lowest class, fast trains the highest skill up to
+    the cap and balanced trains full rounds. Per-skill results are only
+    expanded by result(), with the same tie-breaking as the per-skill
+    selection methods (the skill that comes first wins).
+
+    advance() can be called repeatedly; each call continues where the last
+    one stopped, so plans for several goals can be built incrementally.
+    Attributes:
+        original_skill_levels: dict containing current levels of used skills.
+        strategy (str): "fast", "easy" or "balanced"
+        settings (GameSettings): leveling rules
+    """
+
+    def __init__(self, original_skill_levels, strategy,
+                 settings=DEFAULT_SETTINGS):
+        if strategy not in STRATEGIES:
+            raise ValueError("Unknown strategy: {}".format(strategy))
+        self.__skills = list(original_skill_levels)
+        self.__starts = [original_skill_levels[s] for s in self.__skills]
+        self.__strategy = strategy
+        self.__settings = settings
+        self.__tables = get_tables(settings)
+        self.__remaining = 0
+        self.__skill_ups = 0
+
+        # fast, easy: level -> sorted skill indices, index -> times legendary
+        self.__classes = {}
+        self.__legendary = {}
+        # balanced: start level -> count, full rounds, progress in round
+        self.__start_counts = collections.Counter(self.__starts)
+        self.__rounds = 0
+        self.__round_order = None
+        self.__position = 0
+
+        for i, level in enumerate(self.__starts):
+            self.__classes.setdefault(level, []).append(i)
+
+    def get_skill_ups(self):
+        return self.__skill_ups
+
+    def advance(self, xp, progress=None, cancel_token=None):
+        """Train until a given amount of character xp was gained.
+
+        Overshooting xp of earlier calls counts towards this one.
+        Attributes:
+            xp (int): character xp to gain
+            progress: optional ProgressReporter or callable(done, total)
+            cancel_token: optional CancellationToken
+        """
+        self.__remaining += xp
+        reporter = as_reporter(progress)
+        if self.__strategy == "balanced":
+            self.__advance_balanced(xp, reporter, cancel_token)
+        else:
+            self.__advance_classes(xp, reporter, cancel_token)
+        if reporter is not None:
+            reporter.finish(xp)
+
+    def result(self):
+        """Return the per-skill result dict, like simulate_training."""
+        if self.__strategy == "balanced":
+            times = self.__balanced_times()
+            finals = [level_after(s, t, self.__settings)
+                      for s, t in zip(self.__starts, times)]
+        else:
+            finals = [None] * len(self.__starts)
+            for level, members in self.__classes.items():
+                for i in members:
+                    finals[i] = (level, self.__legendary.get(i, 0))
+            times = [times_leveled(s, level, legendary, self.__settings)
+                     for s, (level, legendary) in zip(self.__starts, finals)]
+
+        return {skill: {"Start Level": start,
+                        "Times Leveled": t,
+                        "Times Legendary": legendary,
+                        "Final Level": level}
+                for skill, start, t, (level, legendary) in
+                zip(self.__skills, self.__starts, times, finals)}
+
+    # fast and easy
+
+    def __advance_classes(self, xp, reporter, cancel_token):
+        next_level = self.__tables.next_level
+        highest = self.__strategy == "fast"
+
+        while self.__remaining > 0:
+            if cancel_token is not None and cancel_token.cancelled:
+                raise SimulationCancelled("The simulation was cancelled.")
+            trainable = [level for level in self.__classes
+                         if next_level[level] is not None]
+            if not trainable:
+                raise ValueError("The goal level can't be reached with "
+                                 "these skills.")
+            level = max(trainable) if highest else min(trainable)
+            new = next_level[level]
+
+            if new < level:  # made legendary, always a single step
+                moved = self.__take(level, 1)
+                self.__legendary[moved[0]] = \
+                    self.__legendary.get(moved[0], 0) + 1
+                self.__put(new, moved)
+                gained, steps = new, 1
+            elif highest:
+                # the first skill stays the highest until it hits the cap
+                steps = self.__fast_steps(level)
+                gained = self.__gain(level, steps)
+                self.__put(level + steps, self.__take(level, 1))
+            else:
+                steps, gained = self.__easy_steps(level)
+
+            self.__remaining -= gained
+            self.__skill_ups += steps
+            if reporter is not None:
+                reporter.update(xp - self.__remaining, xp, steps)
+
+    def __easy_steps(self, level):
+        """Train the lowest class, return (steps, xp gained).
+
+        The whole class is raised level by level while it stays the lowest
+        class below the cap; a last, partial level is trained member by
+        member.
+        """
+        members = len(self.__classes[level])
+        higher = [other for other in self.__classes if other > level]
+        top = min(min(higher, default=self.__settings.skill_cap),
+                  self.__settings.skill_cap)
+        levels = _max_steps(members * (level + 1), members,
+                            self.__remaining, top - level)
+        if levels:
+            self.__put(level + levels, self.__take(level, members))
+            return (members * levels,
+                    members * self.__gain(level, levels))
+
+        # not enough xp left to raise the whole class once
+        steps = -(-self.__remaining // (level + 1))
+        self.__put(level + 1, self.__take(level, steps))
+        return steps, steps * (level + 1)
+
+    def __fast_steps(self, level):
+        """Return how often a skill is trained, starting at level < cap."""
+        steps = self.__settings.skill_cap - level
+        if self.__tables.xp_to_cap[level] <= self.__remaining:
+            return steps
+        # smallest k with k * level + k * (k + 1) / 2 >= remaining
+        b = 2 * level + 1
+        k = int((-b + math.sqrt(b * b + 8 * self.__remaining)) / 2)
+        while self.__gain(level, k) < self.__remaining:
+            k += 1
+        while k > 1 and self.__gain(level, k - 1) >= self.__remaining:
+            k -= 1
+        return max(k, 1)
+
+    @staticmethod
+    def __gain(level, steps):
+        """Return character xp for training a skill n times from level."""
+        return steps * level + steps * (steps + 1) // 2
+
+    def __take(self, level, n):
+        """Remove and return the first n members of a class."""
+        members = self.__classes[level]
+        taken = members[:n]
+        if n >= len(members):
+            del self.__classes[level]
+        else:
+            del members[:n]
+        return taken
+
+    def __put(self, level, members):
+        """Add skills to a class, keeping its members sorted."""
+        if level in self.__classes:
+            self.__classes[level] = sorted(self.__classes[level] + members)
+        else:
+            self.__classes[level] = members
+
+    # balanced
+
+    def __advance_balanced(self, xp, reporter, cancel_token):
+        while self.__remaining > 0:
+            if cancel_token is not None and cancel_token.cancelled:
+                raise SimulationCancelled("The simulation was cancelled.")
+            if self.__position == 0:
+                steps = self.__skip_rounds()
+                if steps:
+                    self.__skill_ups += steps
+                    if reporter is not None:
+                        reporter.update(xp - self.__remaining, xp, steps)
+                    continue
+                round_xp, participants = self.__round_xp(self.__rounds)
+                if not participants:
+                    raise ValueError("The goal level can't be reached with "
+                                     "these skills.")
+                if round_xp <= self.__remaining:
+                    self.__rounds += 1
+                    self.__remaining -= round_xp
+                    self.__skill_ups += participants
+                    if reporter is not None:
+                        reporter.update(xp - self.__remaining, xp,
+                                        participants)
+                    continue
+                self.__round_order = self.__partial_round(self.__rounds)
+
+            # the last round is trained skill by skill, in order
+            order = self.__round_order
+            while self.__remaining > 0 and self.__position < len(order):
+                self.__remaining -= order[self.__position][1]
+                self.__position += 1
+                self.__skill_ups += 1
+            if self.__position == len(order):
+                self.__rounds += 1
+                self.__position = 0
+                self.__round_order = None
+
+    def __skip_rounds(self):
+        """Train as many full rounds at once as possible, return the steps.
+
+        While no skill hits the cap, every round gains one xp per skill
+        more than the round before.
+        """
+        cap = self.__settings.skill_cap
+        first = participants = 0
+        limit = None
+        for start, count in self.__start_counts.items():
+            if not self.__trainable_in(start, self.__rounds):
+                continue
+            level = level_after(start, self.__rounds, self.__settings)[0]
+            first += count * (level + 1)
+            participants += count
+            limit = cap - level if limit is None else min(limit, cap - level)
+        if not participants or limit <= 0:
+            return 0
+
+        rounds = _max_steps(first, participants, self.__remaining, limit)
+        self.__rounds += rounds
+        self.__remaining -= (rounds * first +
+                             participants * rounds * (rounds - 1) // 2)
+        return rounds * participants
+
+    def __round_xp(self, round_):
+        """Return xp and number of skills trained in a full round."""
+        next_level = self.__tables.next_level
+        round_xp = participants = 0
+        for start, count in self.__start_counts.items():
+            if self.__trainable_in(start, round_):
+                level = level_after(start, round_, self.__settings)[0]
+                round_xp += count * next_level[level]
+                participants += count
+        return round_xp, participants
+
+    def __partial_round(self, round_):
+        """Return (skill index, xp) of all skills trained in a round."""
+        next_level = self.__tables.next_level
+        return [(i, next_level[level_after(start, round_,
+                                           self.__settings)[0]])
+                for i, start in enumerate(self.__starts)
+                if self.__trainable_in(start, round_)]
+
+    def __trainable_in(self, start, round_):
+        """Return whether a skill takes part in a round."""
+        return (self.__settings.legendary or
+                start + round_ < self.__settings.skill_cap)
+
+    def __balanced_times(self):
+        if self.__settings.legendary:
+            times = [self.__rounds] * len(self.__starts)
+        else:
+            cap = self.__settings.skill_cap
+            times = [min(self.__rounds, max(cap - start, 0))
+                     for start in self.__starts]
+        if self.__round_order is not None:
+            for i, _ in self.__round_order[:self.__position]:
+                times[i] += 1
+        return times
+
+
+def simulate_strategy(original_skill_levels, current, goal, strategy,
+                      progress=None, cancel_token=None,
+                      settings=DEFAULT_SETTINGS, engine=None):
+    """Return skill training data for a strategy.
+
+    Tiny plans are simulated skill by skill (simulate_training), others on
+    classes (ClassEngine); both give the same plans.
+    Attributes:
+        original_skill_levels: dict containing current levels of used skills.
+        current (int): current character level
+        goal (int): goal level
+        strategy (str): "fast", "easy" or "balanced"
+        progress: optional ProgressReporter or callable(done, total)
+        cancel_token: optional CancellationToken
+        settings (GameSettings): leveling rules
+        engine (str): "loop" or "class", None to let dispatch pick the
+            faster one
+    """
+    if engine is None:
+        from calculator import dispatch
+
+        engine = dispatch.choose_engine(original_skill_levels, current, goal,
+                                        strategy, settings)
+    if engine == "loop":
+        if strategy not in SELECTORS:
+            raise ValueError("Unknown strategy: {}".format(strategy))
+        return simulate_training(original_skill_levels, current, goal,
+                                 SELECTORS[strategy], progress, cancel_token,
+                                 settings)
+
+    engine = ClassEngine(original_skill_levels, strategy, settings)
+    engine.advance(get_tables(settings).total_xp(current, goal),
+                   progress, cancel_token)
+    return engine.result()
+
+
+def simulate_balanced_training(original_skill_levels,
+                               current_level, goal_level,
+                               progress=None, cancel_token=None,
+                               settings=DEFAULT_SETTINGS):
+    """Return skill training data for a balanced training method.
+
+    All skills are trained equally.
+    Attributes:
+        original_skill_levels: dict containing current levels of used skills.
+        current_level (int): current character level
+        goal_level (int): goal level
+        progress: optional ProgressReporter or callable(done, total)
+        cancel_token: optional CancellationToken
+        settings (GameSettings): leveling rules
+    """
+    return simulate_strategy(original_skill_levels,
+                             current_level, goal_level,
+                             "balanced", progress, cancel_token, settings)
+
+
+def simulate_easy_training(original_skill_levels, current_level, goal_level,
+                           progress=None, cancel_token=None,
+                           settings=DEFAULT_SETTINGS):
+    """Return skill training data for the easiest possible training.
+
+    Always level the skill easiest to train.
+    Attributes:
+        original_skill_levels: dict containing current levels of used skills.
+        current_level (int): current character level
+        goal_level (int): goal level
+        progress: optional ProgressReporter or callable(done, total)
+        cancel_token: optional CancellationToken
+        settings (GameSettings): leveling rules
+    """
+    return simulate_strategy(original_skill_levels,
+                             current_level, goal_level,
+                             "easy", progress, cancel_token, settings)
+
+
+def simulate_fast_training(original_skill_levels, current_level, goal_level,
+                           progress=None, cancel_token=None,
+                           settings=DEFAULT_SETTINGS):
+    """Return skill training data for the fastest possible training.
+
+    Always train the skill giving the most xp.
+    Attributes:
+        original_skill_levels: dict containing current levels of used skills.
+        current_level (int): current character level
+        goal_level (int): goal level
+        progress: optional ProgressReporter or callable(done, total)
+        cancel_token: optional CancellationToken
+        settings (GameSettings): leveling rules
+    """
+    return simulate_strategy(original_skill_levels,
+                             current_level, goal_level,
+                             "fast", progress, cancel_token, settings)
+
+
+if __name__ == "__main__":
+    print(__doc__, "Not meant to be used as main.")
@@ -0,0 +1,163 @@
+"""Asyncio API of the calculator.
+
+Simulations run in an executor (the event loop's default thread pool
+unless another one is given), so they never block the event loop:
+
+    plan = await aio.simulate(profile, "fast")
+    async for i, profile, plans in aio.as_completed(profiles):
+        ...
+
+A profile is any object with skill_levels, now and goal attributes, e.g.
+batch.Profile. A Runner bounds the number of simulations running at the
+same time with a semaphore. Cancelling an awaiting task stops its
+simulation through a CancellationToken (for thread executors; work already
+running in a process pool is finished but dropped).
+"""
+
+import asyncio
+import concurrent.futures
+import functools
+import weakref
+
+import calculator as calc
+
+MAX_CONCURRENCY = 8
+
+
+class Runner:
+    """Run simulations in an executor with bounded concurrency.
+
+    Attributes:
+        executor: concurrent.futures executor, None for the event loop's
+            default thread pool
+        max_concurrency (int): simulations running at the same time
+        settings (GameSettings): leveling rules
+    """
+
+    def __init__(self, executor=None, max_concurrency=MAX_CONCURRENCY,
+                 settings=calc.DEFAULT_SETTINGS):
+        self.executor = executor
+        self.max_concurrency = max_concurrency
+        self.settings = settings
+        # made by the running loop, Python < 3.10 binds them on creation
+        self.__semaphores = weakref.WeakKeyDictionary()
+        # tokens can't reach other processes
+        self.__cancellable = not isinstance(
+            executor, concurrent.futures.ProcessPoolExecutor)
+
+    async def simulate(self, profile, strategy):
+        """Return the plan of a strategy like calculator.simulate_strategy."""
+        async with self.__semaphore():
+            token = calc.CancellationToken() if self.__cancellable else None
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self.executor, functools.partial(
+                calc.simulate_strategy, profile.skill_levels, profile.now,
+                profile.goal, strategy, cancel_token=token,
+                settings=self.settings))
+            try:
+                return await future
+            except asyncio.CancelledError:
+                if token is not None:
+                    token.cancel()
+                raise
+
+    async def simulate_all(self, profile, strategies=calc.STRATEGIES):
+        """Return {strategy: plan}, the strategies run concurrently."""
+        plans = await asyncio.gather(*(self.simulate(profile, strategy)
+                                       for strategy in strategies))
+        return dict(zip(strategies, plans))
+
+    async def as_completed(self, profiles, strategies=calc.STRATEGIES):
+        """Yield (index, profile, {strategy: plan}) as profiles finish.
+
+        profiles may be an iterable or an async iterable; it is consumed
+        lazily, at most max_concurrency profiles are in flight. If a
+        simulation fails or the consumer stops, the others are cancelled.
+        """
+        if hasattr(profiles, "__aiter__"):
+            iterator = profiles.__aiter__()
+        else:
+            iterator = _AsyncIterator(iter(profiles))
+
+        async def run(index, profile):
+            return index, profile, await self.simulate_all(profile,
+                                                           strategies)
+
+        pending = set()
+        index = 0
+        exhausted = False
+        try:
+            while True:
+                while not exhausted and len(pending) < self.max_concurrency:
+                    try:
+                        profile = await iterator.__anext__()
+                    except StopAsyncIteration:
+                        exhausted = True
+                        break
+                    pending.add(asyncio.ensure_future(run(index, profile)))
+                    index += 1
+                if not pending:
+                    return
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+        finally:
+            # no await here: this also runs in aclose() or when collected
+            for task in pending:
+                task.add_done_callback(_retrieve)
+                task.cancel()
+
+    def __semaphore(self):
+        loop = asyncio.get_running_loop()
+        if loop not in self.__semaphores:
+            self.__semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        return self.__semaphores[loop]
+
+
+def _retrieve(task):
+    """Mark the exception of a dropped task as retrieved."""
+    if not task.cancelled():
+        task.exception()
+
+
+class _AsyncIterator:
+    def __init__(self, iterator):
+        self.__iterator = iterator
+
+    async def __anext__(self):
+        try:
+            return next(self.__iterator)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+_runners = weakref.WeakKeyDictionary()  # event loop: default Runner
+
+
+def get_runner():
+    """Return the default Runner of the running event loop."""
+    loop = asyncio.get_running_loop()
+    if loop not in _runners:
+        _runners[loop] = Runner()
+    return _runners[loop]
+
+
+async def simulate(profile, strategy):
+    """Run calculator.simulate_strategy with the default Runner."""
+    return await get_runner().simulate(profile, strategy)
+
+
+async def simulate_all(profile, strategies=calc.STRATEGIES):
+    """Run all strategies with the default Runner, see Runner."""
+    return await get_runner().simulate_all(profile, strategies)
+
+
+async def as_completed(profiles, strategies=calc.STRATEGIES):
+    """Yield finished profiles of the default Runner, see Runner."""
+    async for item in get_runner().as_completed(profiles, strategies):
+        yield item
+
+
+if __name__ == "__main__":
+    print(__doc__, "Not meant to be used as main.")
@@ -0,0 +1,415 @@
+"""Pick the fastest simulation engine for an input.
+
+All engines give the same plans, but their costs grow differently:
+
+    loop        skill by skill (simulate_training): no setup, cost grows
+                with skill-ups times skills; fastest for tiny plans
+    class       ClassEngine: jumps over runs of skill-ups; long plans
+    vectorized  NumPy: a batch of profiles trained step by step in arrays,
+                one step per skill-up of the longest plan; large batches of
+                short plans
+
+Every engine has a linear cost model per strategy over the skill count,
+the estimated skill-ups (from the goal - now distance) and the batch size.
+The coefficients are fitted by a micro-benchmark, `python -m skycalc
+calibrate`, and saved to res/engines.json; without the file, DEFAULT_COSTS
+are used. calculator.simulate_strategy picks loop or class this way and
+simulate_many() sends the part of a batch to the vectorized engine where it
+pays off.
+"""
+
+import json
+import math
+import os
+import random
+import sys
+import time
+
+import calculator as calc
+
+DEFAULT_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "res",
+    "engines.json")
+# seconds; features: loop (1, skill-ups * skills), class (1, skills,
+# skill-ups), vectorized (1, steps, steps * batch size * skills)
+DEFAULT_COSTS = {
+    "fast": {"loop": [8e-06, 1.4e-07], "class": [8e-06, 6e-07, 6e-08],
+             "vectorized": [1.7e-04, 1.7e-05, 1.8e-08]},
+    "balanced": {"loop": [7e-06, 2.7e-07], "class": [8e-06, 3.3e-06, 1e-07],
+                 "vectorized": [2e-04, 2.2e-05, 3e-08]},
+    "easy": {"loop": [1e-05, 3e-07], "class": [1.7e-05, 1.4e-06, 9e-08],
+             "vectorized": [1.6e-04, 2.5e-05, 2.5e-08]}}
+ENGINES = ("loop", "class", "vectorized")
+MIN_BATCH = 8  # smaller batches are never vectorized
+
+_costs = None
+
+
+def get_costs(path=DEFAULT_PATH):
+    """Return {strategy: {engine: coefficients}}, loaded once."""
+    global _costs
+    if _costs is None:
+        _costs = load_costs(path)
+    return _costs
+
+
+def set_costs(costs):
+    """Use other cost models, e.g. from calibrate(); None reloads them."""
+    global _costs
+    _costs = costs
+
+
+def load_costs(path=DEFAULT_PATH):
+    """Return the cost models of a calibration file.
+
+    DEFAULT_COSTS are returned if the file is missing or invalid.
+    """
+    try:
+        with open(path) as file:
+            costs = json.load(file)["costs"]
+        if all(len(costs[strategy][engine]) ==
+               len(DEFAULT_COSTS[strategy][engine])
+               for strategy in calc.STRATEGIES for engine in ENGINES):
+            return costs
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    return DEFAULT_COSTS
+
+
+def estimate_skill_ups(skills, mean_level, xp):
+    """Return roughly how many skill-ups gain xp character xp.
+
+    Every skill-up gains the new skill level; spread over all skills, the
+    levels rise by 1 / skills per skill-up. The skill cap is ignored.
+    """
+    if xp <= 0:
+        return 0.0
+    return skills * (math.sqrt(mean_level * mean_level + 2 * xp / skills) -
+                     mean_level)
+
+
+def features(engine, skills, skill_ups, batch=1):
+    """Return the input features of an engine's cost model."""
+    if engine == "loop":
+        return (1, skill_ups * skills)
+    if engine == "class":
+        return (1, skills, skill_ups)
+    return (1, skill_ups, skill_ups * batch * skills)
+
+
+def predict(models, engine, skills, skill_ups, batch=1):
+    """Return the predicted seconds of an engine.
+
+    Attributes:
+        models (dict): engine: coefficients, of one strategy
+    """
+    return sum(c * f for c, f in
+               zip(models[engine], features(engine, skills, skill_ups,
+                                            batch)))
+
+
+def choose_engine(skill_levels, current, goal, strategy,
+                  settings=calc.DEFAULT_SETTINGS):
+    """Return "loop" or "class", whichever is faster for one plan.
+
+    Called for every simulation, so the models are evaluated inline.
+    """
+    skills = len(skill_levels)
+    models = get_costs().get(strategy)
+    if not skills or models is None:
+        return "class"
+    xp = calc.get_tables(settings).total_xp(current, goal)
+    skill_ups = estimate_skill_ups(skills, sum(skill_levels.values()) /
+                                   skills, xp)
+    loop, classes = models["loop"], models["class"]
+    if loop[0] + loop[1] * skill_ups * skills <= \
+            classes[0] + classes[1] * skills + classes[2] * skill_ups:
+        return "loop"
+    return "class"
+
+
+def simulate_many(skill_levels_list, currents, goals, strategy,
+                  settings=calc.DEFAULT_SETTINGS, cancel_token=None):
+    """Return the plans of many profiles, or the ValueError each raised.
+
+    The shortest plans are simulated together by the vectorized engine if
+    that is predicted to be faster than simulating them one by one (and
+    NumPy is installed); the others go through calculator.simulate_strategy.
+    Attributes:
+        skill_levels_list: list of dicts with current levels of used skills
+        currents (list): current character levels
+        goals (list): goal levels
+        strategy (str): "fast", "easy" or "balanced"
+        settings (GameSettings): leveling rules
+        cancel_token: optional CancellationToken
+    """
+    count = len(skill_levels_list)
+    outcomes = [None] * count
+    vectorized = _vectorized_share(skill_levels_list, currents, goals,
+                                   strategy, settings)
+    if vectorized:
+        results = simulate_vectorized(
+            [skill_levels_list[i] for i in vectorized],
+            [currents[i] for i in vectorized],
+            [goals[i] for i in vectorized], strategy, settings, cancel_token)
+        for i, result in zip(vectorized, results):
+            outcomes[i] = result
+
+    for i in range(count):
+        if outcomes[i] is not None:
+            continue
+        try:
+            outcomes[i] = calc.simulate_strategy(
+                skill_levels_list[i], currents[i], goals[i], strategy,
+                cancel_token=cancel_token, settings=settings)
+        except ValueError as e:  # e.g. unreachable goals with modded rules
+            outcomes[i] = e
+    return outcomes
+
+
+def _vectorized_share(skill_levels_list, currents, goals, strategy,
+                      settings):
+    """Return the indices of profiles worth simulating vectorized.
+
+    The vectorized engine runs as many steps as the longest of its plans
+    takes, so only the k shortest plans are candidates; k is chosen to
+    save the most predicted time.
+    """
+    models = get_costs().get(strategy)
+    if len(skill_levels_list) < MIN_BATCH or models is None or \
+            not numpy_available():
+        return []
+    tables = calc.get_tables(settings)
+    estimates = []
+    for i, skill_levels in enumerate(skill_levels_list):
+        skills = len(skill_levels)
+        if not skills:
+            continue
+        skill_ups = estimate_skill_ups(
+            skills, sum(skill_levels.values()) / skills,
+            tables.total_xp(currents[i], goals[i]))
+        single = min(predict(models, engine, skills, skill_ups)
+                     for engine in ("loop", "class"))
+        estimates.append((skill_ups, skills, single, i))
+    estimates.sort()
+
+    best, best_k = 0.0, 0
+    single_total = 0.0
+    width = 0
+    for k, (skill_ups, skills, single, _) in enumerate(estimates, 1):
+        single_total += single
+        width = max(width, skills)
+        saving = single_total - predict(models, "vectorized", width,
+                                        skill_ups, k)
+        if saving > best:
+            best, best_k = saving, k
+    if best_k < MIN_BATCH:
+        return []
+    return sorted(i for _, _, _, i in estimates[:best_k])
+
+
+def numpy_available():
+    """Return True if the vectorized engine can run."""
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def simulate_vectorized(skill_levels_list, currents, goals, strategy,
+                        settings=calc.DEFAULT_SETTINGS, cancel_token=None):
+    """Simulate many profiles at once with NumPy arrays.
+
+    Every iteration trains one skill of every unfinished profile, chosen
+    with the same rules and tie-breaking as the calculator's selection
+    methods (argmin returns the first of equal keys). Returns a plan or a
+    ValueError for every profile.
+    """
+    import numpy as np
+
+    if strategy not in calc.STRATEGIES:
+        raise ValueError("Unknown strategy: {}".format(strategy))
+    tables = calc.get_tables(settings)
+    count = len(skill_levels_list)
+    width = max((len(levels) for levels in skill_levels_list), default=0)
+    levels = np.zeros((count, width), dtype=np.int64)
+    used = np.zeros((count, width), dtype=bool)
+    for i, skill_levels in enumerate(skill_levels_list):
+        levels[i, :len(skill_levels)] = list(skill_levels.values())
+        used[i, :len(skill_levels)] = True
+    starts = levels.copy()
+    times = np.zeros_like(levels)
+    legendary = np.zeros_like(levels)
+    remaining = np.array([tables.total_xp(current, goal)
+                          for current, goal in zip(currents, goals)])
+    next_level = np.array([-1 if level is None else level
+                           for level in tables.next_level], dtype=np.int64)
+    cap = settings.skill_cap
+    never = np.iinfo(np.int64).max  # key of skills that can't be trained
+    failed = np.zeros(count, dtype=bool)
+
+    active = np.flatnonzero(remaining > 0)
+    while active.size:
+        if cancel_token is not None and cancel_token.cancelled:
+            raise calc.SimulationCancelled("The simulation was cancelled.")
+        current = levels[active]
+        if strategy == "balanced":
+            keys = times[active]
+        elif strategy == "easy":
+            keys = current.copy()
+        else:
+            keys = -current
+        keys[~used[active] | (next_level[current] < 0)] = never
+        chosen = keys.argmin(axis=1)
+        rows = np.arange(active.size)
+        stuck = keys[rows, chosen] == never
+        if stuck.any():
+            failed[active[stuck]] = True
+            active, chosen = active[~stuck], chosen[~stuck]
+            current = current[~stuck]
+            rows = np.arange(active.size)
+
+        old = current[rows, chosen]
+        new = next_level[old]
+        levels[active, chosen] = new
+        times[active, chosen] += 1
+        legendary[active, chosen] += old >= cap
+        remaining[active] -= new
+        active = active[remaining[active] > 0]
+
+    outcomes = []
+    for i, skill_levels in enumerate(skill_levels_list):
+        if failed[i]:
+            outcomes.append(ValueError("The goal level can't be reached "
+                                       "with these skills."))
+            continue
+        columns = zip(skill_levels, starts[i].tolist(), times[i].tolist(),
+                      legendary[i].tolist(), levels[i].tolist())
+        outcomes.append({skill: {"Start Level": start,
+                                 "Times Leveled": t,
+                                 "Times Legendary": legend,
+                                 "Final Level": final}
+                         for skill, start, t, legend, final in columns})
+    return outcomes
+
+
+# calibration
+
+
+def _sample(rng, skills, count):
+    return [{str(j): rng.randint(15, 60) for j in range(skills)}
+            for _ in range(count)]
+
+
+def _seconds(function, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def calibrate(settings=calc.DEFAULT_SETTINGS, seed=0, progress=None):
+    """Time the engines on sample inputs and return fitted cost models.
+
+    Takes a few seconds. Coefficients are fitted by least squares of the
+    relative errors and kept non-negative.
+    Attributes:
+        settings (GameSettings): leveling rules
+        seed (int): seed of the sample profiles
+        progress: optional callable(done, total)
+    """
+    import numpy as np
+
+    rng = random.Random(seed)
+    tables = calc.get_tables(settings)
+    single = [(skills, goal) for skills in (1, 2, 4, 8, 16)
+              for goal in (2, 3, 5, 10, 20, 40, 80)]
+    batches = [(skills, goal, size) for skills in (2, 8)
+               for goal in (3, 10, 30) for size in (16, 64, 256)]
+    total = len(calc.STRATEGIES) * (len(single) + len(batches))
+
+    def estimate(profiles, goal):
+        return max(estimate_skill_ups(len(levels),
+                                      sum(levels.values()) / len(levels),
+                                      tables.total_xp(1, goal))
+                   for levels in profiles)
+
+    costs = {}
+    done = 0
+    for strategy in calc.STRATEGIES:
+        samples = {engine: ([], []) for engine in ENGINES}
+        for skills, goal in single:
+            profiles = _sample(rng, skills, 5)
+            for engine in ("loop", "class"):
+                seconds = _seconds(lambda: [
+                    calc.simulate_strategy(levels, 1, goal, strategy,
+                                           settings=settings, engine=engine)
+                    for levels in profiles])
+                rows, times = samples[engine]
+                rows.append(features(engine, skills,
+                                     estimate(profiles, goal)))
+                times.append(seconds / len(profiles))
+            done += 1
+            if progress is not None:
+                progress(done, total)
+
+        for skills, goal, size in batches:
+            profiles = _sample(rng, skills, size)
+            seconds = _seconds(lambda: simulate_vectorized(
+                profiles, [1] * size, [goal] * size, strategy, settings))
+            rows, times = samples["vectorized"]
+            rows.append(features("vectorized", skills,
+                                 estimate(profiles, goal), size))
+            times.append(seconds)
+            done += 1
+            if progress is not None:
+                progress(done, total)
+
+        costs[strategy] = {}
+        for engine, (rows, times) in samples.items():
+            # relative errors count, so short runs are predicted well too
+            times = np.array(times)
+            rows = np.array(rows, dtype=float) / times[:, None]
+            coefficients = np.linalg.lstsq(rows, np.ones(len(times)),
+                                           rcond=None)[0]
+            costs[strategy][engine] = [max(float(c), 0.0)
+                                       for c in coefficients]
+    return costs
+
+
+def save_costs(costs, path=DEFAULT_PATH):
+    with open(path, "w") as file:
+        json.dump({"python": sys.version.split()[0], "costs": costs}, file,
+                  indent=1)
+
+
+def add_parser(commands):
+    """Register the 'calibrate' command of python -m skycalc."""
+    parser = commands.add_parser(
+        "calibrate", help="time the simulation engines to pick the fastest")
+    parser.add_argument("-o", "--output", default=DEFAULT_PATH,
+                        help="calibration file (default: res/engines.json)")
+    parser.set_defaults(run=main)
+
+
+def main(args):
+    def report(done, total):
+        print("\r{}/{} measurements".format(done, total), end="",
+              file=sys.stderr)
+
+    costs = calibrate(progress=report)
+    print(file=sys.stderr)
+    save_costs(costs, args.output)
+    for strategy, models in costs.items():
+        for engine, coefficients in models.items():
+            print("{:<9}{:<11}{}".format(strategy, engine, " ".join(
+                "{:.3g}".format(c) for c in coefficients)))
+    return 0
+
+
+if __name__ == "__main__":
+    print(__doc__, "Use: python -m skycalc calibrate")
@@ -0,0 +1,65 @@
+"""Infer the character level from skill levels.
+
+Training a skill from level l to l + 1 earns l + 1 character xp, so the xp
+a skill earned since character creation follows from its level and its
+starting level (a difference of XpTables.xp_to_cap). The character level
+that xp adds up to is looked up in XpTables.cumulative_xp by bisection.
+Both tables are precomputed, so an inference costs O(skills).
+
+Skills that were made legendary, and skills that weren't entered, earned
+more than their levels tell, so the inferred level is a lower bound: a
+character can't be below it, but can be above it.
+"""
+
+import bisect
+
+import calculator as calc
+from inputparser import GameData
+
+
+def start_levels(race=None):
+    """Return the starting levels of a race, indexed by skill id.
+
+    For an unknown race (None), every skill starts at the highest level any
+    race starts it at, so inferred levels stay lower bounds.
+    """
+    if race is None:
+        return _HIGHEST_STARTS
+    return GameData.START_LEVELS[GameData.RACE_IDS[race]]
+
+
+def earned_xp(skill_levels, race=None, settings=calc.DEFAULT_SETTINGS):
+    """Return the character xp skills earned since character creation.
+
+    Attributes:
+        skill_levels: dict containing current levels of skills
+        race (str): character race, None if unknown
+        settings (GameSettings): leveling rules
+    """
+    xp_to_cap = calc.get_tables(settings).xp_to_cap
+    cap = settings.skill_cap
+    starts = start_levels(race)
+    skill_ids = GameData.SKILL_IDS
+    return sum(max(xp_to_cap[min(starts[skill_ids[skill]], cap)] -
+                   xp_to_cap[min(level, cap)], 0)
+               for skill, level in skill_levels.items())
+
+
+def level_for_xp(xp, settings=calc.DEFAULT_SETTINGS):
+    """Return the character level reached with xp earned since level 1."""
+    cumulative_xp = calc.get_tables(settings).cumulative_xp
+    level = bisect.bisect_right(cumulative_xp, xp, 1) - 1
+    return min(level, calc.CHAR_LEVEL_CAP - 1)
+
+
+def minimum_level(skill_levels, race=None, settings=calc.DEFAULT_SETTINGS):
+    """Return the lowest character level consistent with skill levels."""
+    return level_for_xp(earned_xp(skill_levels, race, settings), settings)
+
+
+_HIGHEST_STARTS = tuple(max(column)
+                        for column in zip(*GameData.START_LEVELS))
+
+
+if __name__ == "__main__":
+    print(__doc__, "Not meant to be used as main.")
@@ -0,0 +1,193 @@
+"""Approximate plans for previews, in O(skills) time.
+
+Instead of choosing skills one skill-up at a time, training is treated as
+continuous. Every strategy raises the skills along a single parameter p:
+
+    balanced    every skill is trained p times
+    easy        every skill below level p is raised to p (water-filling);
+                once all are at the cap, the first skill is made legendary
+                over and over (n * (p - cap) more times)
+    fast        p skill-ups, raising the highest skills to the cap one after
+                another; past the cap, the first skill is made legendary
+                over and over
+
+The character xp of training a skill k times is integrated in closed form
+(including legendary cycles), so the p that gains the needed xp is found by
+bisection, each step costing O(skills).
+
+Error bound: the models follow the calculator's tie-breaking, so at integer
+p the continuous model gains exactly the xp of the real plan after the same
+skill-ups. The estimated number of skill-ups therefore differs by at most
+one step of the parameter: the number of skills for balanced and easy, one
+skill-up for fast. Per-skill numbers are rounded and can be off by one more.
+See error_bound().
+"""
+
+import math
+
+import calculator as calc
+
+ITERATIONS = 60  # bisection steps, enough for double precision
+
+
+class Estimate:
+    """Approximate plan of a strategy.
+
+    Attributes:
+        plan (dict): per-skill result dict like calculator.simulate_strategy,
+            with rounded numbers
+        skill_ups (float): estimated total skill-ups
+        error (float): bound on the difference to the exact skill-ups
+    """
+
+    def __init__(self, plan, skill_ups, error):
+        self.plan = plan
+        self.skill_ups = skill_ups
+        self.error = error
+
+
+def estimate(original_skill_levels, current, goal, strategy,
+             settings=calc.DEFAULT_SETTINGS):
+    """Return an Estimate of calculator.simulate_strategy's plan.
+
+    Raises ValueError if the goal can't be reached, like the calculator.
+    Attributes:
+        original_skill_levels: dict containing current levels of used skills.
+        current (int): current character level
+        goal (int): goal level
+        strategy (str): "fast", "easy" or "balanced"
+        settings (GameSettings): leveling rules
+    """
+    if strategy not in calc.STRATEGIES:
+        raise ValueError("Unknown strategy: {}".format(strategy))
+    tables = calc.get_tables(settings)
+    skills = list(original_skill_levels)
+    starts = [original_skill_levels[skill] for skill in skills]
+    needed = tables.total_xp(current, goal)
+    raises = _RAISES[strategy](starts, settings)
+
+    def gained(p):
+        return sum(_gain(start, k, tables)
+                   for start, k in zip(starts, raises(p)))
+
+    low, high = 0.0, 1.0
+    if needed > 0:
+        limit = _limit(starts, strategy, settings)
+        while gained(high) < needed:
+            if high >= limit:
+                raise ValueError("The goal level can't be reached with "
+                                 "these skills.")
+            high = min(2 * high, limit)
+        for _ in range(ITERATIONS):
+            middle = (low + high) / 2
+            if gained(middle) < needed:
+                low = middle
+            else:
+                high = middle
+    else:
+        high = 0.0
+
+    times = raises(high)
+    plan = {}
+    for skill, start, k in zip(skills, starts, times):
+        t = int(round(k))
+        level, legendary = calc.level_after(start, t, settings)
+        plan[skill] = {"Start Level": start,
+                       "Times Leveled": t,
+                       "Times Legendary": legendary,
+                       "Final Level": level}
+    return Estimate(plan, sum(times), error_bound(len(starts), strategy))
+
+
+def error_bound(skills, strategy):
+    """Return the bound on the skill-up error of an Estimate, see above."""
+    return 1 if strategy == "fast" else skills
+
+
+def _gain(start, k, tables):
+    """Return the character xp of training a skill k (real) times."""
+    if k <= 0:
+        return 0.0
+    settings = tables.settings
+    to_cap = max(settings.skill_cap - start, 0)
+    if k <= to_cap:
+        return k * start + k * (k + 1) / 2
+    # full legendary cycles, then part of one
+    cycles, rest = divmod(k - to_cap, tables.cycle_length)
+    low = settings.legendary_level
+    return (tables.xp_to_cap[min(start, settings.skill_cap)] +
+            cycles * tables.cycle_xp + rest * low + rest * (rest + 1) / 2)
+
+
+def _limit(starts, strategy, settings):
+    """Return the largest useful parameter, infinite with legendary."""
+    if settings.legendary:
+        return math.inf
+    to_cap = [max(settings.skill_cap - start, 0) for start in starts]
+    if strategy == "fast":
+        return sum(to_cap)
+    if strategy == "easy":
+        return settings.skill_cap
+    return max(to_cap)
+
+
+def _balanced(starts, settings):
+    cap, legendary = settings.skill_cap, settings.legendary
+
+    def raises(p):
+        if legendary:
+            return [p] * len(starts)
+        return [min(p, max(cap - start, 0)) for start in starts]
+
+    return raises
+
+
+def _easy(starts, settings):
+    cap = settings.skill_cap
+    first = 0  # at the cap, ties go to the first skill, over and over
+
+    def raises(p):
+        times = [max(min(p, cap) - start, 0) for start in starts]
+        if settings.legendary and p > cap:
+            times[first] += (p - cap) * len(starts)
+        return times
+
+    return raises
+
+
+def _fast(starts, settings):
+    cap = settings.skill_cap
+    to_cap = [max(cap - start, 0) for start in starts]
+    order = sorted(range(len(starts)), key=lambda i: -starts[i])  # stable
+    if not settings.legendary:
+        runs = [(i, to_cap[i]) for i in order]
+        first = None
+    else:
+        # a skill at the cap is still the highest, so it is made legendary
+        # right away; skills below the reset level are never trained again.
+        # Once all are reset, the first one stays the highest and cycles.
+        low = settings.legendary_level
+        runs = [(i, to_cap[i] + 1) for i in order if starts[i] > low + 1]
+        tied = [i for i in order if starts[i] > low] or order[:1]
+        first = min(tied)
+
+    def raises(p):
+        times = [0.0] * len(starts)
+        left = p
+        for i, steps in runs:
+            times[i] = min(left, steps)
+            left -= times[i]
+            if left <= 0:
+                return times
+        if first is not None:
+            times[first] += left
+        return times
+
+    return raises
+
+
+_RAISES = {"balanced": _balanced, "easy": _easy, "fast": _fast}
+
+
+if __name__ == "__main__":
+    print(__doc__, "Not meant to be used as main.")
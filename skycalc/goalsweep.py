@@ -0,0 +1,63 @@
+"""Plans of a strategy for every goal level, so the goal can change freely.
+
+A GoalSweep advances a ClassEngine one character level at a time, from the
+current level up to the highest reachable one, and keeps the plan of every
+level on the way. Each plan matches calculator.simulate_strategy for that
+goal. Changing the goal afterwards is a list lookup instead of a simulation.
+"""
+
+import calculator as calc
+import perks
+
+
+class GoalSweep:
+    """Plans of one strategy for all goals from current + 1 to highest.
+
+    Attributes:
+        original_skill_levels: dict containing current levels of used skills.
+        current (int): current character level
+        strategy (str): "fast", "easy" or "balanced"
+        highest (int): highest goal; lowered to the highest goal the skills
+            can reach (without legendary skills, they run out eventually)
+        settings (GameSettings): leveling rules
+        cancel_token: optional CancellationToken
+    """
+
+    def __init__(self, original_skill_levels, current, strategy,
+                 highest=calc.CHAR_LEVEL_CAP - 1,
+                 settings=calc.DEFAULT_SETTINGS, cancel_token=None):
+        self.current = current
+        tables = calc.get_tables(settings)
+        engine = calc.ClassEngine(original_skill_levels, strategy, settings)
+
+        # plans[i]: result dict for the goal current + 1 + i
+        self.__plans = []
+        for level in range(current, highest):
+            try:
+                engine.advance(tables.total_xp(level, level + 1),
+                               cancel_token=cancel_token)
+            except ValueError:
+                break  # the skills are all capped
+            self.__plans.append(engine.result())
+        self.highest = current + len(self.__plans)
+        self.__milestones = perks.Milestones(original_skill_levels, current,
+                                             self.__plans, settings)
+
+    def plan(self, goal):
+        """Return the result dict for a goal, like simulate_strategy."""
+        self.__check(goal)
+        return self.__plans[goal - self.current - 1]
+
+    def milestones(self, goal):
+        """Return the perks.Milestones of the plan for a goal."""
+        self.__check(goal)
+        return self.__milestones.until(goal)
+
+    def __check(self, goal):
+        if not self.current < goal <= self.highest:
+            raise ValueError("The goal level can't be reached with these "
+                             "skills.")
+
+
+if __name__ == "__main__":
+    print(__doc__, "Not meant to be used as main.")
@@ -1,5 +1,17 @@
 class GameData:
-    """Information about Skyrim."""
+    """Information about Skyrim.
+
+    The name-keyed data is compiled once into integer-indexed tables for hot
+    paths (see _compile). Skill and race ids are positions in SKILL_NAMES
+    and RACE_NAMES.
+    Attributes:
+        SKILL_IDS (dict): skill name -> skill id
+        RACE_IDS (dict): race name -> race id
+        START_LEVELS (tuple): START_LEVELS[race id][skill id] is the level a
+            skill starts at (race x skill matrix of NEW_CHAR_LEVEL_INFO)
+        RACE_TEMPLATES (tuple): RACE_TEMPLATES[race id] are the names of the
+            skills a race starts above 15
+    """
 
     NEW_CHAR_LEVEL_INFO = {
         "Breton": {
@@ -227,6 +239,23 @@ class GameData:
     }
 
 
+def _compile(data):
+    """Add the integer-indexed tables to GameData (see above)."""
+    data.SKILL_IDS = {name: i for i, name in enumerate(data.SKILL_NAMES)}
+    data.RACE_IDS = {name: i for i, name in enumerate(data.RACE_NAMES)}
+    data.START_LEVELS = tuple(
+        tuple(data.NEW_CHAR_LEVEL_INFO[race][skill]
+              for skill in data.SKILL_NAMES)
+        for race in data.RACE_NAMES)
+    data.RACE_TEMPLATES = tuple(
+        tuple(data.SKILL_NAMES[skill] for skill, level in enumerate(row)
+              if level > 15)
+        for row in data.START_LEVELS)
+
+
+_compile(GameData)
+
+
 class ValidationException(Exception):
     """Exception with 'problem list'.
 
@@ -243,13 +272,38 @@ class ValidationException(Exception):
         return self.__problems
 
 
+class BulkValidation:
+    """Per-row results of a bulk validation.
+
+    Attributes:
+        valid (list): True for every valid row
+        problems (list): None for valid rows, else the problem list a
+            ValidationException would carry (see get_problems())
+        messages (list): None for valid rows, else the error message
+    """
+
+    def __init__(self, valid, problems, messages):
+        self.valid = valid
+        self.problems = problems
+        self.messages = messages
+
+    def __len__(self):
+        return len(self.valid)
+
+    def get_exception(self, i):
+        """Return the ValidationException of row i, None if it is valid."""
+        if self.valid[i]:
+            return None
+        return ValidationException(self.messages[i], self.problems[i])
+
+
 class InputValidator:
     """Check if given input is valid (= could be Skyrim game data)."""
 
     @staticmethod
     def are_valid_skills(skills):
         for skill in skills:
-            if skill not in GameData.SKILL_NAMES:
+            if skill not in GameData.SKILL_IDS:
                 return False
         return True
 
@@ -257,7 +311,7 @@ class InputValidator:
     def is_valid_char_level(level):
         try:
             level = int(level)
-        except ValueError:
+        except (TypeError, ValueError, OverflowError):
             return False
 
         return 0 < level < 300  # arbitrary cap, >= 252
@@ -267,14 +321,14 @@ class InputValidator:
         try:
             now = int(now)
             goal = int(goal)
-        except ValueError:
+        except (TypeError, ValueError, OverflowError):
             return False
 
         return now < goal
 
     @staticmethod
     def is_valid_race(race):
-        return race in GameData.RACE_NAMES
+        return race in GameData.RACE_IDS
 
     @staticmethod
     def is_valid_selection(selection):
@@ -291,11 +345,108 @@ class InputValidator:
     def is_valid_skill_level(level):
         try:
             level = int(level)
-        except ValueError:
+        except (TypeError, ValueError, OverflowError):
             return False
 
         return 15 <= level <= 100
 
+    @staticmethod
+    def validate_char_levels(nows, goals):
+        """Check many now/goal pairs at once, return a BulkValidation.
+
+        Rows are checked like InputCollector.set_char_levels, but values are
+        converted once and all range checks run as NumPy array operations.
+        Attributes:
+            nows: sequence of current character levels
+            goals: sequence of goal levels, same length as nows
+        """
+        import numpy as np
+
+        now = _as_int_array(nows)
+        goal = _as_int_array(goals)
+        valid_now = (0 < now) & (now < 300)
+        valid_goal = (0 < goal) & (goal < 300)
+        valid = valid_now & valid_goal & (now < goal)
+
+        problems = [None] * len(valid)
+        messages = [None] * len(valid)
+        for i in np.flatnonzero(~valid):
+            if valid_now[i] and valid_goal[i]:
+                messages[i] = ("Your goal level must be higher than your "
+                               "current level.")
+                problems[i] = ["Goal", "Now"]
+            elif valid_goal[i]:
+                messages[i] = "Please enter a valid character level."
+                problems[i] = ["Now"]
+            elif valid_now[i]:
+                messages[i] = "Please enter a valid goal level."
+                problems[i] = ["Goal"]
+            else:
+                messages[i] = "Please enter valid levels."
+                problems[i] = ["Goal", "Now"]
+        return BulkValidation(valid.tolist(), problems, messages)
+
+    @staticmethod
+    def validate_skill_levels(rows):
+        """Check many skill level dicts at once, return a BulkValidation.
+
+        Rows are checked like InputCollector.set_skill_levels: the problems
+        of a row are its skills with invalid levels. The levels of all rows
+        are range checked in a single NumPy pass.
+        Attributes:
+            rows: sequence of dicts of skill names and levels
+        """
+        import numpy as np
+
+        problems = [None] * len(rows)
+        messages = [None] * len(rows)
+        known = GameData.SKILL_IDS.keys()
+        skills = []
+        levels = []
+        counts = []
+        for i, row in enumerate(rows):
+            if not isinstance(row, dict) or not row or not row.keys() <= known:
+                messages[i] = "Something went wrong."
+                counts.append(0)
+                continue
+            skills.extend(row)
+            levels.extend(row.values())
+            counts.append(len(row))
+
+        levels = _as_int_array(levels)
+        owners = np.repeat(np.arange(len(rows)), counts)
+        for j in np.flatnonzero((levels < 15) | (levels > 100)):
+            i = owners[j]
+            if problems[i] is None:
+                problems[i] = []
+                messages[i] = "Skill levels can range from 15 to 100."
+            problems[i].append(skills[j])
+
+        valid = [message is None for message in messages]
+        return BulkValidation(valid, problems, messages)
+
+
+def _as_int_array(values):
+    """Return values as an int64 NumPy array, see _as_int()."""
+    import numpy as np
+
+    values = list(values)
+    try:
+        array = np.array(values)
+    except (TypeError, ValueError):  # e.g. ragged nested lists
+        array = None
+    if array is not None and array.ndim == 1 and array.dtype.kind in "iu":
+        return array.astype(np.int64)  # only ints, the common case
+    return np.array([_as_int(value) for value in values], dtype=np.int64)
+
+
+def _as_int(value):
+    """Return int(value), -1 if that fails; huge values are clamped."""
+    try:
+        return max(-1, min(int(value), 1 << 31))
+    except (TypeError, ValueError, OverflowError):
+        return -1
+
 
 class InputCollector:
     """Collect valid user input.
@@ -318,6 +469,13 @@ class InputCollector:
     def get_char_levels(self):
         return self.__now, self.__goal
 
+    def get_minimum_level(self):
+        """Return the lowest level the skill levels allow, None if unknown."""
+        if self.__skill_levels is None:
+            return None
+        import charlevel
+        return charlevel.minimum_level(self.__skill_levels, self.__race)
+
     def get_race(self):
         return self.__race
 
@@ -335,8 +493,7 @@ class InputCollector:
             return ()
         if temp in GameData.PLAY_STYLES:
             return GameData.PLAY_STYLES[temp]
-        return [k for k, v in GameData.NEW_CHAR_LEVEL_INFO[temp].items() if
-                v > 15]
+        return GameData.RACE_TEMPLATES[GameData.RACE_IDS[temp]]
 
     def has_template(self):
         return self.__template is not None
@@ -399,9 +556,10 @@ class InputCollector:
         self.__template = template  # no validation!
 
     def __set_default_skill_levels(self):
-        default_levels = GameData.NEW_CHAR_LEVEL_INFO[self.__race]
-        self.__skill_levels = {skill: default_levels[skill] for skill in
-                               self.__selected_skills}
+        default_levels = GameData.START_LEVELS[GameData.RACE_IDS[self.__race]]
+        skill_ids = GameData.SKILL_IDS
+        self.__skill_levels = {skill: default_levels[skill_ids[skill]]
+                               for skill in self.__selected_skills}
 
 
 class OutputFormatter:
@@ -57,11 +57,15 @@ class GuiController:
     """
 
     def __init__(self, root):
+        import workspace
         self.__root = root
         self.__collector = None
+        self.__workspace = workspace.Workspace()
+        self.__workspace.load()
 
         self.show_start()
         self.__configure_window()
+        self.__root.protocol("WM_DELETE_WINDOW", self.__close)
 
     def show_input_forms(self, recipe):
         self.__destroy_all_elements()
@@ -69,9 +73,36 @@ class GuiController:
         v.InputGetter(self.__root, recipe, Navigator(self), self.__collector)
 
     def show_results(self):
+        import batch
         self.__destroy_all_elements()
+        now, goal = self.__collector.get_char_levels()
+        profile = batch.Profile(self.__collector.get_skill_levels(), now, goal)
+        try:
+            plans = self.__workspace.plans_of(profile)
+        except Exception:
+            plans = None  # calculated again, the view reports the error
         v.Results(self.__root, self.__collector,
-                  lambda x=None: self.show_start())
+                  lambda x=None: self.show_start(), plans,
+                  lambda name, plans: self.__workspace.put(name, profile,
+                                                           plans))
+
+    def show_profiles(self):
+        self.__destroy_all_elements()
+        v.Profiles(self.__root, self.__workspace, self)
+
+    def show_comparison(self, names):
+        self.__destroy_all_elements()
+        v.Comparison(self.__root, self.__workspace, names,
+                     lambda x=None: self.show_profiles())
+
+    def open_profile(self, name):
+        """Show the results of a saved profile, usually calculated already."""
+        profile = self.__workspace.switch(name)
+        self.__reset_collector()
+        self.__collector.set_selected_skills(list(profile.skill_levels))
+        self.__collector.set_skill_levels(profile.skill_levels)
+        self.__collector.set_char_levels(goal=profile.goal, now=profile.now)
+        self.show_results()
 
     def show_start(self):
         self.__destroy_all_elements()
@@ -90,6 +121,10 @@ class GuiController:
         y_pos = (self.__root.winfo_screenheight() - height) / 2
         self.__root.geometry("%dx%d+%d+%d" % (width, height, x_pos, y_pos))
 
+    def __close(self):
+        self.__workspace.close()
+        self.__root.destroy()
+
     def __destroy_all_elements(self):
         for child in self.__root.winfo_children():
             child.destroy()
@@ -0,0 +1,286 @@
+"""Estimate time-to-goal distributions with Monte-Carlo trials.
+
+Real play does not follow the exact order of the calculator's strategies.
+Each trial models the trained skills as competing clocks: a skill with level
+l that gains r skill xp per hour levels up after an exponentially
+distributed time with mean skill_xp(l) / r. Trials run vectorized with
+NumPy's random generator and are spread across processes (10000 trials of
+a 6-skill character up to level 50 take about half a second per process).
+Run them with `python -m skycalc montecarlo PROFILE`, where PROFILE is a
+profile in the batch format.
+"""
+
+import concurrent.futures
+import json
+import os
+import sys
+
+import calculator as calc
+from inputparser import GameData, ValidationException
+
+CHUNK_TRIALS = 5000  # trials per task, independent of the process count
+SKILL_XP_PER_HOUR = 6000  # rough guess for all trained skills together
+STYLE_WEIGHT = 3.0  # how much more often play style skills are used
+
+
+class TrialResults:
+    """Distributions of all Monte-Carlo trials.
+
+    Attributes:
+        skill_ups: array with skill level-ups per trial
+        skill_xp: array with skill xp spent per trial
+        hours: array with estimated play time per trial
+    """
+
+    def __init__(self, skill_ups, skill_xp, hours):
+        self.skill_ups = skill_ups
+        self.skill_xp = skill_xp
+        self.hours = hours
+
+    def __len__(self):
+        return len(self.hours)
+
+    def summary(self, percentiles=(5, 50, 95)):
+        """Return mean and percentiles of every distribution."""
+        import numpy as np
+
+        summary = {}
+        for name, values in (("Skill-ups", self.skill_ups),
+                             ("Skill XP", self.skill_xp),
+                             ("Hours", self.hours)):
+            entry = {"Mean": float(values.mean())}
+            for p, value in zip(percentiles,
+                                np.percentile(values, percentiles)):
+                entry["P{}".format(p)] = float(value)
+            summary[name] = entry
+        return summary
+
+
+def play_style_weights(skills, style=None):
+    """Return relative use frequencies of skills for a play style.
+
+    Skills of a play style (GameData.PLAY_STYLES) are used more often than
+    other skills. For race templates, the frequency follows the race's skill
+    bonus (15 -> 1, 20 -> 2, 25 -> 3).
+    Attributes:
+        skills: names of the trained skills
+        style (str): play style or race name, None for equal frequencies
+    """
+    if style is None:
+        return {skill: 1.0 for skill in skills}
+    if style in GameData.PLAY_STYLES:
+        favored = GameData.PLAY_STYLES[style]
+        return {skill: STYLE_WEIGHT if skill in favored else 1.0
+                for skill in skills}
+    if style in GameData.RACE_IDS:
+        defaults = GameData.START_LEVELS[GameData.RACE_IDS[style]]
+        return {skill: 1 + (defaults[GameData.SKILL_IDS[skill]] - 15) / 5
+                for skill in skills}
+    raise ValueError("Unknown play style: {}".format(style))
+
+
+def simulate_sessions(original_skill_levels, current, goal, style=None,
+                      weights=None, trials=10000, seed=None, processes=None,
+                      xp_per_hour=SKILL_XP_PER_HOUR, progress=None,
+                      cancel_token=None, settings=calc.DEFAULT_SETTINGS):
+    """Run seeded trials and return their TrialResults.
+
+    Results only depend on the seed, not on the number of processes.
+    Attributes:
+        original_skill_levels: dict containing current levels of used skills.
+        current (int): current character level
+        goal (int): goal level
+        style (str): play style or race used for the skill use frequencies
+        weights: optional dict of skill use frequencies, overrides style
+        trials (int): number of trials
+        seed (int): random seed, None for a random one
+        processes (int): worker processes, None for one per cpu
+        xp_per_hour (float): skill xp gained per hour of play
+        progress: optional ProgressReporter or callable(done, total)
+        cancel_token: optional CancellationToken, checked between chunks
+        settings (GameSettings): leveling rules
+    """
+    import numpy as np
+
+    skills = list(original_skill_levels)
+    if weights is None:
+        weights = play_style_weights(skills, style)
+    frequencies = np.array([weights.get(skill, 0.0) for skill in skills],
+                           dtype=float)
+    if frequencies.min() < 0 or frequencies.sum() <= 0:
+        raise ValueError("Skill use frequencies must be positive.")
+
+    levels = [original_skill_levels[skill] for skill in skills]
+    rates = xp_per_hour * frequencies / frequencies.sum()
+    needed_xp = calc.total_xp(current, goal, settings)
+
+    sizes = [CHUNK_TRIALS] * (trials // CHUNK_TRIALS)
+    if trials % CHUNK_TRIALS:
+        sizes.append(trials % CHUNK_TRIALS)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = [(levels, needed_xp, rates, size, seed_, settings)
+             for size, seed_ in zip(sizes, seeds)]
+
+    if processes is None:
+        processes = os.cpu_count() or 1
+    processes = min(processes, len(tasks))
+
+    reporter = calc.as_reporter(progress)
+    if processes <= 1:
+        chunks = []
+        for task in tasks:
+            if cancel_token is not None:
+                cancel_token.check()
+            chunks.append(_run_trials(*task))
+            if reporter is not None:
+                reporter.update(sum(len(c[0]) for c in chunks), trials,
+                                task[3])
+    else:
+        chunks = _run_in_processes(tasks, processes, trials, reporter,
+                                   cancel_token)
+    if reporter is not None:
+        reporter.finish(trials)
+
+    return TrialResults(*(np.concatenate(column) for column in zip(*chunks)))
+
+
+def _run_in_processes(tasks, processes, trials, reporter, cancel_token):
+    """Run tasks in a process pool and return their results in order."""
+    with concurrent.futures.ProcessPoolExecutor(processes) as executor:
+        futures = [executor.submit(_run_trials, *task) for task in tasks]
+        done = 0
+        try:
+            for future in concurrent.futures.as_completed(futures):
+                if cancel_token is not None:
+                    cancel_token.check()
+                size = len(future.result()[0])
+                done += size
+                if reporter is not None:
+                    reporter.update(done, trials, size)
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+        return [future.result() for future in futures]
+
+
+def _run_trials(levels, needed_xp, rates, trials, seed, settings):
+    """Simulate a chunk of trials and return their raw distributions.
+
+    All trials advance together; every iteration levels up one skill in
+    each trial that has not reached its goal yet. Arrays are laid out
+    skill by skill, so every operation runs over contiguous trials, and
+    the unfinished trials are kept compact: they only shrink when trials
+    finish, in the last few iterations.
+    """
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    n = len(levels)
+
+    # lookup tables indexed by skill * size + level; capped skills have
+    # no hazard, so they are never chosen
+    tables = calc.get_tables(settings)
+    cost = np.array(tables.skill_xp)
+    size = len(cost)
+    next_level = np.array([level if new is None else new
+                           for level, new in enumerate(tables.next_level)])
+    offsets = np.arange(n)[:, None] * size
+    hazard_of = (rates[:, None] / cost).ravel()
+    cost_of = np.tile(cost, n)
+    level_of = np.tile(np.arange(size), n)
+    next_of = (next_level + offsets).ravel()
+
+    skill_ups = np.zeros(trials, dtype=np.int64)
+    spent = np.zeros(trials)
+    hours = np.zeros(trials)
+
+    # state of the unfinished trials, in trial order
+    trial = np.arange(trials)
+    state = np.repeat(np.asarray(levels, dtype=np.int64)[:, None] + offsets,
+                      trials, axis=1)
+    remaining = np.full(trials, needed_xp, dtype=np.int64)
+    ups = 0
+    trial_spent = np.zeros(trials)
+    trial_hours = np.zeros(trials)
+    columns = np.arange(trials)
+    while trial.size:
+        hazards = hazard_of[state]
+        for i in range(1, n):  # cumulative, much faster than np.cumsum
+            np.add(hazards[i - 1], hazards[i], out=hazards[i])
+        total = hazards[-1]
+        if not total.all():
+            raise ValueError("The goal level can't be reached with these "
+                             "skills.")
+
+        threshold = rng.random(trial.size) * total
+        chosen = (hazards <= threshold).sum(axis=0)
+        np.minimum(chosen, n - 1, out=chosen)
+        chosen_state = state[chosen, columns]
+        new_state = next_of[chosen_state]
+
+        state[chosen, columns] = new_state
+        trial_hours += rng.standard_exponential(trial.size) / total
+        trial_spent += cost_of[chosen_state]
+        ups += 1
+        remaining -= level_of[new_state]
+
+        finished = remaining <= 0
+        if finished.any():
+            done = trial[finished]
+            skill_ups[done] = ups
+            spent[done] = trial_spent[finished]
+            hours[done] = trial_hours[finished]
+            left = ~finished
+            trial = trial[left]
+            state = state[:, left]
+            remaining = remaining[left]
+            trial_spent = trial_spent[left]
+            trial_hours = trial_hours[left]
+            columns = columns[:trial.size]
+
+    return skill_ups, spent, hours
+
+
+def add_parser(commands):
+    """Register the 'montecarlo' command of python -m skycalc."""
+    parser = commands.add_parser(
+        "montecarlo", help="estimate the play time of a profile")
+    parser.add_argument("profile",
+                        help="profile as JSON, in the batch format")
+    parser.add_argument("--style",
+                        help="play style or race that sets how often "
+                             "skills are used (default: the profile's race)")
+    parser.add_argument("--trials", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--processes", type=int, default=None,
+                        help="worker processes (default: one per cpu)")
+    parser.add_argument("--xp-per-hour", type=float,
+                        default=SKILL_XP_PER_HOUR,
+                        help="skill xp gained per hour of play")
+    parser.set_defaults(run=main)
+    return parser
+
+
+def main(args):
+    import batch
+
+    try:
+        profile = batch.parse_profile(json.loads(args.profile))
+        results = simulate_sessions(
+            profile.skill_levels, profile.now, profile.goal,
+            args.style or profile.race, trials=args.trials, seed=args.seed,
+            processes=args.processes, xp_per_hour=args.xp_per_hour)
+    except (ValueError, KeyError, ValidationException) as e:
+        print("Invalid profile: {}".format(e), file=sys.stderr)
+        return 2
+    except ImportError:
+        print("The montecarlo command needs NumPy.", file=sys.stderr)
+        return 2
+    json.dump(results.summary(), sys.stdout, indent=1)
+    print()
+    return 0
+
+
+if __name__ == "__main__":
+    print(__doc__, "Use: python -m skycalc montecarlo")
@@ -0,0 +1,248 @@
+"""Run batches on all cores with threads or processes.
+
+Free-threaded CPython builds (3.13t and later) run the calculator in
+threads in parallel: threads share the xp tables, plan table and plan
+deduplication, and nothing is pickled. With the GIL, threads take turns,
+so chunks of profiles are sent to worker processes instead; they read the
+plan table from shared memory (see arena). The executor is chosen at run
+time (see choose_executor), and `python -m skycalc bench-parallel` prints
+how the throughput of both scales with workers.
+"""
+
+import collections
+import concurrent.futures
+import json
+import os
+import random
+import sys
+import time
+
+import arena
+import batch
+import calculator as calc
+from inputparser import GameData
+
+EXECUTORS = ("auto", "thread", "process")
+
+_worker_dedup = None  # Deduplicator of a worker process
+
+
+def gil_enabled():
+    """Return False on a free-threaded build running without the GIL."""
+    is_enabled = getattr(sys, "_is_gil_enabled", None)
+    return True if is_enabled is None else is_enabled()
+
+
+def choose_executor(kind="auto"):
+    """Return "thread" or "process" for kind "auto", "thread" or "process".
+
+    "auto" picks threads only if they run in parallel.
+    """
+    if kind not in EXECUTORS:
+        raise ValueError("Unknown executor: {}".format(kind))
+    if kind == "auto":
+        return "process" if gil_enabled() else "thread"
+    return kind
+
+
+def make_executor(workers=None, kind="auto", shared=None):
+    """Return a concurrent.futures executor, see choose_executor().
+
+    Attributes:
+        workers (int): threads or processes, None for one per cpu
+        kind (str): "auto", "thread" or "process"
+        shared (Arena): optional, tables worker processes attach to
+    """
+    workers = workers or os.cpu_count() or 1
+    if choose_executor(kind) == "thread":
+        return concurrent.futures.ThreadPoolExecutor(workers)
+    if shared is None:
+        return concurrent.futures.ProcessPoolExecutor(workers)
+    return concurrent.futures.ProcessPoolExecutor(
+        workers, initializer=arena.init_worker, initargs=(shared.name,))
+
+
+def run_profiles(lines, workers=None, kind="auto",
+                 settings=calc.DEFAULT_SETTINGS, progress=None,
+                 cancel_token=None, cache=None, dedup=None, summary=None):
+    """Like batch.run_profiles(), but process chunks in parallel.
+
+    Pairs are yielded in input order; at most two chunks per worker are
+    in flight. Threads share the Deduplicator and the cancellation token;
+    worker processes keep their own Deduplicator, whose counters are added
+    to dedup, and the token is only checked between chunks. With a
+    summary, every chunk is summarized by its worker and the summaries are
+    merged into it.
+    Attributes:
+        lines: iterable of JSON Lines, consumed lazily
+        workers (int): threads or processes, None for one per cpu
+        kind (str): "auto", "thread" or "process"
+        settings (GameSettings): leveling rules
+        progress: optional ProgressReporter or callable(done, total)
+        cancel_token: optional CancellationToken
+        cache: optional PlanCache
+        dedup: optional Deduplicator, a new one by default
+        summary: optional reducers.BatchSummary
+    """
+    if dedup is None:
+        dedup = batch.Deduplicator()
+    workers = workers or os.cpu_count() or 1
+    threads = choose_executor(kind) == "thread"
+    reporter = calc.as_reporter(progress)
+    done = 0
+    pending = collections.deque()
+    shared = None if threads else arena.build()
+    try:
+        with make_executor(workers, kind, shared) as executor:
+            try:
+                for chunk in batch.chunks(lines):
+                    if cancel_token is not None:
+                        cancel_token.check()
+                    part = None if summary is None else summary.spawn()
+                    if threads:
+                        pending.append(executor.submit(
+                            _thread_chunk, chunk, settings, cancel_token,
+                            cache, dedup, part))
+                    else:
+                        pending.append(executor.submit(
+                            _process_chunk, chunk, settings, cache, part))
+                    while pending and (pending[0].done() or
+                                       len(pending) >= 2 * workers):
+                        for pair in _result(pending.popleft(), dedup,
+                                            summary):
+                            yield pair
+                            done += 1
+                            if reporter is not None:
+                                reporter.update(done, None)
+                while pending:
+                    for pair in _result(pending.popleft(), dedup, summary):
+                        yield pair
+                        done += 1
+                        if reporter is not None:
+                            reporter.update(done, None)
+            finally:
+                for future in pending:
+                    future.cancel()
+    finally:
+        if shared is not None:
+            shared.unlink()
+    if reporter is not None:
+        reporter.finish(done)
+
+
+def _result(future, dedup, summary):
+    pairs, stats, part = future.result()
+    if stats is not None:
+        dedup.merge_stats(stats)
+    if part is not None:
+        summary.merge(part)
+    return pairs
+
+
+def _thread_chunk(lines, settings, cancel_token, cache, dedup, part):
+    """Run batch.process in a thread, return (pairs, None, summary)."""
+    pairs = batch.process(lines, settings, cancel_token, cache, dedup)
+    return pairs, None, _summarize(pairs, part)
+
+
+def _process_chunk(lines, settings, cache, part):
+    """Run batch.process in a worker process.
+
+    Returns (pairs, counters, summary); the counters are the worker's
+    Deduplicator counters of this chunk.
+    """
+    global _worker_dedup
+    if _worker_dedup is None:
+        _worker_dedup = batch.Deduplicator()
+    before = _worker_dedup.get_stats()
+    pairs = batch.process(lines, settings, cache=cache, dedup=_worker_dedup)
+    if cache is not None:
+        cache.flush()  # the coordinator can't close worker connections
+    after = _worker_dedup.get_stats()
+    return pairs, {name: after[name] - before[name]
+                   for name in batch.Deduplicator.COUNTERS}, \
+        _summarize(pairs, part)
+
+
+def _summarize(pairs, part):
+    """Add the results of pairs to a BatchSummary (if any), return it."""
+    if part is not None:
+        for _ in part.observe(pairs):
+            pass
+    return part
+
+
+# benchmark
+
+
+def sample_lines(n, seed=0):
+    """Return n random custom profiles as JSON Lines."""
+    rng = random.Random(seed)
+    lines = []
+    for i in range(n):
+        skills = rng.sample(list(GameData.SKILL_NAMES), rng.randint(3, 8))
+        lines.append(json.dumps({
+            "id": i,
+            "skill_levels": {skill: rng.randint(15, 90) for skill in skills},
+            "goal": rng.randint(20, 80)}))
+    return lines
+
+
+def measure(lines, workers, kind):
+    """Return seconds to run lines on workers threads or processes."""
+    start = time.perf_counter()
+    for _ in run_profiles(lines, workers, kind):
+        pass
+    return time.perf_counter() - start
+
+
+def scaling(lines, worker_counts, kinds=("thread", "process")):
+    """Yield (kind, workers, seconds, speedup) for every combination.
+
+    The speedup is relative to a single worker of the same kind.
+    """
+    for kind in kinds:
+        base = None
+        for workers in worker_counts:
+            seconds = measure(lines, workers, kind)
+            base = seconds if base is None else base
+            yield kind, workers, seconds, base / seconds
+
+
+def add_parser(commands):
+    """Register the 'bench-parallel' command of python -m skycalc."""
+    parser = commands.add_parser(
+        "bench-parallel",
+        help="measure how batch throughput scales with threads and "
+             "processes")
+    parser.add_argument("--profiles", type=int, default=2000,
+                        help="random profiles per run")
+    parser.add_argument("--workers", type=int, nargs="+", metavar="N",
+                        help="worker counts (default: 1, 2, 4, ... up to "
+                             "the cpu count)")
+    parser.set_defaults(run=main)
+
+
+def main(args):
+    counts = args.workers
+    if not counts:
+        cpus = os.cpu_count() or 1
+        counts = [1]
+        while counts[-1] * 2 <= cpus:
+            counts.append(counts[-1] * 2)
+        if counts[-1] != cpus:
+            counts.append(cpus)
+
+    lines = sample_lines(args.profiles)
+    print("GIL {}, auto executor: {}".format(
+        "enabled" if gil_enabled() else "disabled", choose_executor()))
+    print("{:<9}{:>8}{:>10}{:>12}{:>9}".format(
+        "executor", "workers", "seconds", "profiles/s", "speedup"))
+    for kind, workers, seconds, speedup in scaling(lines, counts):
+        print("{:<9}{:>8}{:>10.2f}{:>12.0f}{:>9.2f}".format(
+            kind, workers, seconds, len(lines) / seconds, speedup))
+    return 0
+
+
+if __name__ == "__main__":
+    print(__doc__, "Use: python -m skycalc bench-parallel")
@@ -0,0 +1,491 @@
+"""Plan when perks become available.
+
+PERK_TREES lists the perks of vanilla Skyrim: per skill, the perk name,
+the skill level it requires and the perks it requires. Perks with ranks
+list one level per rank; every rank is a perk of its own ("Armsman 2/5"),
+requiring the rank before it. A requirement that is a tuple of names is
+met by any one of them.
+
+A PerkIndex keeps the perks of every skill sorted by required level, so the
+perks up to (or between) skill levels are found by bisection. Milestones
+record the highest level every skill has reached at each character level
+of a plan, so the character level a skill level is reached at is found by
+bisection, too. earliest_levels() combines both: the character level at
+which chosen perks are unlockable (skill level and required perks reached)
+and affordable (one perk point per level-up).
+"""
+
+import bisect
+import collections
+import copy
+
+import calculator as calc
+
+PERK_TREES = {
+    "Illusion": (
+        ("Novice Illusion", 0, ()),
+        ("Apprentice Illusion", 25, ("Novice Illusion",)),
+        ("Adept Illusion", 50, ("Apprentice Illusion",)),
+        ("Expert Illusion", 75, ("Adept Illusion",)),
+        ("Master Illusion", 100, ("Expert Illusion",)),
+        ("Illusion Dual Casting", 20, ("Novice Illusion",)),
+        ("Animage", 20, ("Novice Illusion",)),
+        ("Kindred Mage", 40, ("Animage",)),
+        ("Quiet Casting", 50, ("Kindred Mage",)),
+        ("Hypnotic Gaze", 30, ("Novice Illusion",)),
+        ("Aspect of Terror", 50, ("Hypnotic Gaze",)),
+        ("Rage", 70, ("Aspect of Terror",)),
+        ("Master of the Mind", 90, (("Rage", "Quiet Casting"),)),
+    ),
+    "Conjuration": (
+        ("Novice Conjuration", 0, ()),
+        ("Apprentice Conjuration", 25, ("Novice Conjuration",)),
+        ("Adept Conjuration", 50, ("Apprentice Conjuration",)),
+        ("Expert Conjuration", 75, ("Adept Conjuration",)),
+        ("Master Conjuration", 100, ("Expert Conjuration",)),
+        ("Conjuration Dual Casting", 20, ("Novice Conjuration",)),
+        ("Mystic Binding", 20, ("Novice Conjuration",)),
+        ("Soul Stealer", 30, ("Mystic Binding",)),
+        ("Oblivion Binding", 50, ("Soul Stealer",)),
+        ("Necromancy", 40, ("Novice Conjuration",)),
+        ("Dark Souls", 70, ("Necromancy",)),
+        ("Summoner", (30, 70), ("Novice Conjuration",)),
+        ("Atromancy", 40, ("Summoner",)),
+        ("Elemental Potency", 80, ("Atromancy",)),
+        ("Twin Souls", 100, (("Elemental Potency", "Dark Souls"),)),
+    ),
+    "Destruction": (
+        ("Novice Destruction", 0, ()),
+        ("Apprentice Destruction", 25, ("Novice Destruction",)),
+        ("Adept Destruction", 50, ("Apprentice Destruction",)),
+        ("Expert Destruction", 75, ("Adept Destruction",)),
+        ("Master Destruction", 100, ("Expert Destruction",)),
+        ("Rune Master", 40, ("Apprentice Destruction",)),
+        ("Destruction Dual Casting", 20, ("Novice Destruction",)),
+        ("Impact", 40, ("Destruction Dual Casting",)),
+        ("Augmented Flames", (30, 60), ("Novice Destruction",)),
+        ("Intense Flames", 50, ("Augmented Flames",)),
+        ("Augmented Frost", (30, 60), ("Novice Destruction",)),
+        ("Deep Freeze", 60, ("Augmented Frost",)),
+        ("Augmented Shock", (30, 60), ("Novice Destruction",)),
+        ("Disintegrate", 70, ("Augmented Shock",)),
+    ),
+    "Restoration": (
+        ("Novice Restoration", 0, ()),
+        ("Apprentice Restoration", 25, ("Novice Restoration",)),
+        ("Adept Restoration", 50, ("Apprentice Restoration",)),
+        ("Expert Restoration", 75, ("Adept Restoration",)),
+        ("Master Restoration", 100, ("Expert Restoration",)),
+        ("Restoration Dual Casting", 20, ("Novice Restoration",)),
+        ("Regeneration", 20, ("Novice Restoration",)),
+        ("Necromage", 70, ("Regeneration",)),
+        ("Recovery", (30, 60), ("Novice Restoration",)),
+        ("Avoid Death", 90, ("Recovery 2/2",)),
+        ("Respite", 40, ("Novice Restoration",)),
+        ("Ward Absorb", 60, ("Novice Restoration",)),
+    ),
+    "Alteration": (
+        ("Novice Alteration", 0, ()),
+        ("Apprentice Alteration", 25, ("Novice Alteration",)),
+        ("Adept Alteration", 50, ("Apprentice Alteration",)),
+        ("Expert Alteration", 75, ("Adept Alteration",)),
+        ("Master Alteration", 100, ("Expert Alteration",)),
+        ("Alteration Dual Casting", 20, ("Novice Alteration",)),
+        ("Mage Armor", (30, 50, 70), ("Apprentice Alteration",)),
+        ("Magic Resistance", (30, 50, 70), ("Apprentice Alteration",)),
+        ("Stability", 70, ("Adept Alteration",)),
+        ("Atronach", 100, ("Expert Alteration",)),
+    ),
+    "Enchanting": (
+        ("Enchanter", (0, 20, 40, 60, 80), ()),
+        ("Fire Enchanter", 30, ("Enchanter",)),
+        ("Frost Enchanter", 40, ("Fire Enchanter",)),
+        ("Storm Enchanter", 50, ("Frost Enchanter",)),
+        ("Insightful Enchanter", 50, ("Enchanter",)),
+        ("Corpus Enchanter", 70, (("Insightful Enchanter",
+                                   "Storm Enchanter"),)),
+        ("Extra Effect", 100, ("Corpus Enchanter",)),
+        ("Soul Squeezer", 20, ("Enchanter",)),
+        ("Soul Siphon", 40, ("Soul Squeezer",)),
+    ),
+    "Smithing": (
+        ("Steel Smithing", 0, ()),
+        ("Arcane Blacksmith", 60, ("Steel Smithing",)),
+        ("Elven Smithing", 30, ("Steel Smithing",)),
+        ("Advanced Armors", 50, ("Elven Smithing",)),
+        ("Glass Smithing", 70, ("Advanced Armors",)),
+        ("Dwarven Smithing", 30, ("Steel Smithing",)),
+        ("Orcish Smithing", 50, ("Dwarven Smithing",)),
+        ("Ebony Smithing", 80, ("Orcish Smithing",)),
+        ("Daedric Smithing", 90, ("Ebony Smithing",)),
+        ("Dragon Armor", 100, (("Daedric Smithing", "Glass Smithing"),)),
+    ),
+    "Heavy Armor": (
+        ("Juggernaut", (0, 20, 40, 60, 80), ()),
+        ("Fists of Steel", 30, ("Juggernaut",)),
+        ("Cushioned", 50, ("Fists of Steel",)),
+        ("Conditioning", 70, ("Cushioned",)),
+        ("Well Fitted", 30, ("Juggernaut",)),
+        ("Tower of Strength", 50, ("Well Fitted",)),
+        ("Matching Set", 70, ("Tower of Strength",)),
+        ("Reflect Blows", 100, ("Matching Set",)),
+    ),
+    "Block": (
+        ("Shield Wall", (0, 20, 40, 60, 80), ()),
+        ("Quick Reflexes", 30, ("Shield Wall",)),
+        ("Deflect Arrows", 30, ("Shield Wall",)),
+        ("Elemental Protection", 50, ("Deflect Arrows",)),
+        ("Block Runner", 70, ("Elemental Protection",)),
+        ("Power Bash", 30, ("Shield Wall",)),
+        ("Deadly Bash", 50, ("Power Bash",)),
+        ("Disarming Bash", 70, ("Deadly Bash",)),
+        ("Shield Charge", 100, (("Block Runner", "Disarming Bash"),)),
+    ),
+    "Two-handed": (
+        ("Barbarian", (0, 20, 40, 60, 80), ()),
+        ("Champion's Stance", 20, ("Barbarian",)),
+        ("Devastating Blow", 50, ("Champion's Stance",)),
+        ("Great Critical Charge", 50, ("Champion's Stance",)),
+        ("Sweep", 70, (("Devastating Blow", "Great Critical Charge"),)),
+        ("Warmaster", 100, ("Sweep",)),
+        ("Deep Wounds", (30, 60, 90), ("Barbarian",)),
+        ("Limbsplitter", (30, 60, 90), ("Barbarian",)),
+        ("Skullcrusher", (30, 60, 90), ("Barbarian",)),
+    ),
+    "One-handed": (
+        ("Armsman", (0, 20, 40, 60, 80), ()),
+        ("Fighting Stance", 20, ("Armsman",)),
+        ("Savage Strike", 50, ("Fighting Stance",)),
+        ("Critical Charge", 50, ("Fighting Stance",)),
+        ("Paralyzing Strike", 100, (("Savage Strike", "Critical Charge"),)),
+        ("Hack and Slash", (30, 60, 90), ("Armsman",)),
+        ("Bone Breaker", (30, 60, 90), ("Armsman",)),
+        ("Bladesman", (30, 60, 90), ("Armsman",)),
+        ("Dual Flurry", (30, 50), ("Armsman",)),
+        ("Dual Savagery", 70, ("Dual Flurry",)),
+    ),
+    "Archery": (
+        ("Overdraw", (0, 20, 40, 60, 80), ()),
+        ("Critical Shot", (30, 60, 90), ("Overdraw",)),
+        ("Hunter's Discipline", 50, ("Critical Shot",)),
+        ("Ranger", 60, ("Hunter's Discipline",)),
+        ("Eagle Eye", 30, ("Overdraw",)),
+        ("Power Shot", 50, ("Eagle Eye",)),
+        ("Steady Hand", (40, 60), ("Eagle Eye",)),
+        ("Quick Shot", 70, (("Power Shot", "Ranger"),)),
+        ("Bullseye", 100, ("Quick Shot",)),
+    ),
+    "Light Armor": (
+        ("Agile Defender", (0, 20, 40, 60, 80), ()),
+        ("Custom Fit", 30, ("Agile Defender",)),
+        ("Unhindered", 50, ("Custom Fit",)),
+        ("Wind Walker", 60, ("Unhindered",)),
+        ("Matching Set", 70, ("Custom Fit",)),
+        ("Deft Movement", 100, (("Wind Walker", "Matching Set"),)),
+    ),
+    "Sneak": (
+        ("Stealth", (0, 20, 40, 60, 80), ()),
+        ("Backstab", 30, ("Stealth",)),
+        ("Deadly Aim", 40, ("Backstab",)),
+        ("Assassin's Blade", 50, ("Deadly Aim",)),
+        ("Muffled Movement", 30, ("Stealth",)),
+        ("Light Foot", 40, ("Muffled Movement",)),
+        ("Silent Roll", 50, ("Light Foot",)),
+        ("Silence", 70, ("Silent Roll",)),
+        ("Shadow Warrior", 100, ("Silence",)),
+    ),
+    "Lockpicking": (
+        ("Novice Locks", 0, ()),
+        ("Apprentice Locks", 25, ("Novice Locks",)),
+        ("Quick Hands", 40, ("Apprentice Locks",)),
+        ("Wax Key", 50, ("Quick Hands",)),
+        ("Adept Locks", 50, ("Apprentice Locks",)),
+        ("Golden Touch", 60, ("Adept Locks",)),
+        ("Treasure Hunter", 70, ("Golden Touch",)),
+        ("Expert Locks", 75, ("Adept Locks",)),
+        ("Locksmith", 80, ("Expert Locks",)),
+        ("Unbreakable", 100, ("Locksmith",)),
+        ("Master Locks", 100, ("Expert Locks",)),
+    ),
+    "Pickpocket": (
+        ("Light Fingers", (0, 20, 40, 60, 80), ()),
+        ("Night Thief", 30, ("Light Fingers",)),
+        ("Poisoned", 40, ("Night Thief",)),
+        ("Cutpurse", 40, ("Night Thief",)),
+        ("Extra Pockets", 50, ("Night Thief",)),
+        ("Keymaster", 60, ("Cutpurse",)),
+        ("Misdirection", 70, ("Keymaster",)),
+        ("Perfect Touch", 100, ("Misdirection",)),
+    ),
+    "Speech": (
+        ("Haggling", (0, 20, 40, 60, 80), ()),
+        ("Allure", 30, ("Haggling",)),
+        ("Merchant", 50, ("Allure",)),
+        ("Investor", 70, ("Merchant",)),
+        ("Fence", 90, ("Investor",)),
+        ("Master Trader", 100, ("Fence",)),
+        ("Bribery", 30, ("Haggling",)),
+        ("Persuasion", 50, ("Bribery",)),
+        ("Intimidation", 70, ("Persuasion",)),
+    ),
+    "Alchemy": (
+        ("Alchemist", (0, 20, 40, 60, 80), ()),
+        ("Physician", 20, ("Alchemist",)),
+        ("Benefactor", 30, ("Physician",)),
+        ("Experimenter", (50, 70, 90), ("Benefactor",)),
+        ("Poisoner", 30, ("Physician",)),
+        ("Concentrated Poison", 60, ("Poisoner",)),
+        ("Green Thumb", 70, ("Concentrated Poison",)),
+        ("Snakeblood", 80, (("Experimenter", "Concentrated Poison"),)),
+        ("Purity", 100, ("Snakeblood",)),
+    ),
+}
+
+
+class Perk(collections.namedtuple("Perk",
+                                  ["skill", "name", "level", "requires"])):
+    """A perk (rank) of a skill tree.
+
+    Perks are identified by (skill, name); names are unique per skill.
+    Attributes:
+        skill (str): skill the perk belongs to
+        name (str): perk name, "Name k/n" for rank k of n
+        level (int): required skill level
+        requires (tuple): required perks of the same skill, as tuples of
+            names of which any one is enough
+    """
+
+    __slots__ = ()
+
+
+def expand(trees=PERK_TREES):
+    """Return the Perks of raw perk trees, one per rank."""
+    perks = []
+    for skill, tree in trees.items():
+        first_ranks = {}
+        for name, levels, _ in tree:
+            if isinstance(levels, tuple):
+                first_ranks[name] = "{} 1/{}".format(name, len(levels))
+
+        for name, levels, requires in tree:
+            groups = tuple(
+                tuple(first_ranks.get(n, n) for n in
+                      (group if isinstance(group, tuple) else (group,)))
+                for group in requires)
+            if not isinstance(levels, tuple):
+                perks.append(Perk(skill, name, levels, groups))
+                continue
+            previous = None
+            for rank, level in enumerate(levels, 1):
+                rank_name = "{} {}/{}".format(name, rank, len(levels))
+                perks.append(Perk(skill, rank_name, level,
+                                  groups if previous is None else
+                                  ((previous,),)))
+                previous = rank_name
+    return perks
+
+
+class PerkIndex:
+    """Perks indexed by (skill, required level).
+
+    Attributes:
+        perks: Perks, all of expand() by default
+    """
+
+    def __init__(self, perks=None):
+        perks = expand() if perks is None else perks
+        self.__by_key = {}
+        self.__levels = {}  # skill -> sorted required levels
+        self.__sorted = {}  # skill -> Perks in the same order
+        for perk in sorted(perks, key=lambda p: (p.skill, p.level)):
+            key = (perk.skill, perk.name)
+            if key in self.__by_key:
+                raise ValueError("Duplicate perk: {} ({})".format(
+                    perk.name, perk.skill))
+            self.__by_key[key] = perk
+            self.__levels.setdefault(perk.skill, []).append(perk.level)
+            self.__sorted.setdefault(perk.skill, []).append(perk)
+        for perk in perks:
+            for group in perk.requires:
+                for name in group:
+                    if (perk.skill, name) not in self.__by_key:
+                        raise ValueError("Unknown perk: {} ({})".format(
+                            name, perk.skill))
+
+    def get(self, skill, name):
+        """Return a Perk, raise KeyError for unknown perks."""
+        return self.__by_key[(skill, name)]
+
+    def skills(self):
+        return list(self.__sorted)
+
+    def up_to(self, skill, level):
+        """Return the perks of a skill requiring at most a skill level."""
+        levels = self.__levels.get(skill, [])
+        return self.__sorted.get(skill, [])[:bisect.bisect_right(levels,
+                                                                 level)]
+
+    def between(self, skill, low, high):
+        """Return the perks of a skill requiring more than low, up to high."""
+        levels = self.__levels.get(skill, [])
+        return self.__sorted.get(skill, [])[
+            bisect.bisect_right(levels, low):bisect.bisect_right(levels,
+                                                                 high)]
+
+
+class Milestones:
+    """Highest skill levels reached at every character level of a plan.
+
+    Made from the plans of every goal on the way, which a GoalSweep (see
+    goalsweep) keeps anyway. Skills made legendary count as having reached
+    the cap.
+    Attributes:
+        original_skill_levels: dict containing current levels of used skills.
+        current (int): current character level
+        plans (list): result dicts for the goals current + 1, + 2, ...
+        settings (GameSettings): leveling rules
+    """
+
+    def __init__(self, original_skill_levels, current, plans,
+                 settings=calc.DEFAULT_SETTINGS):
+        self.current = current
+        self.goal = current + len(plans)
+        # reached[skill][i]: highest level at character level current + i
+        self.__reached = {skill: [level] for skill, level in
+                          original_skill_levels.items()}
+        for plan in plans:
+            self.__append(plan, settings.skill_cap)
+
+    def until(self, goal):
+        """Return the Milestones of the same plan with an earlier goal."""
+        milestones = copy.copy(self)
+        milestones.goal = goal
+        milestones.__reached = {skill: history[:goal - self.current + 1]
+                                for skill, history in self.__reached.items()}
+        return milestones
+
+    def __append(self, plan, cap):
+        for skill, entry in plan.items():
+            reached = cap if entry["Times Legendary"] else \
+                entry["Final Level"]
+            history = self.__reached[skill]
+            history.append(max(history[-1], reached))
+
+    def reached(self, skill, char_level):
+        """Return the highest level of a skill at a character level."""
+        return self.__reached[skill][char_level - self.current]
+
+    def level_reached(self, skill, skill_level):
+        """Return the character level a skill level is reached at.
+
+        None if the plan doesn't reach it, or doesn't train the skill.
+        """
+        history = self.__reached.get(skill)
+        if history is None:
+            return None
+        i = bisect.bisect_left(history, skill_level)
+        return self.current + i if i < len(history) else None
+
+
+def unlockable_levels(index, milestones, perks, unlock=None):
+    """Return the character levels perks become unlockable at.
+
+    A perk is unlockable once its skill level and its required perks are
+    reached. Returns a dict (skill, name) -> level, None where the plan
+    doesn't get there.
+    Attributes:
+        index (PerkIndex): known perks
+        milestones (Milestones): skill levels of the plan
+        perks: Perks to look at
+        unlock (dict): optional results of earlier calls, extended in place
+    """
+    unlock = {} if unlock is None else unlock
+
+    def unlockable(perk):
+        key = (perk.skill, perk.name)
+        if key not in unlock:
+            level = milestones.level_reached(perk.skill, perk.level)
+            for group in perk.requires:
+                if level is None:
+                    break
+                required = _earliest([unlockable(index.get(perk.skill, name))
+                                      for name in group])
+                level = None if required is None else max(level, required)
+            unlock[key] = level
+        return unlock[key]
+
+    return {(perk.skill, perk.name): unlockable(perk) for perk in perks}
+
+
+def earliest_levels(index, milestones, chosen, points=0):
+    """Return when chosen perks can be taken during a plan.
+
+    The required perks of the chosen ones are included, since they must be
+    taken first; where any one of several perks is enough, one that is
+    needed anyway, else the one unlockable first, is taken. Perks are
+    bought in the order they become unlockable, with one perk point per
+    level-up.
+    Returns a dict (skill, name) -> (unlockable, affordable) character
+    levels, None where the plan doesn't get there.
+    Attributes:
+        index (PerkIndex): known perks
+        milestones (Milestones): skill levels of the plan
+        chosen: (skill, name) pairs of the wanted perks
+        points (int): unspent perk points at the current level
+    """
+    unlock = {}
+
+    def unlockable(perk):
+        return unlockable_levels(index, milestones, [perk], unlock)[
+            (perk.skill, perk.name)]
+
+    needed = []  # prerequisites first
+
+    def need(perk):
+        key = (perk.skill, perk.name)
+        if key in needed:
+            return
+        for group in perk.requires:
+            if any((perk.skill, name) in needed for name in group):
+                continue
+            options = [index.get(perk.skill, name) for name in group]
+            levels = [unlockable(option) for option in options]
+            best = _earliest(levels)
+            need(options[0] if best is None else
+                 options[levels.index(best)])
+        needed.append(key)
+
+    for skill, name in chosen:
+        need(index.get(skill, name))
+
+    position = {key: i for i, key in enumerate(needed)}
+    reachable = sorted((key for key in needed
+                        if unlockable(index.get(*key)) is not None),
+                       key=lambda key: (unlock[key], position[key]))
+    levels = {key: (None, None) for key in needed}
+    for k, key in enumerate(reachable, 1):
+        affordable = max(unlock[key],
+                         milestones.current + max(k - points, 0))
+        levels[key] = (unlock[key],
+                       affordable if affordable <= milestones.goal else None)
+    return levels
+
+
+def _earliest(levels):
+    known = [level for level in levels if level is not None]
+    return min(known) if known else None
+
+
+_default_index = None
+
+
+def get_default_index():
+    """Return the (cached) PerkIndex of PERK_TREES."""
+    global _default_index
+    if _default_index is None:
+        _default_index = PerkIndex()
+    return _default_index
+
+
+if __name__ == "__main__":
+    print(__doc__, "Not meant to be used as main.")
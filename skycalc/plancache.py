@@ -0,0 +1,250 @@
+"""Persistent cache of calculated plans, shared by runs and processes.
+
+Plans are stored in a SQLite database. A key is the canonical input (skill
+levels in their order, since ties go to the first skill, character levels
+and strategy) plus a version hash of the game data, the leveling rules and
+the calculator's formulas, so results of older versions are never used.
+
+Every process and thread opens its own connection; SQLite's locking (in
+WAL mode) makes concurrent access from several workers safe. Entries expire
+after a time to live and the least recently used ones are evicted when the
+cache grows beyond its size cap. Reads don't write: the times plans were
+used are kept per connection and written every WRITE_USED_EVERY hits, on
+eviction, flush() and close(), so recency is slightly approximate.
+"""
+
+import contextlib
+import functools
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import calculator as calc
+from inputparser import GameData
+
+SCHEMA = ("CREATE TABLE IF NOT EXISTS plans ("
+          "key TEXT PRIMARY KEY, plan TEXT NOT NULL, "
+          "created REAL NOT NULL, used REAL NOT NULL)",
+          "CREATE INDEX IF NOT EXISTS plans_used ON plans (used)")
+EVICT_EVERY = 64  # puts between two evictions
+WRITE_USED_EVERY = 256  # hits between two recency updates
+
+_connections = threading.local()
+_lock = threading.Lock()
+_opened = {}  # pid: connections of every thread, see PlanCache.close()
+
+
+@functools.lru_cache(maxsize=16)
+def data_version(settings=calc.DEFAULT_SETTINGS):
+    """Return a hash of game data, leveling rules and calculator code."""
+    digest = hashlib.sha256()
+    digest.update(json.dumps([GameData.SKILL_NAMES,
+                              GameData.NEW_CHAR_LEVEL_INFO]).encode("utf-8"))
+    digest.update(repr(tuple(settings)).encode("ascii"))
+    with open(calc.__file__, "rb") as source:
+        digest.update(source.read())
+    return digest.hexdigest()[:16]
+
+
+def make_key(skill_levels, now, goal, strategy,
+             settings=calc.DEFAULT_SETTINGS):
+    """Return the cache key of a calculation."""
+    return "{}:{}".format(data_version(settings), json.dumps(
+        [list(skill_levels.items()), now, goal, strategy],
+        separators=(",", ":")))
+
+
+class PlanCache:
+    """Plans stored in a SQLite file.
+
+    Instances only hold the configuration, so they can be passed to worker
+    processes. Close the cache (or use it as a context manager) when done.
+    Attributes:
+        path (str): database file, created if missing
+        max_entries (int): size cap, least recently used plans are evicted
+        ttl (float): seconds a plan is valid, None for no expiry
+    """
+
+    def __init__(self, path, max_entries=100000, ttl=None):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.__connect()  # fail early on unusable paths
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __getstate__(self):
+        return {"path": self.path, "max_entries": self.max_entries,
+                "ttl": self.ttl}
+
+    def __setstate__(self, state):
+        self.__init__(state["path"], state["max_entries"], state["ttl"])
+
+    def __len__(self):
+        return self.__connect().sqlite.execute(
+            "SELECT COUNT(*) FROM plans").fetchone()[0]
+
+    def get(self, skill_levels, now, goal, strategy,
+            settings=calc.DEFAULT_SETTINGS):
+        """Return a cached plan, None if there is none."""
+        key = make_key(skill_levels, now, goal, strategy, settings)
+        connection = self.__connect()
+        row = connection.sqlite.execute("SELECT plan, created FROM plans "
+                                        "WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+
+        plan, created = row
+        stamp = time.time()
+        if self.ttl is not None and created < stamp - self.ttl:
+            connection.sqlite.execute("DELETE FROM plans WHERE key = ?",
+                                      (key,))
+            return None
+        connection.used[key] = stamp
+        if len(connection.used) >= WRITE_USED_EVERY:
+            connection.write_used()
+        return json.loads(plan)
+
+    def put(self, skill_levels, now, goal, strategy, result,
+            settings=calc.DEFAULT_SETTINGS):
+        """Store a plan returned by calculator.simulate_strategy."""
+        key = make_key(skill_levels, now, goal, strategy, settings)
+        plan = json.dumps(result, separators=(",", ":"))
+        stamp = time.time()
+        connection = self.__connect()
+        connection.sqlite.execute(
+            "INSERT OR REPLACE INTO plans VALUES (?, ?, ?, ?)",
+            (key, plan, stamp, stamp))
+        connection.used.pop(key, None)
+
+        connection.puts += 1
+        if connection.puts >= EVICT_EVERY:
+            self.evict()
+
+    def evict(self):
+        """Remove expired and least recently used plans beyond the cap."""
+        connection = self.__connect()
+        connection.puts = 0
+        connection.write_used()  # evict by recent use
+        with connection.transaction():
+            if self.ttl is not None:
+                connection.sqlite.execute(
+                    "DELETE FROM plans WHERE created < ?",
+                    (time.time() - self.ttl,))
+            connection.sqlite.execute(
+                "DELETE FROM plans WHERE key IN (SELECT key FROM plans "
+                "ORDER BY used DESC LIMIT -1 OFFSET ?)", (self.max_entries,))
+
+    def clear(self):
+        connection = self.__connect()
+        connection.used.clear()
+        connection.sqlite.execute("DELETE FROM plans")
+
+    def flush(self):
+        """Write the pending recency updates of this thread."""
+        self.__connect().write_used()
+
+    def close(self):
+        """Write pending recency updates and close the connections.
+
+        This closes the connections of all threads of this process, so
+        call it once no thread uses the cache; using it again reconnects.
+        """
+        with _lock:
+            opened = _opened.get(os.getpid(), [])
+            closing = [c for c in opened if c.path == self.path]
+            opened[:] = [c for c in opened if c.path != self.path]
+        for connection in closing:
+            connection.close()
+
+    def __connect(self):
+        """Return the connection of this process and thread."""
+        if getattr(_connections, "pid", None) != os.getpid():
+            _connections.pid = os.getpid()  # forked, don't share
+            _connections.open = {}
+        connection = _connections.open.get(self.path)
+        if connection is None or connection.closed:
+            connection = _Connection(self.path)
+            _connections.open[self.path] = connection
+            with _lock:
+                _opened.setdefault(os.getpid(), []).append(connection)
+        return connection
+
+
+class _Connection:
+    """A connection to a cache file and its pending writes.
+
+    Attributes:
+        path (str): database file
+        sqlite: the sqlite3 connection, used by one thread at a time
+        used (dict): {key: time it was last used} of cache hits not
+            written yet
+        puts (int): plans stored since the last eviction
+    """
+
+    def __init__(self, path):
+        self.path = path
+        # closed by PlanCache.close(), possibly in another thread
+        self.sqlite = sqlite3.connect(path, timeout=30,
+                                      isolation_level=None,
+                                      check_same_thread=False)
+        self.sqlite.execute("PRAGMA journal_mode=WAL")
+        self.sqlite.execute("PRAGMA synchronous=NORMAL")
+        for statement in SCHEMA:
+            self.sqlite.execute(statement)
+        self.used = {}
+        self.puts = 0
+        self.closed = False
+
+    @contextlib.contextmanager
+    def transaction(self):
+        self.sqlite.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+            self.sqlite.execute("COMMIT")
+        except BaseException:
+            self.sqlite.execute("ROLLBACK")
+            raise
+
+    def write_used(self):
+        """Write the pending recency updates in one transaction."""
+        if self.used:
+            with self.transaction():
+                self.sqlite.executemany(
+                    "UPDATE plans SET used = ? WHERE key = ?",
+                    [(stamp, key) for key, stamp in self.used.items()])
+            self.used.clear()
+
+    def close(self):
+        if not self.closed:
+            try:
+                self.write_used()
+            finally:
+                self.closed = True
+                self.sqlite.close()
+
+
+def simulate_strategy(original_skill_levels, current, goal, strategy,
+                      cache, progress=None, cancel_token=None,
+                      settings=calc.DEFAULT_SETTINGS):
+    """Like calculator.simulate_strategy, but use a PlanCache."""
+    result = cache.get(original_skill_levels, current, goal, strategy,
+                       settings)
+    if result is None:
+        result = calc.simulate_strategy(original_skill_levels, current, goal,
+                                        strategy, progress, cancel_token,
+                                        settings)
+        cache.put(original_skill_levels, current, goal, strategy, result,
+                  settings)
+    return result
+
+
+if __name__ == "__main__":
+    print(__doc__, "Not meant to be used as main.")
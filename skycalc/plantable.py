@@ -0,0 +1,314 @@
+"""Precomputed plans for new characters that use a template.
+
+Templates (the race templates and GameData.PLAY_STYLES) combined with a
+race's default skill levels are a small, fixed input space. build() simulates
+every template x race x strategy once, advancing goal by goal from level 1
+to MAX_GOAL, and writes how often each skill was trained to a compact file.
+PlanTable loads that file lazily: the index is read on the first lookup and
+every (template, race, strategy) block is decompressed on first use.
+
+Simulation results depend on the order of the skills (ties go to the first
+skill), so every template is stored in each order the app produces: its own
+order, GameData.SKILL_NAMES order and alphabetical order.
+
+File layout:
+
+    header   HEADER: magic, version, settings checksum, index length
+    index    zlib compressed JSON: {"race|strategy|skill,...": [offset, size]}
+    blocks   zlib compressed uint16 little-endian times leveled per skill
+             for goals 2..MAX_GOAL, [goal - 2][skill], each row stored as
+             the difference to the previous goal (small, compresses well)
+"""
+
+import array
+import json
+import operator
+import os
+import struct
+import sys
+import threading
+import zlib
+
+import calculator as calc
+from inputparser import GameData
+
+MAGIC = b"SKYP"
+VERSION = 1
+HEADER = struct.Struct("<4sHIQ")  # magic, version, settings crc, index size
+MAX_GOAL = 252
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            "res", "plans.bin")
+
+
+def settings_checksum(settings=calc.DEFAULT_SETTINGS):
+    """Return a checksum of leveling rules, stored in every table file."""
+    return zlib.crc32(repr(tuple(settings)).encode("ascii"))
+
+
+def template_orders():
+    """Return all ordered skill tuples a template request can have."""
+    templates = [list(skills) for skills in GameData.RACE_TEMPLATES]
+    templates.extend(list(skills) for skills in
+                     GameData.PLAY_STYLES.values())
+
+    orders = []
+    for skills in templates:
+        for order in (skills,
+                      [s for s in GameData.SKILL_NAMES if s in skills],
+                      sorted(skills)):
+            if tuple(order) not in orders:
+                orders.append(tuple(order))
+    return orders
+
+
+def build(path=DEFAULT_PATH, settings=calc.DEFAULT_SETTINGS, progress=None,
+          cancel_token=None, orders=None):
+    """Simulate all template plans and write them to a table file.
+
+    Attributes:
+        path (str): table file to write
+        settings (GameSettings): leveling rules
+        progress: optional ProgressReporter or callable(done, total)
+        cancel_token: optional CancellationToken, checked per goal level
+        orders: skill tuples to store, template_orders() by default
+    """
+    tables = calc.get_tables(settings)
+    reporter = calc.as_reporter(progress)
+    orders = template_orders() if orders is None else orders
+    jobs = [(race, strategy, skills) for skills in orders
+            for race in GameData.RACE_NAMES for strategy in calc.STRATEGIES]
+
+    index = {}
+    blocks = []
+    offset = 0
+    for done, (race, strategy, skills) in enumerate(jobs):
+        defaults = GameData.START_LEVELS[GameData.RACE_IDS[race]]
+        engine = calc.ClassEngine(
+            {skill: defaults[GameData.SKILL_IDS[skill]] for skill in skills},
+            strategy, settings)
+        times = array.array("H")
+        previous = [0] * len(skills)
+        for goal in range(2, MAX_GOAL + 1):
+            if cancel_token is not None:
+                cancel_token.check()
+            engine.advance(tables.total_xp(goal - 1, goal))
+            row = [entry["Times Leveled"]
+                   for entry in engine.result().values()]
+            times.extend(new - old for new, old in zip(row, previous))
+            previous = row
+        if sys.byteorder != "little":
+            times.byteswap()
+
+        block = zlib.compress(times.tobytes(), 9)
+        index[_key(race, strategy, skills)] = [offset, len(block)]
+        blocks.append(block)
+        offset += len(block)
+        if reporter is not None:
+            reporter.update(done + 1, len(jobs))
+    if reporter is not None:
+        reporter.finish(len(jobs))
+
+    index = zlib.compress(json.dumps(index, separators=(",", ":"))
+                          .encode("utf-8"), 9)
+    with open(path, "wb") as output:
+        output.write(HEADER.pack(MAGIC, VERSION, settings_checksum(settings),
+                                 len(index)))
+        output.write(index)
+        for block in blocks:
+            output.write(block)
+
+
+class PlanTable:
+    """Lazily loaded table file written by build().
+
+    Nothing is read before the first lookup. A missing or outdated file
+    makes every lookup return None, so callers fall back to simulating.
+    Attributes:
+        path (str): table file
+    """
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.__path = path
+        self.__lock = threading.Lock()
+        self.__index = None
+        self.__checksum = None
+        self.__blocks_at = 0
+        self.__blocks = {}
+
+    @classmethod
+    def from_blocks(cls, blocks, checksum):
+        """Return a PlanTable of decoded blocks, see export()."""
+        table = cls(None)
+        table.__index = dict.fromkeys(blocks)
+        table.__blocks = dict(blocks)
+        table.__checksum = checksum
+        return table
+
+    def is_available(self):
+        self.__load_index()
+        return bool(self.__index)
+
+    def export(self):
+        """Return (settings checksum, {key: decoded block}) of all plans.
+
+        The blocks are flat sequences of times leveled, [goal - 2][skill].
+        """
+        if not self.is_available():
+            return None, {}
+        return self.__checksum, {key: self.__block(key)
+                                 for key in self.__index}
+
+    def lookup(self, skill_levels, now, goal, strategy, race=None,
+               settings=calc.DEFAULT_SETTINGS):
+        """Return the plan like calculator.simulate_strategy, or None.
+
+        Only plans of new characters (now = 1) with a template's skills at a
+        race's default levels are stored. If race is None, the race is
+        found by the skill levels.
+        Attributes:
+            skill_levels (dict): start levels of the trained skills
+            now (int): current character level
+            goal (int): goal level
+            strategy (str): "fast", "easy" or "balanced"
+            race (str): race of the character, optional
+            settings (GameSettings): leveling rules
+        """
+        if now != 1 or not 2 <= goal <= MAX_GOAL:
+            return None
+        self.__load_index()
+        if not self.__index or self.__checksum != settings_checksum(settings):
+            return None
+
+        skills = tuple(skill_levels)
+        skill_ids = [GameData.SKILL_IDS.get(skill) for skill in skills]
+        if None in skill_ids:
+            return None
+        # compare the levels with a race's row of the matrix in one call
+        defaults_of = operator.itemgetter(*skill_ids)
+        levels = tuple(skill_levels.values())
+        if len(levels) == 1:
+            levels = levels[0]
+        races = GameData.RACE_NAMES if race is None else (race,)
+        for race in races:
+            if defaults_of(GameData.START_LEVELS[GameData.RACE_IDS[race]]) \
+                    != levels:
+                continue
+            times = self.__block(_key(race, strategy, skills))
+            if times is None:
+                continue
+            row = (goal - 2) * len(skills)
+            return _result(skill_levels, times[row:row + len(skills)],
+                           settings)
+        return None
+
+    def __load_index(self):
+        with self.__lock:
+            if self.__index is not None:
+                return
+            self.__index = {}
+            try:
+                with open(self.__path, "rb") as file:
+                    header = file.read(HEADER.size)
+                    if len(header) < HEADER.size:
+                        return
+                    magic, version, checksum, size = HEADER.unpack(header)
+                    if magic != MAGIC or version != VERSION:
+                        return
+                    index = json.loads(zlib.decompress(file.read(size)))
+            except (OSError, ValueError, zlib.error):
+                return
+            self.__index = index
+            self.__checksum = checksum
+            self.__blocks_at = HEADER.size + size
+
+    def __block(self, key):
+        with self.__lock:
+            if key in self.__blocks:
+                return self.__blocks[key]
+            if key not in self.__index:
+                return None
+            offset, size = self.__index[key]
+            with open(self.__path, "rb") as file:
+                file.seek(self.__blocks_at + offset)
+                times = array.array("H", zlib.decompress(file.read(size)))
+            if sys.byteorder != "little":
+                times.byteswap()
+            width = len(key.rsplit("|", 1)[1].split(","))
+            for i in range(width, len(times)):
+                times[i] += times[i - width]
+            self.__blocks[key] = times
+            return times
+
+
+_default_table = PlanTable()
+
+
+def get_default_table():
+    return _default_table
+
+
+def set_default_table(table):
+    """Make lookup() use another PlanTable, e.g. one in shared memory."""
+    global _default_table
+    _default_table = table
+
+
+def lookup(skill_levels, now, goal, strategy, race=None,
+           settings=calc.DEFAULT_SETTINGS):
+    """Look a plan up in the default table, see PlanTable.lookup()."""
+    return _default_table.lookup(skill_levels, now, goal, strategy, race,
+                                 settings)
+
+
+def simulate_strategy(original_skill_levels, current, goal, strategy,
+                      progress=None, cancel_token=None,
+                      settings=calc.DEFAULT_SETTINGS):
+    """Like calculator.simulate_strategy, but look template plans up."""
+    result = lookup(original_skill_levels, current, goal, strategy,
+                    settings=settings)
+    if result is None:
+        return calc.simulate_strategy(original_skill_levels, current, goal,
+                                      strategy, progress, cancel_token,
+                                      settings)
+    reporter = calc.as_reporter(progress)
+    if reporter is not None:
+        reporter.finish(1)
+    return result
+
+
+def _key(race, strategy, skills):
+    return "{}|{}|{}".format(race, strategy, ",".join(skills))
+
+
+def _result(skill_levels, times, settings):
+    result = {}
+    for (skill, start), t in zip(skill_levels.items(), times):
+        level, legendary = calc.level_after(start, t, settings)
+        result[skill] = {"Start Level": start,
+                         "Times Leveled": t,
+                         "Times Legendary": legendary,
+                         "Final Level": level}
+    return result
+
+
+def add_parser(commands):
+    """Register the 'build-tables' command of python -m skycalc."""
+    parser = commands.add_parser(
+        "build-tables", help="precompute plans of all templates")
+    parser.add_argument("-o", "--output", default=DEFAULT_PATH,
+                        help="table file (default: res/plans.bin)")
+    parser.set_defaults(run=main)
+    return parser
+
+
+def main(args):
+    def report(done, total):
+        print("\r{}/{} plans".format(done, total), end="", file=sys.stderr)
+
+    build(args.output, progress=calc.ProgressReporter(report, every=10))
+    print(file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    print(__doc__, "Use: python -m skycalc build-tables")
@@ -0,0 +1,308 @@
+"""Streaming statistics for large batch runs.
+
+Reducers see every value once, use constant memory and can be merged, so
+workers can reduce their share of a batch and send the reducers (they are
+plain picklable objects) to be combined:
+
+    Moments          count, mean, standard deviation, min and max
+    Histogram        counts in fixed-width buckets
+    QuantileSketch   approximate quantiles with a relative error bound
+
+BatchSummary attaches reducers to the batch pipeline and groups plans by
+race, goal level and strategy. Its histograms cover every possible number
+of skill-ups up to a goal level (see max_skill_ups).
+"""
+
+import functools
+import math
+
+import calculator as calc
+
+LOWEST_SKILL_LEVEL = 15  # of valid inputs
+SUMMARY_GOAL = 100  # highest goal covered by default histograms
+HISTOGRAM_BUCKETS = 100  # max_skill_ups is a loose bound, so use many
+
+
+class Moments:
+    """Running count, mean, variance, min and max (Welford's method)."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0  # sum of squared differences from the mean
+        self.min = None
+        self.max = None
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def merge(self, other):
+        """Add the values seen by another Moments."""
+        if not other.count:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.min = other.min if self.min is None else min(self.min,
+                                                          other.min)
+        self.max = other.max if self.max is None else max(self.max,
+                                                          other.max)
+
+    def summary(self):
+        std = math.sqrt(self.m2 / self.count) if self.count else 0.0
+        return {"Count": self.count, "Mean": self.mean, "Std": std,
+                "Min": self.min, "Max": self.max}
+
+
+class Histogram:
+    """Counts of values in fixed-width buckets.
+
+    Values below low or from high on are counted separately.
+    Attributes:
+        low (float): lower edge of the first bucket
+        high (float): upper edge of the last bucket
+        buckets (int): number of buckets
+    """
+
+    def __init__(self, low=0, high=2000, buckets=40):
+        if not low < high or buckets < 1:
+            raise ValueError("Invalid histogram range.")
+        self.low = low
+        self.high = high
+        self.counts = [0] * buckets
+        self.below = 0
+        self.above = 0
+
+    def add(self, value):
+        if value < self.low:
+            self.below += 1
+        elif value >= self.high:
+            self.above += 1
+        else:
+            width = (self.high - self.low) / len(self.counts)
+            i = min(int((value - self.low) / width), len(self.counts) - 1)
+            self.counts[i] += 1
+
+    def merge(self, other):
+        if (other.low, other.high, len(other.counts)) != \
+                (self.low, self.high, len(self.counts)):
+            raise ValueError("Only equal histograms can be merged.")
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.below += other.below
+        self.above += other.above
+
+    def summary(self):
+        return {"Low": self.low, "High": self.high, "Counts": self.counts,
+                "Below": self.below, "Above": self.above}
+
+
+class QuantileSketch:
+    """Approximate quantiles of non-negative values.
+
+    Values are counted in logarithmic buckets (like DDSketch), so every
+    quantile is within the relative error of a true value, for any number
+    of values. When there are more than max_buckets buckets, the lowest
+    ones are combined, which only affects the smallest quantiles.
+    Attributes:
+        relative_error (float): accuracy of the quantiles, e.g. 0.01
+        max_buckets (int): memory bound
+    """
+
+    def __init__(self, relative_error=0.01, max_buckets=2048):
+        self.relative_error = relative_error
+        self.max_buckets = max_buckets
+        self.__gamma = (1 + relative_error) / (1 - relative_error)
+        self.__log_gamma = math.log(self.__gamma)
+        self.buckets = {}
+        self.zeros = 0
+        self.count = 0
+
+    def add(self, value):
+        if value < 0:
+            raise ValueError("Only non-negative values can be sketched.")
+        self.count += 1
+        if value == 0:
+            self.zeros += 1
+            return
+        i = math.ceil(math.log(value) / self.__log_gamma)
+        self.buckets[i] = self.buckets.get(i, 0) + 1
+        if len(self.buckets) > self.max_buckets:
+            self.__collapse()
+
+    def merge(self, other):
+        if other.relative_error != self.relative_error:
+            raise ValueError("Only sketches with the same accuracy can be "
+                             "merged.")
+        for i, n in other.buckets.items():
+            self.buckets[i] = self.buckets.get(i, 0) + n
+        self.zeros += other.zeros
+        self.count += other.count
+        while len(self.buckets) > self.max_buckets:
+            self.__collapse()
+
+    def quantile(self, q):
+        """Return the approximate q-quantile (0 <= q <= 1), None if empty."""
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zeros
+        if seen > rank:
+            return 0.0
+        for i in sorted(self.buckets):
+            seen += self.buckets[i]
+            if seen > rank:
+                return 2 * self.__gamma ** i / (self.__gamma + 1)
+        return 2 * self.__gamma ** max(self.buckets) / (self.__gamma + 1)
+
+    def summary(self, quantiles=(0.05, 0.5, 0.95)):
+        return {"P{:g}".format(100 * q): self.quantile(q) for q in quantiles}
+
+    def __collapse(self):
+        lowest, second = sorted(self.buckets)[:2]
+        self.buckets[second] += self.buckets.pop(lowest)
+
+
+def max_skill_ups(goal, settings=calc.DEFAULT_SETTINGS):
+    """Return the most skill-ups a plan from level 1 to a goal can take.
+
+    Every skill-up gains at least the lowest valid skill level + 1, or the
+    level legendary skills are reset to, in character xp.
+    """
+    least = LOWEST_SKILL_LEVEL + 1
+    if settings.legendary:
+        least = min(least, settings.legendary_level + 1)
+    return math.ceil(calc.get_tables(settings).total_xp(1, goal) / least)
+
+
+def default_reducers(histogram_high=None):
+    """Return the reducers applied to every group of a BatchSummary.
+
+    Attributes:
+        histogram_high (int): upper edge of the histogram, by default
+            max_skill_ups(SUMMARY_GOAL)
+    """
+    if histogram_high is None:
+        histogram_high = max_skill_ups(SUMMARY_GOAL)
+    return {"Moments": Moments(),
+            "Histogram": Histogram(0, histogram_high, HISTOGRAM_BUCKETS),
+            "Quantiles": QuantileSketch()}
+
+
+class BatchSummary:
+    """Skill-up statistics of batch results.
+
+    Plans are grouped by race, goal level and strategy; per skill, the
+    summary shows how often it is trained. Memory only grows with the
+    number of groups, not with the number of plans.
+    Attributes:
+        make_reducers: callable returning a dict of fresh reducers for a
+            group, default_reducers by default
+    """
+
+    GROUPS = ("race", "goal", "strategy")
+
+    def __init__(self, make_reducers=default_reducers):
+        self.__make_reducers = make_reducers
+        self.plans = 0
+        self.overall = make_reducers()
+        self.groups = {group: {} for group in self.GROUPS}
+        self.skills = {}  # skill: Moments of times leveled when trained
+
+    def add(self, profile, results):
+        """Add the results of a batch.Profile, {strategy: result}."""
+        for strategy, result in results.items():
+            skill_ups = sum(entry["Times Leveled"]
+                            for entry in result.values())
+            keys = {"race": profile.race or "Custom",
+                    "goal": profile.goal,
+                    "strategy": strategy}
+            reducers = [self.overall]
+            for group in self.GROUPS:
+                values = self.groups[group]
+                if keys[group] not in values:
+                    values[keys[group]] = self.__make_reducers()
+                reducers.append(values[keys[group]])
+            for group_reducers in reducers:
+                for reducer in group_reducers.values():
+                    reducer.add(skill_ups)
+
+            for skill, entry in result.items():
+                if entry["Times Leveled"]:
+                    if skill not in self.skills:
+                        self.skills[skill] = Moments()
+                    self.skills[skill].add(entry["Times Leveled"])
+            self.plans += 1
+
+    def observe(self, pairs):
+        """Pass (Profile, record) pairs of batch.run_profiles through."""
+        for profile, record in pairs:
+            if profile is not None:
+                self.add(profile, record["results"])
+            yield profile, record
+
+    @classmethod
+    def up_to(cls, goal, settings=calc.DEFAULT_SETTINGS):
+        """Return a BatchSummary whose histograms fit all goals up to one."""
+        return cls(functools.partial(default_reducers,
+                                     max_skill_ups(goal, settings)))
+
+    def spawn(self):
+        """Return an empty BatchSummary with the same reducers.
+
+        Give one to every worker and merge() them when they are done. For
+        worker processes, make_reducers must be picklable.
+        """
+        return BatchSummary(self.__make_reducers)
+
+    def merge(self, other):
+        """Add the plans seen by another BatchSummary."""
+        self.plans += other.plans
+        _merge_reducers(self.overall, other.overall)
+        for group in self.GROUPS:
+            values = self.groups[group]
+            for key, reducers in other.groups[group].items():
+                if key in values:
+                    _merge_reducers(values[key], reducers)
+                else:
+                    values[key] = reducers
+        for skill, moments in other.skills.items():
+            if skill in self.skills:
+                self.skills[skill].merge(moments)
+            else:
+                self.skills[skill] = moments
+
+    def summary(self):
+        """Return all statistics as a JSON serializable dict."""
+        def summarize(reducers):
+            return {name: reducer.summary()
+                    for name, reducer in reducers.items()}
+
+        return {
+            "Plans": self.plans,
+            "Skill-ups": summarize(self.overall),
+            "By Race": {key: summarize(reducers) for key, reducers in
+                        sorted(self.groups["race"].items())},
+            "By Goal": {str(key): summarize(reducers) for key, reducers in
+                        sorted(self.groups["goal"].items())},
+            "By Strategy": {key: summarize(reducers) for key, reducers in
+                            self.groups["strategy"].items()},
+            "Skills": {skill: {"Trained": moments.count,
+                               "Share": moments.count / self.plans,
+                               "Times Leveled": moments.summary()}
+                       for skill, moments in sorted(self.skills.items())}}
+
+
+def _merge_reducers(target, source):
+    for name, reducer in source.items():
+        target[name].merge(reducer)
+
+
+if __name__ == "__main__":
+    print(__doc__, "Not meant to be used as main.")
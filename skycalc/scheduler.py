@@ -0,0 +1,117 @@
+"""Group single requests into micro-batches.
+
+Under concurrent load, running every request on its own costs a round trip
+to the executor per request. A MicroBatcher queues requests and runs them
+together once max_batch of them are waiting, or max_delay after the oldest
+one arrived, whatever comes first. Results are handed back to the waiting
+callers. max_delay and max_batch trade latency for throughput; get_stats()
+shows how they play out (queue length, batch sizes, flush reasons, waiting
+and batch times).
+"""
+
+import asyncio
+import collections
+import time
+
+import reducers
+
+
+class MicroBatcher:
+    """Run queued items in batches in an executor.
+
+    Attributes:
+        run_batch: picklable callable(list of items) returning a list with a
+            result or an exception for every item
+        executor: concurrent.futures executor, None for the loop's default
+        max_batch (int): items per batch
+        max_delay (float): seconds the oldest item waits at most
+        max_concurrency (int): batches running at the same time
+    """
+
+    def __init__(self, run_batch, executor=None, max_batch=16,
+                 max_delay=0.002, max_concurrency=4):
+        if max_batch < 1:
+            raise ValueError("Batches need at least one item.")
+        self.__run_batch = run_batch
+        self.__executor = executor
+        self.__max_batch = max_batch
+        self.__max_delay = max_delay
+        self.__semaphore = asyncio.Semaphore(max_concurrency)
+        self.__queue = collections.deque()  # (item, future, arrival)
+        self.__timer = None
+        self.__stats = collections.Counter()
+        self.__wait_ms = reducers.Moments()
+        self.__batch_ms = reducers.Moments()
+        self.__sizes = reducers.Moments()
+
+    def get_stats(self):
+        stats = dict(self.__stats)
+        stats["queued"] = len(self.__queue)
+        stats["batch_size"] = self.__sizes.summary()
+        stats["wait_ms"] = self.__wait_ms.summary()
+        stats["batch_ms"] = self.__batch_ms.summary()
+        return stats
+
+    async def submit(self, item):
+        """Queue an item and return its result once its batch ran."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.__queue.append((item, future, time.monotonic()))
+        self.__stats["submitted"] += 1
+        if len(self.__queue) >= self.__max_batch:
+            self.__flush("flushed_full")
+        elif self.__timer is None:
+            self.__timer = loop.call_later(self.__max_delay, self.__flush,
+                                           "flushed_deadline")
+        return await future
+
+    def __flush(self, reason):
+        if self.__timer is not None:
+            self.__timer.cancel()
+            self.__timer = None
+
+        items = []
+        while self.__queue and len(items) < self.__max_batch:
+            entry = self.__queue.popleft()
+            if not entry[1].cancelled():
+                items.append(entry)
+        if items:
+            self.__stats[reason] += 1
+            asyncio.ensure_future(self.__run(items))
+
+        if len(self.__queue) >= self.__max_batch:
+            self.__flush(reason)
+        elif self.__queue:
+            # the next oldest item keeps its own deadline
+            delay = self.__queue[0][2] + self.__max_delay - time.monotonic()
+            self.__timer = asyncio.get_running_loop().call_later(
+                max(delay, 0), self.__flush, "flushed_deadline")
+
+    async def __run(self, entries):
+        async with self.__semaphore:
+            start = time.monotonic()
+            for _, _, arrival in entries:
+                self.__wait_ms.add(1000 * (start - arrival))
+            self.__sizes.add(len(entries))
+            loop = asyncio.get_running_loop()
+            try:
+                results = await loop.run_in_executor(
+                    self.__executor, self.__run_batch,
+                    [item for item, _, _ in entries])
+            except Exception as e:
+                results = [e] * len(entries)
+                self.__stats["failed_batches"] += 1
+            self.__batch_ms.add(1000 * (time.monotonic() - start))
+            self.__stats["batches"] += 1
+
+        for (_, future, _), result in zip(entries, results):
+            if future.done():  # the caller gave up
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+if __name__ == "__main__":
+    print(__doc__, "Not meant to be used as main.")
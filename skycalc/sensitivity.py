@@ -0,0 +1,200 @@
+"""What if a skill had one level more or less? Compare neighboring plans.
+
+The base plan is simulated once while recording every decision together
+with its runner-up. A neighbor differs from the base plan in the start level
+of a single skill, so it makes the same decisions until that skill's level
+changes one of them. Neighbors therefore replay the recorded decisions with
+O(1) work per step and only fall back to simulating from the point where
+they diverge (or outlast the base plan).
+
+Every neighbor still starts at step 0, so analyze() costs O(skills * steps)
+and neighbors are not much cheaper than plain simulations: with "fast" and
+"easy", they diverge within the first few hundred steps and simulate the
+rest; with "balanced", they rarely diverge and replay the whole trace.
+Snapshots of the base plan would not help, since a neighbor has to check
+every step up to the one where it diverges. For 18 skills from level 1 to
+252 (about 14000 steps), a strategy takes 0.25 to 0.6 seconds.
+"""
+
+import heapq
+
+import calculator as calc
+
+LOWEST_SKILL_LEVEL = 15
+INFINITY = float("inf")
+
+
+class Plan:
+    """Summary of a simulated plan.
+
+    Attributes:
+        skill_ups (int): number of skill level-ups
+        skill_xp (float): skill xp spent
+        final_levels (list): final level of every skill
+    """
+
+    def __init__(self, skill_ups, skill_xp, final_levels):
+        self.skill_ups = skill_ups
+        self.skill_xp = skill_xp
+        self.final_levels = final_levels
+
+
+class _Strategy:
+    """Decision rule of one calculator strategy, working on skill indices.
+
+    Smaller keys win, ties go to the skill that comes first, exactly like
+    min() and max() in the calculator's selection methods.
+    Attributes:
+        by_times (bool): compare times leveled instead of levels
+        highest (bool): prefer high levels
+    """
+
+    def __init__(self, by_times=False, highest=False):
+        self.by_times = by_times
+        self.highest = highest
+
+    def key(self, level, times, cap, legendary):
+        if level >= cap and not legendary:
+            return INFINITY  # can't be trained
+        if self.by_times:
+            return times
+        return -level if self.highest else level
+
+
+STRATEGIES = {"fast": _Strategy(highest=True),
+              "easy": _Strategy(),
+              "balanced": _Strategy(by_times=True)}
+
+
+def analyze(original_skill_levels, current, goal, strategy,
+            settings=calc.DEFAULT_SETTINGS, cancel_token=None):
+    """Return the impact of +1 and -1 start levels of every skill.
+
+    The result maps every skill to {+1: change, -1: change}; a change is a
+    dict with the differences in "Skill-ups", "Skill XP" and "Final Levels"
+    (dict of skill: difference), or None if the start level would be
+    invalid or the goal couldn't be reached from it.
+    Attributes:
+        original_skill_levels: dict containing current levels of used skills.
+        current (int): current character level
+        goal (int): goal level
+        strategy (str): "fast", "easy" or "balanced"
+        settings (GameSettings): leveling rules
+        cancel_token: optional CancellationToken, checked per neighbor
+    """
+    skills = list(original_skill_levels)
+    levels = [original_skill_levels[skill] for skill in skills]
+    rule = STRATEGIES[strategy]
+    tables = calc.get_tables(settings)
+    needed_xp = tables.total_xp(current, goal)
+
+    base, trace = _simulate(list(levels), [0] * len(levels), needed_xp,
+                            rule, tables, record=True)
+
+    report = {}
+    for i, skill in enumerate(skills):
+        report[skill] = {}
+        for delta in (1, -1):
+            if cancel_token is not None:
+                cancel_token.check()
+            start = levels[i] + delta
+            if not LOWEST_SKILL_LEVEL <= start <= settings.skill_cap:
+                report[skill][delta] = None
+                continue
+            try:
+                neighbor = _replay(levels, i, start, needed_xp, trace, rule,
+                                   tables)
+            except ValueError:  # e.g. one level less to train to the cap
+                report[skill][delta] = None
+                continue
+            report[skill][delta] = {
+                "Skill-ups": neighbor.skill_ups - base.skill_ups,
+                "Skill XP": neighbor.skill_xp - base.skill_xp,
+                "Final Levels": {
+                    s: new - old for s, new, old in
+                    zip(skills, neighbor.final_levels, base.final_levels)}}
+    return report
+
+
+def _simulate(levels, times, remaining, rule, tables, record=False,
+              skill_ups=0, skill_xp=0.0):
+    """Train skills until no xp remains and return the Plan.
+
+    With record=True, every decision is returned as well, as a list of
+    (chosen skill, runner-up) index pairs. Levels and times are changed in
+    place. Only the trained skill's key changes per step, so the skills are
+    kept in a heap of (key, index) pairs.
+    """
+    settings = tables.settings
+    cap, legendary = settings.skill_cap, settings.legendary
+    heap = [(rule.key(levels[i], times[i], cap, legendary), i)
+            for i in range(len(levels))]
+    heapq.heapify(heap)
+    trace = []
+
+    while remaining > 0:
+        key, chosen = heapq.heappop(heap)
+        if key == INFINITY:
+            raise ValueError("The goal level can't be reached with these "
+                             "skills.")
+        if record:
+            trace.append((chosen, heap[0][1] if heap else None))
+
+        skill_xp += tables.skill_xp[levels[chosen]]
+        levels[chosen] = tables.next_level[levels[chosen]]
+        times[chosen] += 1
+        skill_ups += 1
+        remaining -= levels[chosen]
+        heapq.heappush(heap, (rule.key(levels[chosen], times[chosen], cap,
+                                       legendary), chosen))
+
+    plan = Plan(skill_ups, skill_xp, levels)
+    return (plan, trace) if record else plan
+
+
+def _replay(original_levels, x, start, needed_xp, trace, rule, tables):
+    """Return the Plan of a neighbor whose skill x starts at another level.
+
+    Follows the recorded base decisions while they stay valid for the
+    neighbor and simulates the rest.
+    """
+    settings = tables.settings
+    cap, legendary = settings.skill_cap, settings.legendary
+    levels = list(original_levels)  # same as in the base plan, except x
+    levels[x] = start
+    times = [0] * len(levels)
+    remaining = needed_xp
+    skill_xp = 0.0
+
+    for step, (chosen, runner_up) in enumerate(trace):
+        if remaining <= 0:
+            return Plan(step, skill_xp, levels)
+
+        # the neighbor's choice, given that only x differs from the base
+        key_x = rule.key(levels[x], times[x], cap, legendary)
+        if chosen != x:
+            key_c = rule.key(levels[chosen], times[chosen], cap, legendary)
+            if key_x < key_c or key_x == key_c and x < chosen:
+                return _simulate(levels, times, remaining, rule, tables,
+                                 skill_ups=step, skill_xp=skill_xp)
+        elif runner_up is not None:
+            key_r = rule.key(levels[runner_up], times[runner_up], cap,
+                             legendary)
+            if key_r < key_x or key_r == key_x and runner_up < x:
+                return _simulate(levels, times, remaining, rule, tables,
+                                 skill_ups=step, skill_xp=skill_xp)
+        if key_x == INFINITY and chosen == x:
+            raise ValueError("The goal level can't be reached with these "
+                             "skills.")
+
+        skill_xp += tables.skill_xp[levels[chosen]]
+        levels[chosen] = tables.next_level[levels[chosen]]
+        times[chosen] += 1
+        remaining -= levels[chosen]
+
+    return _simulate(levels, times, remaining, rule, tables,
+                     skill_ups=len(trace), skill_xp=skill_xp)
+
+
+if __name__ == "__main__":
+    print(__doc__, "Not meant to be used as main.")
@@ -0,0 +1,286 @@
+"""Serve the calculator as a small JSON over HTTP service.
+
+Only the standard library is used (and NumPy to validate lists of
+profiles). Endpoints:
+
+    GET  /health               service status and cache statistics
+    POST /validate             check a profile (see batch) without simulating;
+                               a list of profiles is checked in one pass
+    POST /simulate             results of the profile's strategies
+    POST /simulate/<strategy>  results of a single strategy
+
+Simulations run in a worker pool, in micro-batches (see scheduler) of the
+requests that arrive within a short window. Identical requests that
+arrive while a calculation is in flight share it, and recent results are
+kept in a small in-memory LRU cache, optionally backed by a persistent
+PlanCache that the workers share (see plancache).
+"""
+
+import asyncio
+import collections
+import concurrent.futures
+import functools
+import json
+
+import arena
+import batch
+import plancache
+import scheduler
+from inputparser import ValidationException
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found",
+           405: "Method Not Allowed", 413: "Payload Too Large",
+           500: "Internal Server Error"}
+
+
+class CalculatorService:
+    """Answer API requests; coalesce and cache simulations.
+
+    Attributes:
+        executor: concurrent.futures executor running the simulations
+        max_concurrency (int): batches running at the same time
+        cache_size (int): number of cached results
+        plan_cache: optional PlanCache used by the workers
+        max_batch (int): requests per micro-batch
+        batch_window (float): seconds a request waits for others at most
+    """
+
+    def __init__(self, executor, max_concurrency=8, cache_size=1024,
+                 plan_cache=None, max_batch=16, batch_window=0.002):
+        self.__batcher = scheduler.MicroBatcher(
+            functools.partial(batch.calculate_many, cache=plan_cache),
+            executor, max_batch, batch_window, max_concurrency)
+        self.__cache = collections.OrderedDict()
+        self.__cache_size = cache_size
+        self.__in_flight = {}
+        self.__stats = collections.Counter()
+
+    def get_stats(self):
+        stats = dict(self.__stats)
+        stats["cached"] = len(self.__cache)
+        stats["in_flight"] = len(self.__in_flight)
+        stats["scheduler"] = self.__batcher.get_stats()
+        return stats
+
+    async def handle(self, method, path, body):
+        """Return (status, payload) for a request."""
+        self.__stats["requests"] += 1
+        if path == "/health":
+            if method != "GET":
+                return 405, {"error": "Use GET."}
+            return 200, {"status": "ok", "stats": self.get_stats()}
+
+        if path != "/validate" and path != "/simulate" and \
+                not path.startswith("/simulate/"):
+            return 404, {"error": "Unknown endpoint."}
+        if method != "POST":
+            return 405, {"error": "Use POST."}
+
+        try:
+            data = json.loads(body.decode("utf-8"))
+        except ValueError:
+            return 400, {"error": "Invalid JSON.", "problems": []}
+        if path == "/validate" and isinstance(data, list):
+            validation, _ = batch.validate_profiles(data)
+            # lists like the "problems" of a single profile
+            return 200, {"valid": validation.valid,
+                         "errors": validation.messages,
+                         "problems": [problems or [] for problems in
+                                      validation.problems]}
+        if path.startswith("/simulate/") and isinstance(data, dict):
+            data["strategies"] = [path[len("/simulate/"):]]
+
+        try:
+            profile = batch.parse_profile(data)
+        except ValidationException as e:
+            return 400, {"error": str(e), "problems": e.get_problems() or []}
+        if path == "/validate":
+            return 200, {"valid": True}
+
+        try:
+            return 200, {"results": await self.simulate(profile)}
+        except ValueError as e:  # e.g. unreachable goals with modded rules
+            return 400, {"error": str(e), "problems": []}
+
+    async def simulate(self, profile):
+        """Return the results of a Profile, computed at most once."""
+        key = (tuple(profile.skill_levels.items()), profile.now,
+               profile.goal, profile.strategies)
+        if key in self.__cache:
+            self.__stats["cache_hits"] += 1
+            self.__cache.move_to_end(key)
+            return self.__cache[key]
+
+        if key in self.__in_flight:
+            self.__stats["coalesced"] += 1
+            return await asyncio.shield(self.__in_flight[key])
+
+        self.__stats["cache_misses"] += 1
+        future = asyncio.ensure_future(self.__compute(key, profile))
+        self.__in_flight[key] = future
+        return await asyncio.shield(future)
+
+    async def __compute(self, key, profile):
+        try:
+            results = await self.__batcher.submit(profile)
+        finally:
+            self.__in_flight.pop(key, None)
+
+        self.__cache[key] = results
+        if len(self.__cache) > self.__cache_size:
+            self.__cache.popitem(last=False)
+        return results
+
+
+async def handle_connection(service, reader, writer, max_body=65536):
+    """Serve HTTP/1.1 requests of one connection (keep-alive supported)."""
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            try:
+                method, path, version = request_line.decode(
+                    "latin-1").split()
+            except ValueError:
+                await _respond(writer, 400, {"error": "Bad request line."},
+                               False)
+                break
+
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+            keep_alive = (headers.get("connection", "").lower() != "close"
+                          and version == "HTTP/1.1")
+            try:
+                length = int(headers.get("content-length", 0) or 0)
+            except ValueError:
+                length = -1
+            if length < 0:
+                await _respond(writer, 400, {"error": "Bad Content-Length."},
+                               False)
+                break
+            if length > max_body:
+                await _respond(writer, 413, {"error": "Body too large."},
+                               False)
+                break
+            body = await reader.readexactly(length) if length else b""
+
+            try:
+                status, payload = await service.handle(method, path, body)
+            except Exception:
+                status, payload = 500, {"error": "Something went wrong."}
+            await _respond(writer, status, payload, keep_alive)
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def _respond(writer, status, payload, keep_alive):
+    body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    head = ("HTTP/1.1 {} {}\r\n"
+            "Content-Type: application/json\r\n"
+            "Content-Length: {}\r\n"
+            "Connection: {}\r\n\r\n").format(
+        status, REASONS[status], len(body),
+        "keep-alive" if keep_alive else "close")
+    writer.write(head.encode("latin-1") + body)
+    await writer.drain()
+
+
+async def serve(host="127.0.0.1", port=8080, workers=None,
+                max_concurrency=8, cache_size=1024, cache_path=None,
+                max_batch=16, batch_window=0.002, ready=None):
+    """Run the service until cancelled.
+
+    Attributes:
+        host (str): interface to listen on, localhost by default
+        port (int): port to listen on, 0 for any free port
+        workers (int): worker processes, None for one per cpu
+        max_concurrency (int): batches running at the same time
+        cache_size (int): number of cached results
+        cache_path (str): persistent plan cache file, None for none
+        max_batch (int): requests per micro-batch
+        batch_window (float): seconds a request waits for others at most
+        ready: optional callable, receives the bound (host, port)
+    """
+    shared = arena.build()  # read-only tables, attached by every worker
+    try:
+        await _serve(host, port, workers, max_concurrency, cache_size,
+                     cache_path, max_batch, batch_window, ready, shared)
+    finally:
+        shared.unlink()
+
+
+async def _serve(host, port, workers, max_concurrency, cache_size,
+                 cache_path, max_batch, batch_window, ready, shared):
+    with concurrent.futures.ProcessPoolExecutor(
+            workers, initializer=arena.init_worker,
+            initargs=(shared.name,)) as executor:
+        plan_cache = None
+        if cache_path is not None:
+            plan_cache = plancache.PlanCache(cache_path)
+        try:
+            service = CalculatorService(executor, max_concurrency,
+                                        cache_size, plan_cache, max_batch,
+                                        batch_window)
+            # start the workers before listening: forked later, they would
+            # inherit client sockets and keep closed connections open
+            await asyncio.get_running_loop().run_in_executor(executor, int)
+            server = await asyncio.start_server(
+                lambda r, w: handle_connection(service, r, w), host, port)
+            if ready is not None:
+                ready(server.sockets[0].getsockname()[:2])
+            async with server:
+                await server.serve_forever()
+        finally:
+            if plan_cache is not None:
+                plan_cache.close()
+
+
+def add_parser(commands):
+    """Register the 'serve' command of python -m skycalc."""
+    parser = commands.add_parser("serve", help="run the HTTP service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes (default: one per cpu)")
+    parser.add_argument("--max-concurrency", type=int, default=8,
+                        help="batches running at the same time")
+    parser.add_argument("--max-batch", type=int, default=16,
+                        help="requests simulated together at most")
+    parser.add_argument("--batch-window-ms", type=float, default=2.0,
+                        help="time a request waits for others at most")
+    parser.add_argument("--cache-size", type=int, default=1024,
+                        help="number of cached results")
+    parser.add_argument("--cache", metavar="PATH",
+                        help="persistent plan cache (SQLite file), shared "
+                             "by the workers and across runs")
+    parser.set_defaults(run=main)
+    return parser
+
+
+def main(args):
+    def announce(address):
+        print("Serving on http://{}:{}".format(*address), flush=True)
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers,
+                          args.max_concurrency, args.cache_size, args.cache,
+                          args.max_batch, args.batch_window_ms / 1000,
+                          announce))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    print(__doc__, "Use: python -m skycalc serve")
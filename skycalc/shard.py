@@ -0,0 +1,403 @@
+"""Distribute batch runs over worker nodes.
+
+A coordinator splits a profile stream (see batch) into chunks of lines and
+hands them to workers over TCP ("host:port") or Unix domain sockets
+("unix:/path"), so workers can run on this or other machines. Local
+workers use Unix sockets, or TCP on 127.0.0.1 where there are none (as on
+Windows). Results are written in input order. A chunk whose worker fails
+or times out is sent again, to any worker, up to a number of retries.
+
+Messages are JSON objects, each preceded by its length (FRAME):
+
+    coordinator -> worker   {"id": chunk id, "lines": [profile lines]}
+    worker -> coordinator   {"id": chunk id, "records": [output records]}
+                            or {"id": chunk id, "error": message}
+"""
+
+import collections
+import json
+import multiprocessing
+import os
+import socket
+import struct
+import sys
+import tempfile
+import threading
+import time
+
+import arena
+import batch
+
+FRAME = struct.Struct("!I")
+RETRIES = 3
+CONNECT_ATTEMPTS = 50  # workers may still be starting
+CONNECT_DELAY = 0.1
+
+
+class ShardError(Exception):
+    """A chunk failed on every attempt, or no worker is left."""
+
+
+def parse_address(address):
+    """Return (socket family, address) for "host:port" or "unix:path"."""
+    if address.startswith("unix:"):
+        if not hasattr(socket, "AF_UNIX"):
+            raise ValueError("Unix sockets are not available: {}"
+                             .format(address))
+        return socket.AF_UNIX, address[len("unix:"):]
+    host, _, port = address.rpartition(":")
+    try:
+        return socket.AF_INET, (host or "127.0.0.1", int(port))
+    except ValueError:
+        raise ValueError("Invalid worker address: {}".format(address))
+
+
+def send_message(connection, message):
+    data = json.dumps(message, separators=(",", ":")).encode("utf-8")
+    connection.sendall(FRAME.pack(len(data)) + data)
+
+
+def receive_message(connection):
+    """Return the next message, None if the connection was closed."""
+    header = _receive_exactly(connection, FRAME.size)
+    if header is None:
+        return None
+    data = _receive_exactly(connection, FRAME.unpack(header)[0])
+    if data is None:
+        raise ConnectionError("Connection closed mid-message.")
+    return json.loads(data.decode("utf-8"))
+
+
+def _receive_exactly(connection, size):
+    parts = []
+    while size:
+        part = connection.recv(min(size, 1 << 20))
+        if not part:
+            if parts:
+                raise ConnectionError("Connection closed mid-message.")
+            return None
+        parts.append(part)
+        size -= len(part)
+    return b"".join(parts)
+
+
+# worker
+
+
+def listen(address):
+    """Return a socket listening on an address ("host:0" picks a port)."""
+    family, target = parse_address(address)
+    listener = socket.socket(family, socket.SOCK_STREAM)
+    try:
+        if family == socket.AF_INET:
+            listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        listener.bind(target)
+        listener.listen()
+    except OSError:
+        listener.close()
+        raise
+    return listener
+
+
+def serve_worker(address, arena_name=None, listener=None):
+    """Calculate the chunks of coordinators connecting to an address.
+
+    Local workers attach to the coordinator's tables (see arena) by name,
+    and get a listener that is already bound to the address.
+    """
+    if arena_name is not None:
+        arena.init_worker(arena_name)
+    family, target = parse_address(address)
+    if listener is None:
+        listener = listen(address)
+    try:
+        while True:
+            connection, _ = listener.accept()
+            threading.Thread(target=_serve_connection, args=(connection,),
+                             daemon=True).start()
+    finally:
+        listener.close()
+        if family == socket.AF_UNIX:
+            os.unlink(target)
+
+
+def _serve_connection(connection):
+    dedup = batch.Deduplicator()  # plans shared by the chunks of a run
+    with connection:
+        try:
+            while True:
+                message = receive_message(connection)
+                if message is None:
+                    return
+                try:
+                    records = [record for _, record in
+                               batch.process(message["lines"], dedup=dedup)]
+                    reply = {"id": message["id"], "records": records}
+                except Exception as e:
+                    reply = {"id": message.get("id"), "error": repr(e)}
+                send_message(connection, reply)
+        except (ConnectionError, OSError, ValueError):
+            pass
+
+
+# coordinator
+
+
+class _Chunk:
+    def __init__(self, id_, lines):
+        self.id = id_
+        self.lines = lines
+        self.attempts = 0
+
+
+class Coordinator:
+    """Run batches on a set of workers.
+
+    Attributes:
+        addresses (list): worker addresses, see parse_address()
+        chunk_lines (int): profiles per chunk
+        retries (int): attempts per chunk after the first one
+        timeout (float): seconds to wait for a chunk's result
+        window (int): chunks in flight or waiting, bounds memory use;
+            twice the number of workers by default
+    """
+
+    def __init__(self, addresses, chunk_lines=batch.CHUNK_LINES,
+                 retries=RETRIES, timeout=300, window=None):
+        if not addresses:
+            raise ValueError("At least one worker is needed.")
+        self.addresses = list(addresses)
+        self.chunk_lines = chunk_lines
+        self.retries = retries
+        self.timeout = timeout
+        self.window = window or 2 * len(self.addresses)
+        self.__condition = threading.Condition()
+        self.__todo = collections.deque()
+        self.__done = {}
+        self.__error = None
+        self.__alive = 0
+        self.__closed = False
+        self.stats = collections.Counter()
+
+    def run(self, lines):
+        """Yield the output record of every non-empty line, in order."""
+        condition = self.__condition
+        self.__todo.clear()
+        self.__done = {}
+        self.__error = None
+        self.__closed = False
+        self.__alive = len(self.addresses)
+        threads = [threading.Thread(target=self.__work, args=(address,),
+                                    daemon=True)
+                   for address in self.addresses]
+        for thread in threads:
+            thread.start()
+
+        chunks = enumerate(batch.chunks(lines, self.chunk_lines))
+        exhausted = False
+        next_id = 0
+        sent = 0
+        try:
+            while not exhausted or next_id < sent:
+                while not exhausted and sent - next_id < self.window:
+                    chunk = next(chunks, None)
+                    if chunk is None:
+                        exhausted = True
+                        break
+                    with condition:
+                        self.__todo.append(_Chunk(*chunk))
+                        condition.notify()
+                    sent += 1
+
+                with condition:
+                    while next_id not in self.__done:
+                        if self.__error is not None:
+                            raise self.__error
+                        if not self.__alive:
+                            raise ShardError("No worker is left.")
+                        if not exhausted and sent - next_id < self.window:
+                            break
+                        condition.wait()
+                    records = self.__done.pop(next_id, None)
+                if records is not None:
+                    next_id += 1
+                    for record in records:
+                        yield record
+        finally:
+            with condition:
+                self.__closed = True
+                self.__todo.clear()
+                condition.notify_all()
+
+    def __work(self, address):
+        """Send chunks to one worker until the run is over."""
+        condition = self.__condition
+        connection = None
+        failures = 0
+        try:
+            while True:
+                with condition:
+                    while not self.__todo and not self.__closed:
+                        condition.wait()
+                    if self.__closed:
+                        return
+                    chunk = self.__todo.popleft()
+                try:
+                    if connection is None:
+                        connection = _connect(address, self.timeout)
+                    send_message(connection, {"id": chunk.id,
+                                              "lines": chunk.lines})
+                    reply = receive_message(connection)
+                    if reply is None:
+                        raise ConnectionError("Worker closed connection.")
+                    if "error" in reply or reply.get("id") != chunk.id:
+                        raise ShardError(reply.get("error", "Wrong chunk."))
+                except (OSError, ValueError, ShardError):
+                    if connection is not None:
+                        connection.close()
+                        connection = None
+                    failures += 1
+                    self.__retry(chunk)
+                    if failures > self.retries:
+                        return  # give up on this worker
+                    time.sleep(CONNECT_DELAY * failures)
+                    continue
+
+                failures = 0
+                with condition:
+                    self.__done[chunk.id] = reply["records"]
+                    self.stats["chunks"] += 1
+                    self.stats[address] += 1
+                    condition.notify_all()
+        finally:
+            if connection is not None:
+                connection.close()
+            with condition:
+                self.__alive -= 1
+                condition.notify_all()
+
+    def __retry(self, chunk):
+        with self.__condition:
+            chunk.attempts += 1
+            self.stats["retries"] += 1
+            if chunk.attempts > self.retries:
+                self.__error = ShardError(
+                    "Chunk {} failed {} times.".format(chunk.id,
+                                                       chunk.attempts))
+            else:
+                self.__todo.appendleft(chunk)
+            self.__condition.notify_all()
+
+
+def _connect(address, timeout):
+    family, target = parse_address(address)
+    for attempt in range(CONNECT_ATTEMPTS):
+        connection = socket.socket(family, socket.SOCK_STREAM)
+        connection.settimeout(timeout)
+        try:
+            connection.connect(target)
+            return connection
+        except OSError:
+            connection.close()
+            if attempt == CONNECT_ATTEMPTS - 1:
+                raise
+            time.sleep(CONNECT_DELAY)
+
+
+def start_local_workers(n, directory, shared=None):
+    """Start n workers, return (processes, addresses).
+
+    Workers listen on Unix sockets in directory, or on free TCP ports of
+    127.0.0.1 where there are no Unix sockets. With an Arena, the workers
+    read its tables instead of loading them.
+    """
+    processes = []
+    addresses = []
+    for i in range(n):
+        if hasattr(socket, "AF_UNIX"):
+            address = "unix:" + os.path.join(directory,
+                                             "worker{}.sock".format(i))
+        else:
+            address = "127.0.0.1:0"
+        # bound here, so the port is known and connections can't fail
+        listener = listen(address)
+        if listener.family == socket.AF_INET:
+            address = "127.0.0.1:{}".format(listener.getsockname()[1])
+        process = multiprocessing.Process(
+            target=serve_worker,
+            args=(address, None if shared is None else shared.name,
+                  listener),
+            daemon=True)
+        try:
+            process.start()
+        finally:
+            listener.close()  # the worker has its own copy
+        processes.append(process)
+        addresses.append(address)
+    return processes, addresses
+
+
+def add_parser(commands):
+    """Register the 'shard' and 'worker' commands of python -m skycalc."""
+    parser = commands.add_parser(
+        "shard", help="run a batch on worker nodes")
+    parser.add_argument("input", nargs="?", default="-",
+                        help="profile file, '-' for stdin (default)")
+    parser.add_argument("-o", "--output", default="-",
+                        help="result file, '-' for stdout (default)")
+    parser.add_argument("-w", "--worker", action="append", default=[],
+                        metavar="ADDRESS",
+                        help="worker address, host:port or unix:path "
+                             "(repeatable)")
+    parser.add_argument("--local", type=int, default=0, metavar="N",
+                        help="start N local workers")
+    parser.add_argument("--chunk", type=int, default=batch.CHUNK_LINES,
+                        help="profiles per chunk")
+    parser.add_argument("--retries", type=int, default=RETRIES)
+    parser.set_defaults(run=main)
+
+    parser = commands.add_parser("worker", help="serve as a shard worker")
+    parser.add_argument("address", help="host:port or unix:path to listen on")
+    parser.set_defaults(run=worker_main)
+
+
+def main(args):
+    if not args.worker and not args.local:
+        print("Give worker addresses or --local N.", file=sys.stderr)
+        return 2
+
+    shared = arena.build() if args.local else None
+    with tempfile.TemporaryDirectory() as directory:
+        processes, addresses = start_local_workers(args.local, directory,
+                                                   shared)
+        coordinator = Coordinator(args.worker + addresses, args.chunk,
+                                  args.retries)
+        source = sys.stdin if args.input == "-" else open(args.input)
+        target = sys.stdout if args.output == "-" else open(args.output, "w")
+        try:
+            batch.write_records(coordinator.run(source), target)
+        except ShardError as e:
+            print(e, file=sys.stderr)
+            return 1
+        finally:
+            if source is not sys.stdin:
+                source.close()
+            if target is not sys.stdout:
+                target.close()
+            for process in processes:
+                process.terminate()
+            if shared is not None:
+                shared.unlink()
+    return 0
+
+
+def worker_main(args):
+    try:
+        serve_worker(args.address)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    print(__doc__, "Use: python -m skycalc shard / worker")
@@ -0,0 +1,288 @@
+"""Binary columnar storage for calculated plans.
+
+A store holds one row per plan (profile and strategy). Per-skill data is
+kept in int16 columns with one entry per skill in GameData.SKILL_NAMES
+order; skills that are not part of a plan are -1. Layout (little-endian):
+
+    header   64 bytes, see HEADER
+    id       int64   [rows]       profile id, -1 if missing or not an int
+                                  (so -1 itself can't be stored)
+    start    int16   [rows, 18]   start level
+    final    int16   [rows, 18]   final level
+    times    int16   [rows, 18]   times leveled
+    legendary int16  [rows, 18]   times legendary
+    now      int16   [rows]       current character level
+    goal     int16   [rows]       goal level
+    strategy int8    [rows]       index in calculator.STRATEGIES
+    race     int8    [rows]       index in GameData.RACE_NAMES, -1 if none
+
+Readers map the file into memory and hand out zero-copy memoryviews (or
+NumPy arrays), so even huge stores are analyzed without parsing.
+"""
+
+import array
+import mmap
+import os
+import shutil
+import struct
+import sys
+import tempfile
+
+import calculator as calc
+from inputparser import GameData
+
+MAGIC = b"SKYC"
+VERSION = 1
+HEADER = struct.Struct("<4sHHQ")  # magic, version, skills, rows
+HEADER_SIZE = 64
+SKILLS = len(GameData.SKILL_NAMES)
+
+# name, array typecode, values per row
+COLUMNS = (("id", "q", 1),
+           ("start", "h", SKILLS),
+           ("final", "h", SKILLS),
+           ("times", "h", SKILLS),
+           ("legendary", "h", SKILLS),
+           ("now", "h", 1),
+           ("goal", "h", 1),
+           ("strategy", "b", 1),
+           ("race", "b", 1))
+
+ID_RANGE = (-(1 << 63), (1 << 63) - 1)  # of the int64 id column
+NO_ID = -1
+_RESULT_KEYS = (("start", "Start Level"), ("final", "Final Level"),
+                ("times", "Times Leveled"), ("legendary", "Times Legendary"))
+
+
+def _int_id(id_):
+    return isinstance(id_, int) and not isinstance(id_, bool)
+
+
+def fits_id(id_):
+    """Return False for int ids the id column can't hold.
+
+    These are ids out of ID_RANGE and NO_ID, which marks missing ids.
+    """
+    if _int_id(id_):
+        return ID_RANGE[0] <= id_ <= ID_RANGE[1] and id_ != NO_ID
+    return True  # stored as NO_ID
+
+
+def _layout(rows):
+    """Return {column: (offset, size in bytes)} for a number of rows."""
+    layout = {}
+    offset = HEADER_SIZE
+    for name, typecode, width in COLUMNS:
+        size = rows * width * array.array(typecode).itemsize
+        layout[name] = (offset, size)
+        offset += size
+    return layout
+
+
+class StoreWriter:
+    """Append plans to a new store file.
+
+    Rows are buffered per column and spilled to temporary files, so memory
+    use stays constant; the store is assembled by close().
+    Attributes:
+        path (str): file to write
+        chunk_rows (int): rows buffered in memory per column
+    """
+
+    def __init__(self, path, chunk_rows=4096):
+        self.__path = path
+        self.__chunk_rows = chunk_rows
+        self.__rows = 0
+        self.__buffered = 0
+        self.__buffers = {name: array.array(typecode)
+                          for name, typecode, _ in COLUMNS}
+        self.__spills = {name: tempfile.TemporaryFile()
+                         for name, _, _ in COLUMNS}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.__rows
+
+    def add(self, result, now, goal, strategy, race=None, id_=None):
+        """Add a plan.
+
+        Raises ValueError, leaving the store unchanged, if a value doesn't
+        fit into its column.
+        Attributes:
+            result (dict): skill data returned by a calculator function
+            now (int): current character level
+            goal (int): goal level
+            strategy (str): name of the strategy
+            race (str): race of a new character, None if unknown
+            id_: profile id, stored if it is an int (see fits_id)
+        """
+        self.__append([self.__row(result, now, goal, strategy, race, id_)])
+
+    def add_plans(self, results, now, goal, race=None, id_=None):
+        """Add the plans of a profile, either all of them or none.
+
+        Attributes:
+            results (dict): {strategy: skill data}, as in batch records
+            others: see add()
+        """
+        self.__append([self.__row(result, now, goal, strategy, race, id_)
+                       for strategy, result in results.items()])
+
+    def close(self):
+        """Write the store and remove the temporary files."""
+        if self.__spills is None:
+            return
+        self.__flush()
+        with open(self.__path, "wb") as output:
+            header = HEADER.pack(MAGIC, VERSION, SKILLS, self.__rows)
+            output.write(header.ljust(HEADER_SIZE, b"\0"))
+            for name, _, _ in COLUMNS:
+                spill = self.__spills[name]
+                spill.seek(0)
+                shutil.copyfileobj(spill, output)
+                spill.close()
+        self.__spills = None
+
+    @staticmethod
+    def __row(result, now, goal, strategy, race, id_):
+        """Return {column: array} for a plan, checking every value."""
+        if not fits_id(id_):
+            raise ValueError("The id {} doesn't fit into a plan store."
+                             .format(id_))
+        try:
+            values = {name: [-1] * SKILLS for name, _ in _RESULT_KEYS}
+            for skill, entry in result.items():
+                i = GameData.SKILL_IDS[skill]
+                for name, key in _RESULT_KEYS:
+                    values[name][i] = entry[key]
+            values.update(id=[id_ if _int_id(id_) else NO_ID],
+                          now=[now], goal=[goal],
+                          strategy=[calc.STRATEGIES.index(strategy)],
+                          race=[-1 if race is None else
+                                GameData.RACE_IDS[race]])
+            return {name: array.array(typecode, values[name])
+                    for name, typecode, _ in COLUMNS}
+        except (KeyError, OverflowError, TypeError) as error:
+            raise ValueError("The plan doesn't fit into a plan store: {}"
+                             .format(error)) from error
+
+    def __append(self, rows):
+        for row in rows:
+            for name, values in row.items():
+                self.__buffers[name].extend(values)
+            self.__rows += 1
+            self.__buffered += 1
+        if self.__buffered >= self.__chunk_rows:
+            self.__flush()
+
+    def __flush(self):
+        for name, buffer in self.__buffers.items():
+            if sys.byteorder != "little":
+                buffer.byteswap()
+            buffer.tofile(self.__spills[name])
+            del buffer[:]
+        self.__buffered = 0
+
+
+class StoreReader:
+    """Memory-mapped, read-only access to a store.
+
+    Close it (or use it as a context manager) only after all views handed
+    out by column() are released.
+    Attributes:
+        path (str): store file
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as file:
+            size = os.fstat(file.fileno()).st_size
+            if size < HEADER_SIZE:
+                raise ValueError("Not a plan store: {}".format(path))
+            self.__map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, skills, rows = HEADER.unpack_from(self.__map)
+        if magic != MAGIC or version != VERSION or skills != SKILLS:
+            self.__map.close()
+            raise ValueError("Not a plan store: {}".format(path))
+        self.__rows = rows
+        self.__layout = _layout(rows)
+        if size < sum(self.__layout["race"]):
+            self.__map.close()
+            raise ValueError("Truncated plan store: {}".format(path))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.__rows
+
+    def close(self):
+        self.__map.close()
+
+    def column(self, name):
+        """Return a zero-copy memoryview of a column.
+
+        Per-skill columns have the shape (rows, skills).
+        """
+        if sys.byteorder != "little":
+            raise ValueError("Use array() on big-endian machines.")
+        offset, size = self.__layout[name]
+        typecode, width = self.__column_info(name)
+        view = memoryview(self.__map)[offset:offset + size]
+        if width == 1:
+            return view.cast(typecode)
+        return view.cast(typecode, (self.__rows, width))
+
+    def array(self, name):
+        """Return a zero-copy, read-only NumPy array of a column."""
+        import numpy as np
+
+        offset, size = self.__layout[name]
+        typecode, width = self.__column_info(name)
+        dtype = np.dtype(typecode).newbyteorder("<")
+        values = np.frombuffer(self.__map, dtype=dtype,
+                               count=size // dtype.itemsize, offset=offset)
+        return values if width == 1 else values.reshape(self.__rows, width)
+
+    def row(self, i):
+        """Return plan i as (metadata dict, skill data dict)."""
+        if not 0 <= i < self.__rows:
+            raise IndexError("row index out of range")
+        values = {}
+        for name, typecode, width in COLUMNS:
+            offset = self.__layout[name][0]
+            item = struct.calcsize("<" + typecode)
+            values[name] = struct.unpack_from(
+                "<{}{}".format(width, typecode), self.__map,
+                offset + i * width * item)
+
+        race = values["race"][0]
+        id_ = values["id"][0]
+        metadata = {"id": None if id_ == NO_ID else id_,
+                    "now": values["now"][0],
+                    "goal": values["goal"][0],
+                    "strategy": calc.STRATEGIES[values["strategy"][0]],
+                    "race": None if race == -1 else GameData.RACE_NAMES[race]}
+        result = {skill: {key: values[name][j] for name, key in _RESULT_KEYS}
+                  for j, skill in enumerate(GameData.SKILL_NAMES)
+                  if values["start"][j] != -1}
+        return metadata, result
+
+    @staticmethod
+    def __column_info(name):
+        for column, typecode, width in COLUMNS:
+            if column == name:
+                return typecode, width
+        raise KeyError(name)
+
+
+if __name__ == "__main__":
+    print(__doc__, "Not meant to be used as main.")
@@ -1,5 +1,6 @@
 """Views and Window Elements."""
 
+import threading
 import tkinter as tk
 
 import widgets as w
@@ -49,14 +50,27 @@ class InputGetter(WindowContent):
 class Results(WindowContent):
     """Display calculated results.
 
-    Three tabs + option to export.
+    Three tabs + option to export. Plans calculated before (see workspace)
+    are shown right away. Otherwise, estimated plans (see estimator) are
+    shown and replaced by the exact plans, which are calculated in a
+    background thread; leaving the view cancels the calculation. The exact
+    tables are shown as soon as they are simulated, the sensitivity
+    reports and milestones follow. Then a slider changes the goal level.
+    The plans of all goals are calculated along with them (see goalsweep),
+    so moving it only looks them up.
     Attributes:
         root (Tk): container window
         collector: data object
         return_command: allows to navigate back
+        plans (workspace.Plans): optional, plans of the collector's input
+        save_command: optional, saves the input as a profile; takes a name
+            and the workspace.Plans, None until they are calculated
     """
 
-    def __init__(self, root, collector, return_command):
+    POLL_MS = 50
+
+    def __init__(self, root, collector, return_command, plans=None,
+                 save_command=None):
         WindowContent.__init__(self, root)
         import calculator as calc
 
@@ -65,55 +79,256 @@ class Results(WindowContent):
         levels = collector.get_skill_levels()
         now, goal = collector.get_char_levels()
 
-        self.__data = [calc.simulate_fast_training(levels, now, goal),
-                       calc.simulate_balanced_training(levels, now, goal),
-                       calc.simulate_easy_training(levels, now, goal)]
-        names = ["fast", "balanced", "easy"]
+        self.__data = None
+        self.__plans = None
+        self.__exact = None  # result dicts, before the rest is calculated
+        self.__exact_shown = False
+        self.__sensitivity = None
+        self.__milestones = None
+        self.__sweeps = None
+        self.__now = now
+        self.__calculated_goal = goal  # of the sensitivity reports
+        self.__goal = goal
+        self.__shown_goal = goal
+        self.__slide_job = None
+        self.__error = None
+        self.__progress = [0, 0, 0]
+        self.__token = calc.CancellationToken()
+        self.__poll_job = None
+        self.__names = ["fast", "balanced", "easy"]
+        self.__tabs = None
 
         top = tk.Frame(self, bg=w.Colors.BG)
+        self.__top = top
         w.Image(top, "tab/results").pack(pady=20)
-        button_container = tk.Frame(top, bg=top.cget("bg"))
-        button_container.pack()
-        marker_container = tk.Frame(top, bg=top.cget("bg"))
-        marker_container.pack()
+        self.__button_container = tk.Frame(top, bg=top.cget("bg"))
+        self.__button_container.pack()
+        self.__marker_container = tk.Frame(top, bg=top.cget("bg"))
+        self.__marker_container.pack()
         w.ImageButton(top, "export",
                       lambda x=None: self.__export_popup()).place(anchor="ne",
                                                                   relx=1, x=-5,
                                                                   y=5)
         top.pack(fill="x")
 
-        tab_container = tk.Frame(self, bg=self.cget("bg"))
-        tab_container.pack()
+        self.__slider_container = tk.Frame(self, bg=self.cget("bg"))
+        self.__slider_container.pack(pady=5)
+
+        self.__tab_container = tk.Frame(self, bg=self.cget("bg"))
+        self.__tab_container.pack()
 
         bottom = tk.Frame(self, bg=self.cget("bg"))
         w.ImageButton(bottom,
                       "start_over",
                       return_command).pack(side="left", padx=10, pady=11)
+        if save_command is not None:
+            self.__build_save_row(bottom, save_command)
         bottom.pack(fill="x", side="bottom")
 
-        tabs = self.__make_tabs(tab_container)
-        markers = self.__make_markers(marker_container, len(tabs))
-        buttons = self.__make_buttons(button_container, names, tabs, markers)
+        if plans is not None:
+            self.__set_plans(plans)
+            self.__show_tabs(self.__data, self.__sensitivity,
+                             self.__milestones)
+            self.__build_slider()
+            return
+
+        estimates = self.__estimate(levels, now, goal)
+        if estimates is None:
+            self.__status = w.Message(self.__tab_container, "Calculating...")
+            self.__status.pack(pady=40)
+        else:
+            self.__status = w.Message(top, "Estimated, calculating...")
+            self.__status.pack(pady=5)
+            self.__show_tabs(estimates, [None] * len(estimates),
+                             [None] * len(estimates), True)
+
+        threading.Thread(target=self.__calculate, args=(levels, now, goal),
+                         daemon=True).start()
+        self.__poll_job = self.after(self.POLL_MS, self.__poll)
+
+    def destroy(self):
+        self.__token.cancel()
+        if self.__poll_job is not None:
+            self.after_cancel(self.__poll_job)
+            self.__poll_job = None
+        if self.__slide_job is not None:
+            self.after_cancel(self.__slide_job)
+            self.__slide_job = None
+        WindowContent.destroy(self)
+
+    def __estimate(self, levels, now, goal):
+        """Return approximate plans, None if there are none."""
+        import estimator
+
+        try:
+            return [estimator.estimate(levels, now, goal, name).plan
+                    for name in self.__names]
+        except ValueError:  # the exact calculation will tell
+            return None
+
+    def __calculate(self, levels, now, goal):
+        """Run all simulations. Executed in a worker thread."""
+        import calculator as calc
+        import workspace
+
+        def progress_of(i):
+            def update(done, total):
+                self.__progress[i] = done / total if total else 1
+
+            return calc.ProgressReporter(update, every=None, interval_ms=100)
+
+        try:
+            plans = workspace.calculate(levels, now, goal, progress_of,
+                                        self.__token, self.__set_exact)
+            self.__set_plans(plans)
+        except calc.SimulationCancelled:
+            pass
+        except Exception as e:
+            self.__error = e
+
+    def __set_exact(self, data):
+        self.__exact = data
+
+    def __set_plans(self, plans):
+        self.__plans = plans
+        self.__sensitivity = plans.sensitivity
+        self.__milestones = plans.milestones
+        self.__sweeps = plans.sweeps
+        self.__data = plans.data  # set last, it tells that all are there
+
+    def __build_slider(self):
+        """Add a slider for the goal, up to the lowest highest goal."""
+        lowest = self.__now + 1
+        highest = min(sweep.highest for sweep in self.__sweeps)
+        if highest <= lowest:
+            return  # nothing to choose from
+        w.GoalSlider(self.__slider_container, lowest, highest, self.__goal,
+                     lambda goal: self.__move_goal(goal)).pack()
+
+    def __move_goal(self, goal):
+        """Show the plans for another goal, once Tk is idle again.
+
+        A fast drag moves the slider more often than the tabs can be
+        filled; only the latest goal is shown.
+        """
+        self.__goal = goal
+        if self.__slide_job is None:
+            self.__slide_job = self.after_idle(self.__show_goal)
+
+    def __show_goal(self):
+        self.__slide_job = None
+        goal = self.__goal
+        if goal == self.__shown_goal:
+            return
+        self.__shown_goal = goal
+        self.__data = [sweep.plan(goal) for sweep in self.__sweeps]
+        if goal == self.__calculated_goal:
+            changes = self.__sensitivity
+        else:  # only calculated for the original goal
+            changes = [None] * len(self.__sweeps)
+        self.__show_tabs(self.__data, changes,
+                         [sweep.milestones(goal) for sweep in self.__sweeps])
+
+    def __build_save_row(self, parent, save_command):
+        """Add an entry for a profile name and a button that saves it."""
+        name = tk.Entry(parent,
+                        bg=w.Colors.BG,
+                        borderwidth=0,
+                        fg=w.Colors.TEXT,
+                        insertbackground=w.Colors.MEDIUM,
+                        relief="flat",
+                        width=20)
+        message = w.Message(parent, "")
+
+        def save(x=None):
+            if not name.get().strip():
+                message.show_error("Enter a name first.")
+                return
+            try:
+                save_command(name.get().strip(), self.__plans)
+            except OSError as e:
+                message.show_error("Not saved: {}".format(e.strerror))
+                return
+            message.show_normal("Saved.")
+
+        w.ToggleButton(parent, "Save as profile", save).pack(side="right",
+                                                              padx=10)
+        name.pack(side="right")
+        message.pack(side="right", padx=10)
+        name.bind("<Return>", save)
+
+    def __poll(self):
+        self.__poll_job = None
+        if self.__data is not None:
+            self.__show_results()
+        elif self.__error is not None:
+            self.__status.show_error("Something went wrong.")
+        else:
+            if self.__exact is not None and not self.__exact_shown:
+                self.__show_exact()
+            elif not self.__exact_shown:
+                percent = 100 * sum(self.__progress) / len(self.__progress)
+                prefix = "Calculating" if self.__tabs is None else \
+                    "Estimated, calculating"
+                self.__status.show_normal(
+                    "{}... {:.0f}%".format(prefix, percent))
+            self.__poll_job = self.after(self.POLL_MS, self.__poll)
+
+    def __show_exact(self):
+        """Show the exact tables while the rest is calculated."""
+        self.__exact_shown = True
+        self.__status.destroy()
+        self.__status = w.Message(self.__top,
+                                  "Calculating milestones and other goals...")
+        self.__status.pack(pady=5)
+        missing = [None] * len(self.__exact)
+        self.__show_tabs(self.__exact, missing, missing)
+
+    def __show_results(self):
+        self.__status.destroy()
+        self.__show_tabs(self.__data, self.__sensitivity, self.__milestones)
+        self.__build_slider()
+
+    def __show_tabs(self, data, changes, milestones, approximate=False):
+        """Show plans, replacing the tables of existing tabs in place."""
+        if self.__tabs is not None:
+            for tab, data_set, changes_set, milestones_set in zip(
+                    self.__tabs, data, changes, milestones):
+                for child in tab.winfo_children():
+                    child.destroy()
+                self.__fill_tab(tab, data_set, changes_set, milestones_set,
+                                approximate)
+            return
+
+        self.__tabs = self.__make_tabs(self.__tab_container, data, changes,
+                                       milestones, approximate)
+        markers = self.__make_markers(self.__marker_container,
+                                      len(self.__tabs))
+        buttons = self.__make_buttons(self.__button_container, self.__names,
+                                      self.__tabs, markers)
 
         buttons[1].invoke()
 
     def __export(self):
         import inputparser as parse
+        data = self.__exact if self.__data is None else self.__data
         text = "{:=^53}\n{:=^53}\n{:=^53}\n".format("", " FAST METHOD ", "")
-        text += parse.OutputFormatter.reformat(self.__data[0])
+        text += parse.OutputFormatter.reformat(data[0])
         text += "{:-^53}\n\n\n\n".format("")
         text += "{:=^53}\n{:=^53}\n{:=^53}\n".format("", " BALANCED METHOD ",
                                                      "")
-        text += parse.OutputFormatter.reformat(self.__data[1])
+        text += parse.OutputFormatter.reformat(data[1])
         text += "{:-^53}\n\n\n\n".format("")
         text += "{:=^53}\n{:=^53}\n{:=^53}\n".format("", " EASY METHOD ", "")
-        text += parse.OutputFormatter.reformat(self.__data[2])
+        text += parse.OutputFormatter.reformat(data[2])
         text += "{:-^53}\n".format("")
         output = open('YOUR_RESULTS.txt', 'w')
         output.write(text)
         output.close()
 
     def __export_popup(self):
+        if self.__data is None and self.__exact is None:
+            return  # nothing to export yet
         frame = tk.Frame(self, bg=w.Colors.BG, height=130, width=260)
 
         text = w.Message(frame, "Do you really want to export these results?")
@@ -158,15 +373,215 @@ class Results(WindowContent):
         w.Image(parent, "tab/markers/right").pack(side="left")
         return markers
 
-    def __make_tabs(self, parent):
+    @staticmethod
+    def __make_tabs(parent, data, changes, milestones, approximate):
         tabs = []
-        for data_set in self.__data:
+        for data_set, changes_set, milestones_set in zip(data, changes,
+                                                         milestones):
             tab = tk.Frame(parent, bg=parent.cget("bg"))
-            w.ResultTable(tab, data_set).pack()
+            Results.__fill_tab(tab, data_set, changes_set, milestones_set,
+                               approximate)
             tab.grid(row=0, column=0, sticky="nsew")
             tabs.append(tab)
         return tabs
 
+    @staticmethod
+    def __fill_tab(tab, data, changes, milestones, approximate):
+        """Put a ResultTable and, for exact plans, a PerkPanel in a tab."""
+        w.ResultTable(tab, data, changes, approximate).pack(side="left",
+                                                            anchor="n")
+        if milestones is not None:
+            w.PerkPanel(tab, data, milestones).pack(side="left", anchor="n",
+                                                    padx=20)
+
+
+class Profiles(WindowContent):
+    """List the saved profiles to open or compare them.
+
+    Their plans are calculated in the background (see workspace); the list
+    shows which are ready. The active profile is marked with *.
+    Attributes:
+        root (Tk): container window
+        workspace (Workspace): saved profiles
+        controller: gui controller
+    """
+
+    POLL_MS = 200
+
+    def __init__(self, root, workspace, controller):
+        WindowContent.__init__(self, root)
+        self.config(bg=w.Colors.SHADOW)
+        self.__workspace = workspace
+        self.__controller = controller
+        self.__names = workspace.names()
+        self.__poll_job = None
+
+        w.TableEntry(self, "PROFILES", True).pack(pady=20)
+        self.__list = tk.Listbox(self,
+                                 bg=w.Colors.BG,
+                                 borderwidth=0,
+                                 fg=w.Colors.LIGHT,
+                                 font="TkFixedFont",
+                                 height=16,
+                                 highlightthickness=0,
+                                 selectbackground=w.Colors.DARKER,
+                                 selectforeground=w.Colors.TEXT,
+                                 selectmode="extended",
+                                 width=50)
+        self.__list.pack()
+        self.__list.bind("<Double-Button-1>", lambda x=None: self.__open())
+
+        self.__message = w.Message(
+            self, "Select a profile to open it, or several to compare them."
+            if self.__names else
+            "No profiles yet. Save one on the results screen.")
+        self.__message.pack(pady=10)
+
+        buttons = tk.Frame(self, bg=self.cget("bg"))
+        w.ToggleButton(buttons, "Open",
+                       lambda x=None: self.__open()).pack(side="left")
+        w.ToggleButton(buttons, "Compare",
+                       lambda x=None: self.__compare()).pack(side="left")
+        w.ToggleButton(buttons, "Delete",
+                       lambda x=None: self.__delete()).pack(side="left")
+        buttons.pack()
+
+        bottom = tk.Frame(self, bg=self.cget("bg"))
+        w.ImageButton(bottom, "start_over",
+                      lambda x=None: controller.show_start()).pack(
+            side="left", padx=10, pady=11)
+        bottom.pack(fill="x", side="bottom")
+
+        self.__refresh()
+
+    def destroy(self):
+        self.__cancel_poll()
+        WindowContent.destroy(self)
+
+    def __refresh(self):
+        self.__poll_job = None
+        selected = self.__list.curselection()
+        self.__list.delete(0, "end")
+        for name in self.__names:
+            self.__list.insert("end", "{} {:<32}{:>15}".format(
+                "*" if name == self.__workspace.active else " ", name[:32],
+                "ready" if self.__workspace.is_ready(name) else
+                "calculating..."))
+        for i in selected:
+            self.__list.selection_set(i)
+        if not all(self.__workspace.is_ready(name) for name in self.__names):
+            self.__poll_job = self.after(self.POLL_MS, self.__refresh)
+
+    def __cancel_poll(self):
+        if self.__poll_job is not None:
+            self.after_cancel(self.__poll_job)
+            self.__poll_job = None
+
+    def __selected(self):
+        return [self.__names[i] for i in self.__list.curselection()]
+
+    def __open(self):
+        names = self.__selected()
+        if len(names) != 1:
+            self.__message.show_error("Select one profile to open it.")
+            return
+        self.__controller.open_profile(names[0])
+
+    def __compare(self):
+        names = self.__selected()
+        if len(names) < 2:
+            self.__message.show_error(
+                "Select at least two profiles to compare them.")
+            return
+        self.__controller.show_comparison(names)
+
+    def __delete(self):
+        for name in self.__selected():
+            self.__workspace.remove(name)
+        self.__names = self.__workspace.names()
+        self.__list.selection_clear(0, "end")
+        self.__cancel_poll()
+        self.__refresh()
+
+
+class Comparison(WindowContent):
+    """Compare the plans of several profiles side by side.
+
+    Attributes:
+        root (Tk): container window
+        workspace (Workspace): saved profiles
+        names (list): names of the compared profiles
+        return_command: allows to navigate back
+    """
+
+    POLL_MS = 200
+
+    def __init__(self, root, workspace, names, return_command):
+        WindowContent.__init__(self, root)
+        self.config(bg=w.Colors.SHADOW)
+        self.__workspace = workspace
+        self.__names = names
+        self.__poll_job = None
+
+        w.TableEntry(self, "COMPARISON", True).pack(pady=20)
+        self.__table = tk.Frame(self, bg=self.cget("bg"))
+        self.__table.pack()
+
+        bottom = tk.Frame(self, bg=self.cget("bg"))
+        w.ImageButton(bottom, "start_over",
+                      return_command).pack(side="left", padx=10, pady=11)
+        bottom.pack(fill="x", side="bottom")
+
+        self.__refresh()
+
+    def destroy(self):
+        if self.__poll_job is not None:
+            self.after_cancel(self.__poll_job)
+            self.__poll_job = None
+        WindowContent.destroy(self)
+
+    def __refresh(self):
+        import calculator as calc
+
+        self.__poll_job = None
+        for child in self.__table.winfo_children():
+            child.destroy()
+
+        headlines = ["LEVELS", "SKILLS"]
+        for strategy in calc.STRATEGIES:
+            headlines += [strategy.upper() + " TRAIN",
+                          strategy.upper() + " LEGENDARY"]
+        for row, headline in enumerate(headlines, 1):
+            w.TableEntry(self.__table, headline, True).grid(
+                row=row, column=0, padx=10, pady=5, sticky="w")
+
+        pending = False
+        for column, name in enumerate(self.__names, 1):
+            profile = self.__workspace.get(name)
+            w.TableEntry(self.__table, name[:20], True).grid(
+                row=0, column=column, padx=10, pady=10)
+            cells = ["{} -> {}".format(profile.now, profile.goal),
+                     len(profile.skill_levels)]
+            try:
+                plans = self.__workspace.plans(name)
+            except Exception:
+                plans = None
+                cells += ["-"] * 2 * len(calc.STRATEGIES)
+            else:
+                if plans is None:
+                    pending = True
+                    cells += ["..."] * 2 * len(calc.STRATEGIES)
+                else:
+                    for skill_ups, legendary in plans.summary():
+                        cells += ["{}x".format(skill_ups),
+                                  "{}x".format(legendary)]
+            for row, cell in enumerate(cells, 1):
+                w.TableEntry(self.__table, cell).grid(row=row, column=column,
+                                                      padx=10)
+
+        if pending:
+            self.__poll_job = self.after(self.POLL_MS, self.__refresh)
+
 
 class Start(WindowContent):
     """Welcome screen.
@@ -202,6 +617,12 @@ class Start(WindowContent):
         ex_.config(bg="#141311")  # dirty fix
         ex_.place(relx=1 - rel_x, rely=rel_y, anchor="w")
 
+        profiles = w.ToggleButton(self, "Saved profiles",
+                                  lambda x=None: self.__controller
+                                  .show_profiles())
+        profiles.config(bg="#141311")
+        profiles.place(relx=0.5, rely=0.9, anchor="center")
+
 
 # View Elements
 
@@ -366,6 +787,8 @@ class InputForm(tk.Frame):
 class CharLevels(InputForm):
     """Frame where player levels (current and goal) are entered.
 
+    Once skill levels are known, the lowest level they allow is suggested
+    as current level (see charlevel).
     Attributes:
         parent (Frame): container frame
         collector: collects input data
@@ -374,6 +797,7 @@ class CharLevels(InputForm):
     def __init__(self, parent, collector):
         InputForm.__init__(self, parent)
         self.__collector = collector
+        self.__suggested = None
 
         container = tk.Frame(self, bg=self.cget("bg"))
         container.pack(expand=True)
@@ -391,6 +815,7 @@ class CharLevels(InputForm):
         from inputparser import ValidationException
         self.update()
         try:
+            self.__check_current_level()
             self.__collector.set_char_levels(
                 now=self.__current_level.get_input(),
                 goal=self.__goal_level.get_input())
@@ -404,12 +829,32 @@ class CharLevels(InputForm):
     def update(self):
         self.__current_level.mark_valid()
         self.__goal_level.mark_valid()
+        self.__suggest_current_level()
+
+    def __suggest_current_level(self):
+        """Fill in the lowest possible level, unless the user changed it."""
+        minimum = self.__collector.get_minimum_level()
+        entered = self.__current_level.get_input()
+        if minimum is not None and entered in ("", self.__suggested):
+            self.__suggested = str(minimum)
+            self.__current_level.set_input(self.__suggested)
+
+    def __check_current_level(self):
+        """Reject levels below the one the skill levels need."""
+        from inputparser import InputValidator, ValidationException
+        minimum = self.__collector.get_minimum_level()
+        now = self.__current_level.get_input()
+        if minimum is not None and InputValidator.is_valid_char_level(now) \
+                and int(now) < minimum:
+            raise ValidationException(
+                "Your skill levels need character level {} or higher."
+                .format(minimum), ["Now"])
 
     def __show_problems(self, problems):
-        for problem in problems:
-            if problem == "goal":
+        for problem in problems or ():
+            if problem.lower() == "goal":
                 self.__goal_level.mark_invalid()
-            elif problem == "now":
+            elif problem.lower() == "now":
                 self.__current_level.mark_invalid()
 
 
@@ -718,12 +1163,14 @@ class Skills(InputForm):
                 skill.select()
 
     def __select_template_skills(self):
+        from inputparser import GameData
+
         self.__deselect_all()
         selection = self.__collector.get_template()
 
-        for button in self.__skills:
-            if button.get_label() in selection:
-                button.select()
+        # buttons are built in GameData.SKILL_NAMES order, i.e. by skill id
+        for skill in selection:
+            self.__skills[GameData.SKILL_IDS[skill]].select()
 
     def __set_template(self, template):
         self.__collector.set_template(template)
@@ -816,16 +1263,17 @@ class Sorter:
 class Recipe:
     """Contain data about possible 'View Paths'."""
     EXISTING_CHAR = (
-        {"View": CharLevels,
-         "Title": "LEVELS",
-         "Instruction": "Enter the level of your character and the level "
-                        "you would like to reach."},
         {"View": Skills,
          "Title": "SKILLS",
          "Instruction": "Pick some skills you would like to train."},
         {"View": SkillLevels,
          "Title": "SKILL_LEVELS",
-         "Instruction": "Enter your current skill levels below."}
+         "Instruction": "Enter your current skill levels below."},
+        {"View": CharLevels,
+         "Title": "LEVELS",
+         "Instruction": "Enter the level of your character (at least the "
+                        "one suggested) and the level you would like to "
+                        "reach."}
     )
 
     NEW_CHAR = (
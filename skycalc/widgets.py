@@ -319,6 +319,10 @@ class BigField(tk.Frame):
     def get_input(self):
         return self.__entry.get()
 
+    def set_input(self, text_):
+        self.__entry.delete(0, "end")
+        self.__entry.insert(0, text_)
+
     def mark_invalid(self):
         self.__background_label.config(image=self.__error_bg)
         self.__entry.config(insertbackground=Colors.ERROR)
@@ -422,15 +426,23 @@ class ResultTable(tk.Frame):
     Attributes:
         parent (tk.Frame): container
         data (dict): displayed result data
+        sensitivity (dict): optional report returned by sensitivity.analyze,
+            shown as change in skill-ups if a skill started one level
+            higher / lower
+        approximate (boolean): data is an estimate, numbers are marked "~"
     """
 
-    def __init__(self, parent, data):
+    def __init__(self, parent, data, sensitivity=None, approximate=False):
         tk.Frame.__init__(self, parent, bg=parent.cget("bg"))
+        mark = "~" if approximate else ""
 
         headlines = ["SKILL", "CURRENT", "GOAL", "TRAIN", "LEGENDARY"]
         for i in range(len(headlines)):
             Image(self, "headlines/" + headlines[i]).grid(row=0, column=i,
                                                           pady=15)
+        if sensitivity is not None:
+            TableEntry(self, "IF +1 / -1", True).grid(row=0, column=5,
+                                                      padx=10, pady=15)
 
         sorted_relevant_skills = sorted(skill for skill in data.keys() if
                                         data[skill]["Times Leveled"] != 0)
@@ -440,11 +452,97 @@ class ResultTable(tk.Frame):
             entry = data[skill]
             TableEntry(self, skill, True).grid(row=i + 1, column=0, pady=7)
             TableEntry(self, entry["Start Level"]).grid(row=i + 1, column=1)
-            TableEntry(self, entry["Final Level"]).grid(row=i + 1, column=2)
-            TableEntry(self, str(entry["Times Leveled"]) + "x", True).grid(
-                row=i + 1, column=3)
-            TableEntry(self, str(entry["Times Legendary"]) + "x").grid(
+            TableEntry(self, mark + str(entry["Final Level"])).grid(
+                row=i + 1, column=2)
+            TableEntry(self, mark + str(entry["Times Leveled"]) + "x",
+                       True).grid(row=i + 1, column=3)
+            TableEntry(self, mark + str(entry["Times Legendary"]) + "x").grid(
                 row=i + 1, column=4)
+            if sensitivity is not None:
+                change = self.__format_change(sensitivity[skill])
+                TableEntry(self, change).grid(row=i + 1, column=5)
+
+    @staticmethod
+    def __format_change(changes):
+        """Return skill-up differences for +1 and -1 as text."""
+        texts = []
+        for delta in (1, -1):
+            change = changes[delta]
+            texts.append("-" if change is None else
+                         "{:+d}".format(change["Skill-ups"]))
+        return " / ".join(texts)
+
+
+class PerkPanel(tk.Frame):
+    """List the perks a plan unlocks; plan selected perks (see perks).
+
+    Every line shows the character level a perk becomes unlockable at.
+    Selected perks, and the perks they require, also show the level they
+    can be taken at with one perk point per level-up.
+    Attributes:
+        parent (tk.Frame): container
+        data (dict): displayed result data
+        milestones (perks.Milestones): skill levels of the same plan
+    """
+
+    LINE = "{:<36}{:>6}{:>6}"
+
+    def __init__(self, parent, data, milestones):
+        import perks
+        tk.Frame.__init__(self, parent, bg=parent.cget("bg"))
+        self.__index = perks.get_default_index()
+        self.__milestones = milestones
+
+        self.__perks = []
+        for skill in sorted(skill for skill in data if
+                            data[skill]["Times Leveled"] != 0):
+            self.__perks.extend(self.__index.between(
+                skill, data[skill]["Start Level"],
+                milestones.reached(skill, milestones.goal)))
+
+        TableEntry(self, "PERKS", True).pack(pady=15)
+        container = tk.Frame(self, bg=self.cget("bg"))
+        container.pack()
+        self.__list = tk.Listbox(container,
+                                 bg=Colors.SHADOW,
+                                 borderwidth=0,
+                                 fg=Colors.LIGHT,
+                                 font="TkFixedFont",
+                                 height=14,
+                                 highlightthickness=0,
+                                 selectbackground=Colors.DARKER,
+                                 selectforeground=Colors.TEXT,
+                                 selectmode="multiple",
+                                 width=48)
+        scrollbar = tk.Scrollbar(container, command=self.__list.yview)
+        self.__list.config(yscrollcommand=scrollbar.set)
+        self.__list.pack(side="left")
+        scrollbar.pack(side="left", fill="y")
+        self.__list.bind("<<ListboxSelect>>", lambda x=None: self.__plan())
+        TableEntry(self, "level: unlockable / taken").pack(pady=5)
+
+        self.__plan()
+
+    def __plan(self):
+        import perks
+        selected = self.__list.curselection()
+        chosen = [(self.__perks[i].skill, self.__perks[i].name)
+                  for i in selected]
+        taken = perks.earliest_levels(self.__index, self.__milestones,
+                                      chosen)
+        unlockable = perks.unlockable_levels(self.__index,
+                                             self.__milestones, self.__perks)
+
+        self.__list.delete(0, "end")
+        for perk in self.__perks:
+            key = (perk.skill, perk.name)
+            level = taken.get(key, (None, None))[1]
+            self.__list.insert("end", self.LINE.format(
+                "{}: {}".format(perk.skill, perk.name)[:35],
+                "-" if unlockable[key] is None else unlockable[key],
+                "" if level is None else level))
+        for i in selected:
+            self.__list.selection_set(i)
 
 
 class TabMarker(tk.Label):
@@ -474,6 +572,39 @@ class TabMarker(tk.Label):
         self.config(image=self.__selected)
 
 
+class GoalSlider(tk.Scale):
+    """Horizontal slider for a goal level.
+
+    Calls its command with the new level (int) whenever it moves.
+    Attributes:
+        parent (Frame): container frame
+        lowest (int): lowest goal level
+        highest (int): highest goal level
+        goal (int): initial goal level
+        command_: function taking a goal level
+    """
+
+    def __init__(self, parent, lowest, highest, goal, command_):
+        tk.Scale.__init__(self, parent,
+                          activebackground=Colors.LIGHT,
+                          bg=Colors.MEDIUM,
+                          borderwidth=0,
+                          cursor="hand2",
+                          fg=Colors.TEXT,
+                          font="-size 10",
+                          from_=lowest,
+                          highlightthickness=0,
+                          label="GOAL LEVEL",
+                          length=400,
+                          orient="horizontal",
+                          sliderrelief="flat",
+                          to=highest,
+                          troughcolor=Colors.DARKER
+                          )
+        self.set(goal)
+        self.config(command=lambda value: command_(int(float(value))))
+
+
 # other
 
 class Colors:
@@ -0,0 +1,214 @@
+"""Named character profiles, calculated in the background.
+
+A Workspace keeps several characters as batch Profiles under a name. They
+are saved as JSON Lines in the batch format (the name is the "id"), so a
+saved workspace can also be run with `python -m skycalc batch`. Whenever a
+profile is added or changed, its Plans are calculated in a thread pool, so
+the GUI stays responsive. Plans are cached by input: switching to a
+profile, or back to an unchanged one, doesn't calculate anything.
+"""
+
+import collections
+import concurrent.futures
+import json
+import os
+
+import batch
+import calculator as calc
+import goalsweep
+import plantable
+import sensitivity
+from inputparser import ValidationException
+
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".skycalc",
+                            "profiles.jsonl")
+
+
+class Plans:
+    """Everything the results view shows, per strategy (calc.STRATEGIES).
+
+    Attributes:
+        data (list): result dicts
+        sensitivity (list): sensitivity.analyze reports
+        milestones (list): perks.Milestones
+        sweeps (list): goalsweep.GoalSweeps, plans for other goals
+    """
+
+    def __init__(self, data, sensitivity, milestones, sweeps):
+        self.data = data
+        self.sensitivity = sensitivity
+        self.milestones = milestones
+        self.sweeps = sweeps
+
+    def summary(self):
+        """Return (skill-ups, times legendary) of every strategy."""
+        return [(sum(entry["Times Leveled"] for entry in data.values()),
+                 sum(entry["Times Legendary"] for entry in data.values()))
+                for data in self.data]
+
+
+def calculate(skill_levels, now, goal, progress_of=None, cancel_token=None,
+              exact=None):
+    """Return the Plans of a character.
+
+    The simulations are fast; the sensitivity reports and goal sweeps take
+    most of the time, so the plans can be shown before they are done.
+    Attributes:
+        skill_levels (dict): current levels of the trained skills
+        now (int): current character level
+        goal (int): goal level
+        progress_of: optional callable(i) returning the progress reporter
+            of the i-th strategy (of the simulations)
+        cancel_token: optional CancellationToken
+        exact: optional callable, receives the result dicts (Plans.data)
+            as soon as they are simulated
+    """
+    data = [plantable.simulate_strategy(
+        skill_levels, now, goal, name,
+        progress=None if progress_of is None else progress_of(i),
+        cancel_token=cancel_token)
+        for i, name in enumerate(calc.STRATEGIES)]
+    if exact is not None:
+        exact(data)
+    changes = [sensitivity.analyze(skill_levels, now, goal, name,
+                                   cancel_token=cancel_token)
+               for name in calc.STRATEGIES]
+    sweeps = [goalsweep.GoalSweep(skill_levels, now, name,
+                                  cancel_token=cancel_token)
+              for name in calc.STRATEGIES]
+    milestones = [sweep.milestones(goal) for sweep in sweeps]
+    return Plans(data, changes, milestones, sweeps)
+
+
+class Workspace:
+    """Named profiles and their plans.
+
+    Meant to be used from a single thread (the GUI's); only the plans are
+    calculated in worker threads. Changes are saved right away.
+    Attributes:
+        path (str): JSON Lines file of the profiles, None to not save them
+        workers (int): profiles calculated at the same time
+    """
+
+    def __init__(self, path=DEFAULT_PATH, workers=2):
+        self.path = path
+        self.active = None
+        self.__profiles = collections.OrderedDict()
+        self.__futures = {}  # input key -> Future of Plans
+        self.__tokens = {}  # input key -> CancellationToken
+        self.__executor = concurrent.futures.ThreadPoolExecutor(workers)
+
+    def names(self):
+        return list(self.__profiles)
+
+    def get(self, name):
+        return self.__profiles[name]
+
+    def put(self, name, profile, plans=None):
+        """Add or change a profile and calculate its plans if needed.
+
+        plans are the profile's Plans if they were calculated already.
+        """
+        self.__add(name, profile, plans)
+        self.active = name
+        self.__forget_unused()
+        self.save()
+
+    def remove(self, name):
+        del self.__profiles[name]
+        if self.active == name:
+            self.active = None
+        self.__forget_unused()
+        self.save()
+
+    def switch(self, name):
+        """Make a profile the active one and return it."""
+        profile = self.__profiles[name]
+        self.active = name
+        return profile
+
+    def plans(self, name):
+        return self.plans_of(self.__profiles[name])
+
+    def plans_of(self, profile):
+        """Return the Plans of a profile, None until they are calculated.
+
+        Raises the exception of a failed calculation.
+        """
+        future = self.__futures.get(_key(profile))
+        if future is None or not future.done():
+            return None
+        return future.result()
+
+    def is_ready(self, name):
+        future = self.__futures.get(_key(self.__profiles[name]))
+        return future is not None and future.done()
+
+    def load(self):
+        """Add the profiles saved at path, return the number of bad lines."""
+        if self.path is None or not os.path.exists(self.path):
+            return 0
+        bad = 0
+        with open(self.path, encoding="utf-8") as file:
+            for line in file:
+                if not line.strip():
+                    continue
+                try:
+                    data = json.loads(line)
+                    self.__add(str(data["id"]), batch.parse_profile(data))
+                except (ValueError, KeyError, TypeError,
+                        ValidationException):
+                    bad += 1
+        return bad
+
+    def save(self):
+        if self.path is None:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temporary = self.path + ".tmp"
+        with open(temporary, "w", encoding="utf-8") as file:
+            for name, profile in self.__profiles.items():
+                file.write(json.dumps({"id": name,
+                                       "skill_levels": profile.skill_levels,
+                                       "now": profile.now,
+                                       "goal": profile.goal}) + "\n")
+        os.replace(temporary, self.path)
+
+    def close(self):
+        """Stop all calculations."""
+        for key, token in self.__tokens.items():
+            token.cancel()
+            self.__futures[key].cancel()
+        self.__executor.shutdown(wait=False)
+
+    def __add(self, name, profile, plans=None):
+        self.__profiles[name] = profile
+        key = _key(profile)
+        if key not in self.__futures and plans is not None:
+            self.__futures[key] = concurrent.futures.Future()
+            self.__futures[key].set_result(plans)
+        elif key not in self.__futures:
+            token = calc.CancellationToken()
+            self.__tokens[key] = token
+            self.__futures[key] = self.__executor.submit(
+                calculate, profile.skill_levels, profile.now, profile.goal,
+                cancel_token=token)
+
+    def __forget_unused(self):
+        """Drop plans no profile has anymore, cancel their calculation."""
+        used = {_key(profile) for profile in self.__profiles.values()}
+        for key in [key for key in self.__futures if key not in used]:
+            if key in self.__tokens:
+                self.__tokens.pop(key).cancel()
+            del self.__futures[key]
+
+
+def _key(profile):
+    # keeps the skill order: ties go to the skill that comes first
+    return (tuple(profile.skill_levels.items()), profile.now, profile.goal)
+
+
+if __name__ == "__main__":
+    print(__doc__, "Not meant to be used as main.")
@@ -0,0 +1,46 @@
+import asyncio
+
+import batch
+import calculator as calc
+from calculator import aio
+
+PROFILES = [batch.Profile({"Block": 15 + i, "Sneak": 20}, 1, 10 + i)
+            for i in range(12)]
+
+
+def expected(profile):
+    return {strategy: calc.simulate_strategy(profile.skill_levels,
+                                             profile.now, profile.goal,
+                                             strategy)
+            for strategy in calc.STRATEGIES}
+
+
+def test_runner_outlives_event_loops():
+    runner = aio.Runner(max_concurrency=2)  # no loop is running yet
+
+    async def collect():
+        return [item async for item in runner.as_completed(PROFILES)]
+
+    for _ in range(2):
+        results = asyncio.run(collect())
+        assert sorted(index for index, _, _ in results) == \
+            list(range(len(PROFILES)))
+        for index, profile, plans in results:
+            assert profile is PROFILES[index]
+            assert plans == expected(profile)
+
+
+def test_stopping_cancels_pending():
+    async def first():
+        runner = aio.Runner(max_concurrency=3)
+        results = runner.as_completed(PROFILES)
+        async for item in results:
+            break
+        await results.aclose()
+        await asyncio.sleep(0)  # let the cancellations run
+        tasks = asyncio.all_tasks() - {asyncio.current_task()}
+        return item, tasks
+
+    (index, profile, plans), tasks = asyncio.run(first())
+    assert plans == expected(profile)
+    assert all(task.done() for task in tasks)
@@ -0,0 +1,98 @@
+import random
+
+import pytest
+
+import calculator as calc
+
+SKILLS = ("Alchemy", "Archery", "Block", "Destruction", "Smithing", "Sneak")
+SETTINGS = {
+    "vanilla": calc.DEFAULT_SETTINGS,
+    "no legendary": calc.GameSettings(legendary=False),
+    "cap 150": calc.GameSettings(skill_cap=150, legendary_level=20),
+    "cap 150, no legendary": calc.GameSettings(skill_cap=150,
+                                               legendary=False),
+}
+
+
+def reference(skill_levels, now, goal, strategy, settings):
+    """Train one skill at a time, choosing like the original selectors."""
+    cap = settings.skill_cap
+    skills = list(skill_levels)
+    levels = dict(skill_levels)
+    times = dict.fromkeys(skills, 0)
+    legendary = dict.fromkeys(skills, 0)
+    needed = sum(settings.level_up_base + settings.level_up_mult * level
+                 for level in range(now, goal))
+    while needed > 0:
+        candidates = [s for s in skills
+                      if settings.legendary or levels[s] < cap]
+        if not candidates:
+            raise ValueError("unreachable")
+        if strategy == "fast":
+            skill = max(candidates, key=levels.get)
+        elif strategy == "easy":
+            skill = min(candidates, key=levels.get)
+        else:
+            skill = min(candidates, key=times.get)
+        if levels[skill] >= cap:
+            levels[skill] = settings.legendary_level + 1
+            legendary[skill] += 1
+        else:
+            levels[skill] += 1
+        times[skill] += 1
+        needed -= levels[skill]
+    return {s: {"Start Level": skill_levels[s],
+                "Times Leveled": times[s],
+                "Times Legendary": legendary[s],
+                "Final Level": levels[s]} for s in skills}
+
+
+def profiles(settings, count=40, seed=0):
+    rng = random.Random(seed)
+    for _ in range(count):
+        skills = rng.sample(SKILLS, rng.randint(1, len(SKILLS)))
+        # ties are common in real inputs, so draw from few levels
+        pool = [rng.randint(15, settings.skill_cap) for _ in range(3)]
+        now = rng.randint(1, 40)
+        # short plans stay reachable without legendary skills
+        yield ({skill: rng.choice(pool) for skill in skills}, now,
+               now + rng.choice((rng.randint(1, 8), rng.randint(1, 60))))
+
+
+@pytest.mark.parametrize("strategy", calc.STRATEGIES)
+@pytest.mark.parametrize("name", sorted(SETTINGS))
+@pytest.mark.parametrize("engine", ["loop", "class", None])
+def test_matches_reference(strategy, name, engine):
+    settings = SETTINGS[name]
+    for skill_levels, now, goal in profiles(settings):
+        try:
+            expected = reference(skill_levels, now, goal, strategy, settings)
+        except ValueError:
+            with pytest.raises(ValueError):
+                calc.simulate_strategy(skill_levels, now, goal, strategy,
+                                       settings=settings, engine=engine)
+            continue
+        assert calc.simulate_strategy(skill_levels, now, goal, strategy,
+                                      settings=settings,
+                                      engine=engine) == expected
+
+
+@pytest.mark.parametrize("strategy", calc.STRATEGIES)
+@pytest.mark.parametrize("engine", ["loop", "class"])
+def test_unreachable_goal(strategy, engine):
+    settings = calc.GameSettings(legendary=False)
+    with pytest.raises(ValueError):
+        calc.simulate_strategy({"Block": 99, "Sneak": 100}, 1, 30, strategy,
+                               settings=settings, engine=engine)
+
+
+def test_incremental_advance_matches_single_run():
+    tables = calc.get_tables()
+    for strategy in calc.STRATEGIES:
+        engine = calc.ClassEngine({"Block": 20, "Sneak": 20, "Archery": 50},
+                                  strategy)
+        for level in range(5, 80):
+            engine.advance(tables.total_xp(level, level + 1))
+            assert engine.result() == reference(
+                {"Block": 20, "Sneak": 20, "Archery": 50}, 5, level + 1,
+                strategy, calc.DEFAULT_SETTINGS)
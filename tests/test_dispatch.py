@@ -0,0 +1,83 @@
+import random
+import sys
+
+import pytest
+
+import calculator as calc
+from calculator import dispatch
+from inputparser import GameData
+
+SETTINGS = {
+    "vanilla": calc.DEFAULT_SETTINGS,
+    "no legendary": calc.GameSettings(legendary=False),
+    "cap 150": calc.GameSettings(skill_cap=150, legendary_level=20),
+}
+
+
+def batch(settings, count=60, seed=1):
+    rng = random.Random(seed)
+    skill_levels_list, currents, goals = [], [], []
+    for _ in range(count):
+        skills = rng.sample(GameData.SKILL_NAMES, rng.randint(1, 8))
+        pool = [rng.randint(15, settings.skill_cap) for _ in range(4)]
+        skill_levels_list.append({skill: rng.choice(pool)
+                                  for skill in skills})
+        currents.append(rng.randint(1, 30))
+        goals.append(currents[-1] + rng.choice((rng.randint(1, 6),
+                                                rng.randint(1, 40))))
+    return skill_levels_list, currents, goals
+
+
+def scalar(skill_levels_list, currents, goals, strategy, settings):
+    outcomes = []
+    for skill_levels, current, goal in zip(skill_levels_list, currents,
+                                           goals):
+        try:
+            outcomes.append(calc.simulate_strategy(
+                skill_levels, current, goal, strategy, settings=settings,
+                engine="class"))
+        except ValueError:
+            outcomes.append(ValueError)
+    return outcomes
+
+
+def normalized(outcomes):
+    return [ValueError if isinstance(outcome, ValueError) else outcome
+            for outcome in outcomes]
+
+
+@pytest.mark.parametrize("strategy", calc.STRATEGIES)
+@pytest.mark.parametrize("name", sorted(SETTINGS))
+def test_vectorized_matches_scalar(strategy, name):
+    settings = SETTINGS[name]
+    profiles = batch(settings)
+    assert normalized(dispatch.simulate_vectorized(
+        *profiles, strategy, settings)) == \
+        scalar(*profiles, strategy, settings)
+
+
+@pytest.fixture
+def cheap_vectorized():
+    """Make the cost models send whole batches to the vectorized engine."""
+    costs = dispatch.get_costs()
+    dispatch.set_costs({strategy: dict(models, vectorized=[0, 0, 0])
+                        for strategy, models in costs.items()})
+    yield
+    dispatch.set_costs(costs)
+
+
+@pytest.mark.parametrize("numpy", [True, False])
+@pytest.mark.parametrize("strategy", calc.STRATEGIES)
+@pytest.mark.parametrize("name", sorted(SETTINGS))
+def test_simulate_many_matches_scalar(cheap_vectorized, monkeypatch, numpy,
+                                      strategy, name):
+    if not numpy:
+        monkeypatch.setitem(sys.modules, "numpy", None)  # import fails
+    settings = SETTINGS[name]
+    profiles = batch(settings)
+    assert dispatch.numpy_available() == numpy
+    assert bool(dispatch._vectorized_share(*profiles, strategy,
+                                           settings)) == numpy
+    assert normalized(dispatch.simulate_many(*profiles, strategy,
+                                             settings)) == \
+        scalar(*profiles, strategy, settings)
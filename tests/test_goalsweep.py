@@ -0,0 +1,34 @@
+import pytest
+
+import calculator as calc
+import goalsweep
+
+SKILL_LEVELS = {"Block": 90, "Sneak": 20, "Archery": 55}
+
+
+@pytest.mark.parametrize("strategy", calc.STRATEGIES)
+def test_plans_and_milestones(strategy):
+    sweep = goalsweep.GoalSweep(SKILL_LEVELS, 3, strategy, highest=60)
+    assert sweep.highest == 60
+    milestones = sweep.milestones(60)
+    reached = dict(SKILL_LEVELS)
+    for goal in range(4, 61):
+        plan = calc.simulate_strategy(SKILL_LEVELS, 3, goal, strategy)
+        assert sweep.plan(goal) == plan
+        for skill, entry in plan.items():
+            level = 100 if entry["Times Legendary"] else entry["Final Level"]
+            reached[skill] = max(reached[skill], level)
+            assert milestones.reached(skill, goal) == reached[skill]
+            assert milestones.level_reached(skill, reached[skill]) <= goal
+    assert sweep.milestones(30).goal == 30
+    with pytest.raises(ValueError):
+        sweep.plan(61)
+
+
+def test_highest_reachable_goal():
+    settings = calc.GameSettings(legendary=False)
+    sweep = goalsweep.GoalSweep({"Block": 99}, 1, "fast", settings=settings)
+    assert sweep.highest == 2  # training Block to 100 is just enough
+    assert sweep.milestones(2).reached("Block", 2) == 100
+    with pytest.raises(ValueError):
+        sweep.milestones(3)
@@ -0,0 +1,54 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import calculator as calc  # noqa: E402
+import montecarlo  # noqa: E402
+
+PROFILES = [({"Block": 15, "Sneak": 20, "Archery": 25, "One-handed": 15,
+              "Heavy Armor": 20, "Smithing": 15}, 1, 50),
+            ({"Block": 15, "Sneak": 15}, 1, 20),
+            ({"Alchemy": 40, "Destruction": 60, "Conjuration": 30}, 10, 45)]
+
+
+def skill_ups(skill_levels, now, goal, strategy):
+    plan = calc.simulate_strategy(skill_levels, now, goal, strategy)
+    return sum(entry["Times Leveled"] for entry in plan.values())
+
+
+@pytest.mark.parametrize("skill_levels, now, goal", PROFILES)
+def test_mean_near_exact_plans(skill_levels, now, goal):
+    results = montecarlo.simulate_sessions(skill_levels, now, goal,
+                                           trials=2000, seed=3, processes=1)
+    mean = results.summary()["Skill-ups"]["Mean"]
+    exact = [skill_ups(skill_levels, now, goal, strategy)
+             for strategy in calc.STRATEGIES]
+    # random skill use lands between the strategies' orders
+    assert 0.97 * min(exact) <= mean <= 1.03 * max(exact)
+    assert len(results) == 2000
+    assert (results.hours > 0).all()
+
+
+def test_single_skill_is_exact():
+    results = montecarlo.simulate_sessions({"Smithing": 15}, 1, 30,
+                                           trials=100, seed=0, processes=1)
+    assert set(results.skill_ups) == {skill_ups({"Smithing": 15}, 1, 30,
+                                                "fast")}
+
+
+def test_results_only_depend_on_seed(monkeypatch):
+    monkeypatch.setattr(montecarlo, "CHUNK_TRIALS", 300)
+    skill_levels, now, goal = PROFILES[1]
+    runs = [montecarlo.simulate_sessions(skill_levels, now, goal,
+                                         trials=1000, seed=7,
+                                         processes=processes)
+            for processes in (1, 2)]
+    for name in ("skill_ups", "skill_xp", "hours"):
+        assert np.array_equal(getattr(runs[0], name), getattr(runs[1], name))
+
+
+def test_unreachable_goal():
+    settings = calc.GameSettings(legendary=False)
+    with pytest.raises(ValueError):
+        montecarlo.simulate_sessions({"Block": 99}, 1, 30, trials=10,
+                                     seed=0, processes=1, settings=settings)
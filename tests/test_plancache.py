@@ -0,0 +1,78 @@
+import os
+import sqlite3
+import threading
+
+import calculator as calc
+import plancache
+
+SKILL_LEVELS = {"Block": 15, "Sneak": 20}
+
+
+def used(path):
+    with sqlite3.connect(path) as connection:
+        return dict(connection.execute("SELECT key, used FROM plans"))
+
+
+def put(cache, goal):
+    result = calc.simulate_strategy(SKILL_LEVELS, 1, goal, "fast")
+    cache.put(SKILL_LEVELS, 1, goal, "fast", result)
+    return result
+
+
+def test_hits_write_recency_in_batches(tmp_path, monkeypatch):
+    monkeypatch.setattr(plancache, "WRITE_USED_EVERY", 3)
+    path = str(tmp_path / "plans.db")
+    with plancache.PlanCache(path) as cache:
+        results = [put(cache, goal) for goal in range(10, 13)]
+        stored = used(path)
+        for goal, result in zip(range(10, 12), results):
+            assert cache.get(SKILL_LEVELS, 1, goal, "fast") == result
+        assert used(path) == stored  # reads don't write
+        assert cache.get(SKILL_LEVELS, 1, 12, "fast") == results[2]
+        assert all(stamp > stored[key] for key, stamp in used(path).items())
+
+        stored = used(path)
+        cache.get(SKILL_LEVELS, 1, 10, "fast")
+        assert used(path) == stored
+    # written on close
+    key = plancache.make_key(SKILL_LEVELS, 1, 10, "fast")
+    assert used(path)[key] > stored[key]
+
+
+def test_eviction_sees_pending_hits(tmp_path):
+    path = str(tmp_path / "plans.db")
+    cache = plancache.PlanCache(path, max_entries=2)
+    try:
+        for goal in range(10, 13):
+            put(cache, goal)
+        cache.get(SKILL_LEVELS, 1, 10, "fast")  # now the most recent
+        cache.evict()
+        assert len(cache) == 2
+        assert cache.get(SKILL_LEVELS, 1, 10, "fast") is not None
+        assert cache.get(SKILL_LEVELS, 1, 11, "fast") is None
+    finally:
+        cache.close()
+
+
+def test_close_closes_every_thread(tmp_path):
+    path = str(tmp_path / "plans.db")
+    cache = plancache.PlanCache(path)
+    result = put(cache, 10)
+    hits = []
+    threads = [threading.Thread(target=lambda: hits.append(
+        cache.get(SKILL_LEVELS, 1, 10, "fast"))) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert hits == [result] * 3
+
+    def opened():
+        return [connection for connection in plancache._opened[os.getpid()]
+                if connection.path == path]
+
+    assert len(opened()) == 4
+    cache.close()
+    assert opened() == []
+    assert cache.get(SKILL_LEVELS, 1, 10, "fast") == result  # reconnects
+    cache.close()
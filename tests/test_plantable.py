@@ -0,0 +1,62 @@
+import pytest
+
+import calculator as calc
+import plantable
+from inputparser import GameData
+
+ORDERS = [("Block", "One-handed", "Heavy Armor", "Smithing"),
+          ("Smithing", "Heavy Armor", "Block", "One-handed"),
+          ("Sneak",)]
+
+
+@pytest.fixture(scope="module")
+def table(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("plans") / "plans.bin")
+    plantable.build(path, orders=ORDERS)
+    return plantable.PlanTable(path)
+
+
+def defaults(race, skills):
+    levels = GameData.START_LEVELS[GameData.RACE_IDS[race]]
+    return {skill: levels[GameData.SKILL_IDS[skill]] for skill in skills}
+
+
+@pytest.mark.parametrize("strategy", calc.STRATEGIES)
+@pytest.mark.parametrize("race", ["Nord", "Breton", "Khajiit"])
+def test_lookup_matches_calculator(table, race, strategy):
+    for skills in ORDERS:
+        skill_levels = defaults(race, skills)
+        for goal in list(range(2, 60)) + [81, 150, plantable.MAX_GOAL]:
+            expected = calc.simulate_strategy(skill_levels, 1, goal,
+                                              strategy)
+            assert table.lookup(skill_levels, 1, goal, strategy) == expected
+            assert table.lookup(skill_levels, 1, goal, strategy,
+                                race) == expected
+
+
+def test_lookup_misses(table):
+    skill_levels = defaults("Nord", ORDERS[0])
+    assert table.lookup(skill_levels, 2, 30, "fast") is None
+    assert table.lookup(skill_levels, 1, plantable.MAX_GOAL + 1,
+                        "fast") is None
+    assert table.lookup(dict(skill_levels, Block=99), 1, 30, "fast") is None
+    assert table.lookup(defaults("Nord", ("Archery",)), 1, 30,
+                        "fast") is None
+    modded = calc.GameSettings(skill_cap=150)
+    assert table.lookup(skill_levels, 1, 30, "fast",
+                        settings=modded) is None
+
+
+def test_exported_blocks(table):
+    checksum, blocks = table.export()
+    shared = plantable.PlanTable.from_blocks(blocks, checksum)
+    skill_levels = defaults("Orc", ORDERS[1])
+    for goal in (2, 40, 200):
+        assert shared.lookup(skill_levels, 1, goal, "easy") == \
+            table.lookup(skill_levels, 1, goal, "easy")
+
+
+def test_missing_file(tmp_path):
+    table = plantable.PlanTable(str(tmp_path / "missing.bin"))
+    assert not table.is_available()
+    assert table.lookup({"Sneak": 15}, 1, 10, "fast") is None
@@ -0,0 +1,110 @@
+import random
+import statistics
+
+import pytest
+
+import batch
+import parallel
+import reducers
+
+
+def assert_close(expected, actual):
+    """Compare nested summaries, floats up to rounding."""
+    if isinstance(expected, dict):
+        assert expected.keys() == actual.keys()
+        for key in expected:
+            assert_close(expected[key], actual[key])
+    elif isinstance(expected, list):
+        assert len(expected) == len(actual)
+        for a, b in zip(expected, actual):
+            assert_close(a, b)
+    elif isinstance(expected, float):
+        assert actual == pytest.approx(expected)
+    else:
+        assert expected == actual
+
+
+def values(count=5000, seed=2):
+    rng = random.Random(seed)
+    return [rng.randint(0, 4000) for _ in range(count)]
+
+
+def split(items, parts=3):
+    return [items[i::parts] for i in range(parts)]
+
+
+def test_moments_merge():
+    data = values()
+    single = reducers.Moments()
+    for value in data:
+        single.add(value)
+    merged = reducers.Moments()
+    for part in split(data):
+        moments = reducers.Moments()
+        for value in part:
+            moments.add(value)
+        merged.merge(moments)
+    assert_close(single.summary(), merged.summary())
+    assert single.mean == pytest.approx(statistics.mean(data))
+    assert single.summary()["Std"] == pytest.approx(statistics.pstdev(data))
+
+
+def test_quantiles_within_error():
+    data = values()
+    sketch = reducers.QuantileSketch(relative_error=0.01)
+    for value in data:
+        sketch.add(value)
+    ordered = sorted(data)
+    for q in (0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99):
+        exact = ordered[int(q * (len(data) - 1))]
+        assert sketch.quantile(q) == pytest.approx(exact, rel=0.01, abs=1e-9)
+
+
+def test_quantiles_merge():
+    data = values()
+    single = reducers.QuantileSketch()
+    for value in data:
+        single.add(value)
+    merged = reducers.QuantileSketch()
+    for part in split(data):
+        sketch = reducers.QuantileSketch()
+        for value in part:
+            sketch.add(value)
+        merged.merge(sketch)
+    assert merged.buckets == single.buckets
+    assert merged.summary() == single.summary()
+
+
+def test_histogram_fits_goals():
+    summary = reducers.BatchSummary.up_to(40)
+    for profile, record in batch.process(parallel.sample_lines(200)):
+        if profile is not None and profile.goal <= 40:
+            summary.add(profile, record["results"])
+    assert summary.plans
+    assert summary.summary()["Skill-ups"]["Histogram"]["Above"] == 0
+
+
+def test_batch_summary_merge():
+    pairs = batch.process(parallel.sample_lines(300, seed=3))
+    single = reducers.BatchSummary()
+    for _ in single.observe(pairs):
+        pass
+    merged = reducers.BatchSummary()
+    for part in split(pairs):
+        worker = merged.spawn()
+        for _ in worker.observe(part):
+            pass
+        merged.merge(worker)
+    assert_close(single.summary(), merged.summary())
+
+
+@pytest.mark.parametrize("kind", ["thread", "process"])
+def test_parallel_summary(kind):
+    lines = parallel.sample_lines(200, seed=4)
+    single = reducers.BatchSummary()
+    for _ in single.observe(batch.run_profiles(lines)):
+        pass
+    summary = reducers.BatchSummary()
+    for _ in parallel.run_profiles(lines, 2, kind, summary=summary):
+        pass
+    assert_close(single.summary(), summary.summary())
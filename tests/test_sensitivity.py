@@ -0,0 +1,113 @@
+import random
+
+import pytest
+
+import calculator as calc
+import sensitivity
+
+SKILLS = ("Alchemy", "Archery", "Block", "Destruction", "Smithing", "Sneak")
+SETTINGS = {
+    "vanilla": calc.DEFAULT_SETTINGS,
+    "no legendary": calc.GameSettings(legendary=False),
+    "cap 150": calc.GameSettings(skill_cap=150, legendary_level=20),
+}
+
+
+def plan_of(skill_levels, now, goal, strategy, settings):
+    """Return the Plan of a plain simulation, None if it fails."""
+    try:
+        result = calc.simulate_strategy(skill_levels, now, goal, strategy,
+                                        settings=settings)
+    except ValueError:
+        return None
+    tables = calc.get_tables(settings)
+    skill_xp = 0.0
+    for entry in result.values():
+        level = entry["Start Level"]
+        for _ in range(entry["Times Leveled"]):
+            skill_xp += tables.skill_xp[level]
+            level = tables.next_level[level]
+    return sensitivity.Plan(
+        sum(entry["Times Leveled"] for entry in result.values()), skill_xp,
+        [result[skill]["Final Level"] for skill in skill_levels])
+
+
+def brute_force(skill_levels, now, goal, strategy, settings):
+    base = plan_of(skill_levels, now, goal, strategy, settings)
+    report = {}
+    for skill in skill_levels:
+        report[skill] = {}
+        for delta in (1, -1):
+            start = skill_levels[skill] + delta
+            neighbor = None
+            if sensitivity.LOWEST_SKILL_LEVEL <= start <= settings.skill_cap:
+                neighbor = plan_of(dict(skill_levels, **{skill: start}), now,
+                                   goal, strategy, settings)
+            report[skill][delta] = None if neighbor is None else {
+                "Skill-ups": neighbor.skill_ups - base.skill_ups,
+                "Skill XP": neighbor.skill_xp - base.skill_xp,
+                "Final Levels": {
+                    s: new - old for s, new, old in
+                    zip(skill_levels, neighbor.final_levels,
+                        base.final_levels)}}
+    return report
+
+
+def profiles(settings, count=30, seed=0):
+    rng = random.Random(seed)
+    found = 0
+    while found < count:
+        skills = rng.sample(SKILLS, rng.randint(1, len(SKILLS)))
+        # few levels for ties, levels at the limits for invalid neighbors
+        pool = [rng.choice((15, settings.skill_cap,
+                            rng.randint(15, settings.skill_cap)))
+                for _ in range(3)]
+        skill_levels = {skill: rng.choice(pool) for skill in skills}
+        now = rng.randint(1, 40)
+        goal = now + rng.randint(1, 60)
+        try:
+            calc.simulate_strategy(skill_levels, now, goal, "easy",
+                                   settings=settings)
+        except ValueError:
+            continue  # analyze() needs a reachable base plan
+        found += 1
+        yield skill_levels, now, goal
+
+
+def assert_same(expected, actual):
+    assert expected.keys() == actual.keys()
+    for skill in expected:
+        for delta in (1, -1):
+            if expected[skill][delta] is None:
+                assert actual[skill][delta] is None
+                continue
+            change = actual[skill][delta]
+            assert change["Skill-ups"] == expected[skill][delta]["Skill-ups"]
+            assert change["Final Levels"] == \
+                expected[skill][delta]["Final Levels"]
+            assert change["Skill XP"] == \
+                pytest.approx(expected[skill][delta]["Skill XP"], abs=1e-6)
+
+
+@pytest.mark.parametrize("strategy", calc.STRATEGIES)
+@pytest.mark.parametrize("name", sorted(SETTINGS))
+def test_matches_brute_force(strategy, name):
+    settings = SETTINGS[name]
+    for skill_levels, now, goal in profiles(settings):
+        assert_same(brute_force(skill_levels, now, goal, strategy, settings),
+                    sensitivity.analyze(skill_levels, now, goal, strategy,
+                                        settings))
+
+
+@pytest.mark.parametrize("strategy", calc.STRATEGIES)
+def test_unreachable_neighbors(strategy):
+    # without legendary skills, a level more leaves one level-up less:
+    # 99 + 100 + 100 skill levels to gain, 225 needed for level 3
+    settings = calc.GameSettings(legendary=False)
+    skill_levels = {"Block": 98, "Sneak": 99, "Archery": 100}
+    report = sensitivity.analyze(skill_levels, 1, 3, strategy, settings)
+    assert report == brute_force(skill_levels, 1, 3, strategy, settings)
+    assert report["Block"][1] is None
+    assert report["Sneak"][1] is None
+    assert report["Archery"][1] is None  # above the cap
+    assert all(report[skill][-1] is not None for skill in skill_levels)
@@ -0,0 +1,32 @@
+import asyncio
+import json
+
+import server
+
+PROFILES = [{"race": "Nord", "goal": 30},
+            {"skill_levels": {"Block": 10}, "now": 1, "goal": 10},
+            {"race": "Nord", "goal": 400},
+            "not a profile"]
+
+
+def validate(data):
+    service = server.CalculatorService(executor=None)
+    return asyncio.run(service.handle("POST", "/validate",
+                                      json.dumps(data).encode("utf-8")))
+
+
+def test_validate_list_like_single_profiles():
+    status, payload = validate(PROFILES)
+    assert status == 200
+    assert payload["valid"] == [True, False, False, False]
+    assert payload["errors"][0] is None
+    for i, profile in enumerate(PROFILES):
+        single_status, single = validate(profile)
+        if payload["valid"][i]:
+            assert (single_status, single) == (200, {"valid": True})
+            assert payload["problems"][i] == []
+        else:
+            assert single_status == 400
+            assert payload["errors"][i] == single["error"]
+            assert payload["problems"][i] == single["problems"]
+            assert isinstance(payload["problems"][i], list)
@@ -0,0 +1,35 @@
+import socket
+
+import pytest
+
+import batch
+import parallel
+import shard
+
+
+@pytest.mark.parametrize("unix", [True, False])
+def test_local_workers(tmp_path, monkeypatch, unix):
+    if unix and not hasattr(socket, "AF_UNIX"):
+        pytest.skip("no Unix sockets")
+    if not unix:
+        monkeypatch.delattr(socket, "AF_UNIX", raising=False)
+    lines = parallel.sample_lines(100, seed=5)
+    processes, addresses = shard.start_local_workers(2, str(tmp_path))
+    try:
+        assert all(address.startswith("unix:") == unix
+                   for address in addresses)
+        coordinator = shard.Coordinator(addresses, chunk_lines=16)
+        assert list(coordinator.run(lines)) == \
+            [record for _, record in batch.process(lines)]
+    finally:
+        for process in processes:
+            process.terminate()
+            process.join()
+
+
+def test_unix_address_without_unix_sockets(monkeypatch):
+    monkeypatch.delattr(socket, "AF_UNIX", raising=False)
+    with pytest.raises(ValueError):
+        shard.parse_address("unix:/tmp/worker.sock")
+    assert shard.parse_address("localhost:9000") == \
+        (socket.AF_INET, ("localhost", 9000))
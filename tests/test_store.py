@@ -0,0 +1,94 @@
+import io
+import json
+
+import numpy as np
+import pytest
+
+import batch
+import calculator as calc
+import store
+from inputparser import GameData
+
+PLANS = [({"Block": 15, "Sneak": 20}, 1, 30, "fast", "Nord", 7),
+         ({"Alchemy": 40}, 12, 20, "easy", None, "not an int"),
+         ({"Archery": 100, "Smithing": 99, "Sneak": 15}, 40, 90, "balanced",
+          "Khajiit", store.ID_RANGE[1]),
+         ({"Destruction": 30}, 2, 5, "balanced", None, None)]
+
+
+def written(path, plans=PLANS, chunk_rows=4096):
+    expected = []
+    with store.StoreWriter(path, chunk_rows) as writer:
+        for skill_levels, now, goal, strategy, race, id_ in plans:
+            result = calc.simulate_strategy(skill_levels, now, goal, strategy)
+            writer.add(result, now, goal, strategy, race, id_)
+            expected.append(({"id": id_ if isinstance(id_, int) else None,
+                              "now": now, "goal": goal,
+                              "strategy": strategy, "race": race}, result))
+    return expected
+
+
+@pytest.mark.parametrize("chunk_rows", [1, 3, 4096])
+def test_round_trip(tmp_path, chunk_rows):
+    path = str(tmp_path / "plans.store")
+    expected = written(path, chunk_rows=chunk_rows)
+    with store.StoreReader(path) as reader:
+        assert len(reader) == len(expected)
+        assert [reader.row(i) for i in range(len(reader))] == expected
+        with pytest.raises(IndexError):
+            reader.row(len(expected))
+
+        for name, _, width in store.COLUMNS:
+            view = reader.column(name)
+            values = reader.array(name)
+            assert values.shape == ((len(expected),) if width == 1 else
+                                    (len(expected), width))
+            assert view.tolist() == values.tolist()
+            view.release()
+            del values
+
+        sneak = GameData.SKILL_IDS["Sneak"]
+        final = reader.array("final")
+        assert final[:, sneak].tolist() == [
+            result.get("Sneak", {}).get("Final Level", -1)
+            for _, result in expected]
+        assert reader.array("goal").dtype == np.int16
+        assert reader.array("id")[1] == store.NO_ID
+        del final
+
+
+def test_invalid_values_leave_store_unchanged(tmp_path):
+    path = str(tmp_path / "plans.store")
+    result = calc.simulate_strategy({"Block": 15}, 1, 10, "fast")
+    with store.StoreWriter(path) as writer:
+        writer.add(result, 1, 10, "fast", id_=1)
+        bad = [dict(now=40000), dict(id_=store.NO_ID),
+               dict(id_=store.ID_RANGE[1] + 1), dict(strategy="slow"),
+               dict(race="Dwemer"),
+               dict(result={"Block": dict(result["Block"],
+                                          **{"Final Level": 1 << 15})})]
+        for changes in bad:
+            arguments = dict(result=result, now=1, goal=10, strategy="fast")
+            arguments.update(changes)
+            with pytest.raises(ValueError):
+                writer.add(**arguments)
+        with pytest.raises(ValueError):
+            writer.add_plans({"fast": result, "easy": result}, 1, 40000)
+        writer.add_plans({"fast": result, "easy": result}, 1, 10, id_=2)
+    with store.StoreReader(path) as reader:
+        assert len(reader) == 3
+        assert [reader.row(i)[0]["id"] for i in range(3)] == [1, 2, 2]
+        assert all(reader.row(i)[1] == result for i in range(3))
+
+
+def test_write_store_reports_ids(tmp_path):
+    path = str(tmp_path / "plans.store")
+    lines = [json.dumps({"id": id_, "skill_levels": {"Block": 15},
+                         "now": 1, "goal": 10}) for id_ in (1, -1)]
+    errors = io.StringIO()
+    batch.write_store(batch.process(lines), path, errors)
+    assert [json.loads(line)["id"] for line in
+            errors.getvalue().splitlines()] == [-1]
+    with store.StoreReader(path) as reader:
+        assert len(reader) == len(calc.STRATEGIES)
+        assert {reader.row(i)[0]["id"] for i in range(len(reader))} == {1}
@@ -0,0 +1,92 @@
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+# the modules import each other by name, as when run from inside skycalc/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                "..", "skycalc"))
+
+import batch  # noqa: E402
+import calculator as calc  # noqa: E402
+import workspace  # noqa: E402
+
+
+class WorkspaceTest(unittest.TestCase):
+
+    def setUp(self):
+        self.workspace = workspace.Workspace(path=None)
+
+    def tearDown(self):
+        self.workspace.close()
+
+    def wait(self, name):
+        deadline = time.monotonic() + 30
+        while not self.workspace.is_ready(name):
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+        return self.workspace.plans(name)
+
+    def test_skill_order_is_kept(self):
+        # ties go to the skill that comes first
+        self.workspace.put("a", batch.Profile({"Block": 20, "Sneak": 20},
+                                              1, 10))
+        self.workspace.put("b", batch.Profile({"Sneak": 20, "Block": 20},
+                                              1, 10))
+        fast = calc.STRATEGIES.index("fast")
+        a = self.wait("a").data[fast]
+        b = self.wait("b").data[fast]
+        self.assertGreater(a["Block"]["Times Leveled"],
+                           a["Sneak"]["Times Leveled"])
+        self.assertGreater(b["Sneak"]["Times Leveled"],
+                           b["Block"]["Times Leveled"])
+
+    def test_calculated_plans_are_kept(self):
+        profile = batch.Profile({"Block": 20, "Sneak": 30}, 5, 20)
+        plans = workspace.calculate(profile.skill_levels, profile.now,
+                                    profile.goal)
+        self.workspace.put("a", profile, plans)
+        self.assertTrue(self.workspace.is_ready("a"))
+        self.assertIs(self.workspace.plans("a"), plans)
+        self.workspace.remove("a")  # nothing to cancel
+
+    def test_save_creates_directory(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "skycalc", "profiles.jsonl")
+            saved = workspace.Workspace(path)
+            try:
+                saved.put("a", batch.Profile({"Block": 20}, 1, 10))
+            finally:
+                saved.close()
+            loaded = workspace.Workspace(path)
+            try:
+                self.assertEqual(loaded.load(), 0)
+                self.assertEqual(loaded.names(), ["a"])
+            finally:
+                loaded.close()
+
+
+class CalculateTest(unittest.TestCase):
+
+    def test_exact_plans_come_first(self):
+        events = []
+        analyze = workspace.sensitivity.analyze
+
+        def analyze_later(*args, **kwargs):
+            events.append("sensitivity")
+            return analyze(*args, **kwargs)
+
+        workspace.sensitivity.analyze = analyze_later
+        try:
+            plans = workspace.calculate({"Block": 20, "Sneak": 30}, 5, 20,
+                                        exact=events.append)
+        finally:
+            workspace.sensitivity.analyze = analyze
+        self.assertEqual(events[0], plans.data)
+        self.assertEqual(events[1:], ["sensitivity"] * len(calc.STRATEGIES))
+        self.assertEqual(len(plans.sweeps), len(calc.STRATEGIES))
+
+
+if __name__ == "__main__":
+    unittest.main()